@@ -25,6 +25,7 @@ from __future__ import annotations
 
 import abc
 import logging
+import time
 import typing
 
 # AKL modules
@@ -35,6 +36,14 @@ logger = logging.getLogger(__name__)
 
 VERBOSE = False
 
+# Number of ROMs requested at once by the iterating client methods.
+ROMS_PAGE_SIZE = 500
+# Number of ROMs posted at once by the batched client methods.
+ROMS_POST_BATCH_SIZE = 250
+# Failed batches are posted again after 2, 4 and 8 seconds.
+POST_RETRIES = 3
+POST_RETRY_DELAY = 2.0
+
 
 ###############################################################
 # CLIENT METHODS
@@ -49,26 +58,114 @@ def client_get_rom(host: str, port: int, rom_id: str) -> ROMObj:
 
 def client_get_roms_in_source(host: str, port: int, source_id: str) -> typing.List[ROMObj]:
     uri = f'http://{host}:{port}/query/source/roms/?id={source_id}'
-    rom_data = net.get_URL_as_json(uri)
-    if VERBOSE:
-        logger.debug(rom_data)
     roms = []
-    for rom_entry in rom_data:
+    for rom_entry in net.get_URL_as_json_array_stream(uri):
+        if VERBOSE:
+            logger.debug(rom_entry)
         roms.append(ROMObj(rom_entry))
     return roms
 
 
 def client_get_roms_in_collection(host: str, port: int, rom_collection_id: str) -> typing.List[ROMObj]:
     uri = f'http://{host}:{port}/query/romcollection/roms/?id={rom_collection_id}'
-    rom_data = net.get_URL_as_json(uri)
-    if VERBOSE:
-        logger.debug(rom_data)
     roms = []
-    for rom_entry in rom_data:
+    for rom_entry in net.get_URL_as_json_array_stream(uri):
+        if VERBOSE:
+            logger.debug(rom_entry)
         roms.append(ROMObj(rom_entry))
     return roms
 
 
+# Yields the ROMs of a source page by page, so the first ROMs can be processed while the
+# remaining ROMs are still retrieved.
+# @param fields: [list] Only retrieve these ROM fields, for example ['id', 'scanned_data']. Default all fields.
+#                 The other fields are always removed, but only a webservice that supports the fields
+#                 parameter leaves them out of the response. Otherwise they are still downloaded and parsed.
+# @param page_size: [int] Number of ROMs requested at once.
+def client_iter_roms_in_source(host: str, port: int, source_id: str, fields: typing.List[str] = None,
+                               page_size: int = ROMS_PAGE_SIZE) -> typing.Iterator[ROMObj]:
+    uri = f'http://{host}:{port}/query/source/roms/?id={source_id}'
+    return _client_iter_roms(uri, fields, page_size)
+
+
+def client_iter_roms_in_collection(host: str, port: int, rom_collection_id: str, fields: typing.List[str] = None,
+                                   page_size: int = ROMS_PAGE_SIZE) -> typing.Iterator[ROMObj]:
+    uri = f'http://{host}:{port}/query/romcollection/roms/?id={rom_collection_id}'
+    return _client_iter_roms(uri, fields, page_size)
+
+
+# Yields the ROMs of a source as a list per retrieved page, for callers that process the ROMs
+# of a page together.
+def client_iter_rom_pages_in_source(host: str, port: int, source_id: str, fields: typing.List[str] = None,
+                                    page_size: int = ROMS_PAGE_SIZE) -> typing.Iterator[typing.List[ROMObj]]:
+    uri = f'http://{host}:{port}/query/source/roms/?id={source_id}'
+    return _client_iter_rom_pages(uri, fields, page_size)
+
+
+def client_iter_rom_pages_in_collection(host: str, port: int, rom_collection_id: str, fields: typing.List[str] = None,
+                                        page_size: int = ROMS_PAGE_SIZE) -> typing.Iterator[typing.List[ROMObj]]:
+    uri = f'http://{host}:{port}/query/romcollection/roms/?id={rom_collection_id}'
+    return _client_iter_rom_pages(uri, fields, page_size)
+
+
+def _client_iter_rom_pages(uri: str, fields: typing.List[str], page_size: int) -> typing.Iterator[typing.List[ROMObj]]:
+    page = []
+    for rom in _client_iter_roms_and_page_ends(uri, fields, page_size):
+        if rom is not None:
+            page.append(rom)
+        elif page:
+            yield page
+            page = []
+
+
+def _client_iter_roms(uri: str, fields: typing.List[str], page_size: int) -> typing.Iterator[ROMObj]:
+    for rom in _client_iter_roms_and_page_ends(uri, fields, page_size):
+        if rom is not None:
+            yield rom
+
+
+# Requests the ROMs with offset and limit parameters until a page is not full.
+# A webservice without paging returns all ROMs at once. That page is either larger than the
+# page size or, when it happens to have the exact page size, repeated for the next offset.
+# ROMs are recognised by id, so a page without new ROMs ends the iteration. ROMs without id
+# cannot be recognised and are always new.
+# The fields are requested with the fields parameter. Less data is only transferred and parsed
+# when the webservice supports it, the fields are removed here in any case.
+# Yields the ROMs and None after the last ROM of every page.
+def _client_iter_roms_and_page_ends(uri: str, fields: typing.List[str],
+                                    page_size: int) -> typing.Iterator[ROMObj]:
+    fields_arg = ''
+    if fields:
+        fields = set(fields)
+        fields.add('id')
+        fields_arg = '&fields={}'.format(','.join(sorted(fields)))
+
+    seen_ids = set()
+    offset = 0
+    while True:
+        # The page is parsed while it is downloaded, so only single ROMs are kept in memory.
+        num_page_roms = 0
+        num_new_roms = 0
+        for rom_entry in net.get_URL_as_json_array_stream(f'{uri}&offset={offset}&limit={page_size}{fields_arg}'):
+            num_page_roms += 1
+            if VERBOSE:
+                logger.debug(rom_entry)
+            rom_id = rom_entry.get('id')
+            if rom_id is not None:
+                if rom_id in seen_ids:
+                    continue
+                seen_ids.add(rom_id)
+            num_new_roms += 1
+            if fields:
+                rom_entry = {key: value for key, value in rom_entry.items() if key in fields}
+            yield ROMObj(rom_entry)
+        yield None
+
+        if num_page_roms != page_size or num_new_roms == 0:
+            return
+        offset += page_size
+
+
 def client_get_source_launchers(host: str, port: int, source_id: str) -> dict:
     uri = f'http://{host}:{port}/query/source/launchers/?id={source_id}'
     launchers = net.get_URL_as_json(uri)
@@ -131,6 +228,14 @@ def client_post_scanned_roms(host: str, port: int, data: dict) -> bool:
     return code == 200
 
 
+# Posts the scanned ROMs in batches. See _client_post_roms_in_batches().
+def client_post_scanned_roms_in_batches(host: str, port: int, data: dict, roms: typing.List[ROMObj],
+                                        batch_size: int = ROMS_POST_BATCH_SIZE, compress: bool = False,
+                                        progress_callback=None) -> typing.List[ROMObj]:
+    uri = f'http://{host}:{port}/store/roms/added'
+    return _client_post_roms_in_batches(uri, data, roms, batch_size, compress, progress_callback)
+
+
 def client_post_dead_roms(host: str, port: int, data: dict) -> bool:
     uri = f'http://{host}:{port}/store/roms/dead'
     if VERBOSE:
@@ -161,6 +266,67 @@ def client_post_scraped_roms(host: str, port: int, data: dict) -> bool:
     return code == 200
 
 
+# Posts the scraped ROMs in batches. See _client_post_roms_in_batches().
+def client_post_scraped_roms_in_batches(host: str, port: int, data: dict, roms: typing.List[ROMObj],
+                                        batch_size: int = ROMS_POST_BATCH_SIZE, compress: bool = False,
+                                        progress_callback=None) -> typing.List[ROMObj]:
+    uri = f'http://{host}:{port}/store/roms/updated'
+    return _client_post_roms_in_batches(uri, data, roms, batch_size, compress, progress_callback)
+
+
+# Posts the ROMs in batches instead of all ROMs in one request. Every batch is a complete request
+# with the other fields of data and the ROMs of the batch in 'roms', and is acknowledged by the
+# webservice on its own. Failed batches are retried and the other batches are still posted.
+# Returns the ROMs which were not stored, so posting them again resumes a partially failed post.
+#
+# @param data: [dict] Fields posted with every batch, without the ROMs.
+# @param roms: [list] ROMs to post.
+# @param batch_size: [int] Number of ROMs in a request.
+# @param compress: [bool] Send gzip compressed requests. The webservice must support this.
+# @param progress_callback: [function] Called with the number of stored and the total number of ROMs.
+def _client_post_roms_in_batches(uri: str, data: dict, roms: typing.List[ROMObj], batch_size: int,
+                                 compress: bool, progress_callback) -> typing.List[ROMObj]:
+    num_roms = len(roms)
+    num_stored = 0
+    unstored_roms = []
+    for offset in range(0, num_roms, batch_size):
+        batch = roms[offset:offset + batch_size]
+        post_data = dict(data)
+        post_data['roms'] = [rom.get_data_dic() for rom in batch]
+        if _client_post_batch(uri, post_data, compress):
+            num_stored += len(batch)
+        else:
+            logger.error(f'Failed to post ROMs {offset + 1} to {offset + len(batch)} of {num_roms}')
+            unstored_roms.extend(batch)
+        if progress_callback is not None:
+            progress_callback(num_stored, num_roms)
+
+    logger.debug(f'Posted {num_stored} of {num_roms} ROMs to "{uri}"')
+    return unstored_roms
+
+
+# Storing ROMs is not idempotent, a request that reached the webservice is never sent again.
+# Only requests that were not sent (no connection) and 503 responses (not processed) are retried.
+def _client_post_batch(uri: str, post_data: dict, compress: bool) -> bool:
+    if VERBOSE:
+        logger.debug(f'POST REQUEST: {post_data}')
+    # The retries are done here only, so the session does not retry connection errors too.
+    session = net.get_http_session(uri, retries=False)
+    for attempt in range(POST_RETRIES + 1):
+        if attempt > 0:
+            delay = POST_RETRY_DELAY * (2 ** (attempt - 1))
+            logger.warning(f'Posting to "{uri}" failed, retry {attempt} in {delay:.0f} seconds')
+            time.sleep(delay)
+        response_data, code = net.post_JSON_URL(uri, post_data, compress=compress, session=session)
+        if VERBOSE:
+            logger.debug(f'RESPONSE: {response_data}')
+        if code == 200:
+            return True
+        if code is not None and code != 503:
+            return False
+    return False
+
+
 ###############################################################
 # CLIENT OBJECTS
 ###############################################################
@@ -44,6 +44,15 @@ class ROMCandidateABC(object):
     def get_sort_value(self) -> str:
         return None
 
+    # Returns the file of this candidate. Used by incremental scans to detect added, changed and
+    # removed files. Candidates without a file are always processed.
+    def get_file(self) -> io.FileName:
+        return None
+
+
+# Redump '(Disc 1)' and TOSEC/Trurip '(Disc 1 of 2)' multidisc tokens.
+MULTIDISC_TOKEN_PATTERN = re.compile(r'\(Dis[ck] ([0-9]+)(?: of [0-9]+)?\)')
+
 
 class MultiDiscInfo:
     def __init__(self, ROM_FN: io.FileName):
@@ -56,55 +65,65 @@ class MultiDiscInfo:
 
     @staticmethod
     def get_multidisc_info(ROM_FN: io.FileName) -> MultiDiscInfo:
+        MDSet = MultiDiscInfo._parse_multidisc_info(ROM_FN)
+        if MDSet.isMultiDisc:
+            logger.debug('get_multidisc_info() "{0}" is disc {1} of set "{2}"'.format(
+                MDSet.discName, MDSet.order, MDSet.setName))
+
+        return MDSet
+
+    # Detects the multidisc sets of a full list of ROM files in a single pass.
+    # Returns a dictionary with the path of the set as key and the MultiDiscInfo of its files,
+    # ordered by disc number, as value. The dictionary keeps the order of the first file of each set.
+    # Files that are not part of a multidisc set are a set of their own with their path as key.
+    # A file with the name of a set, like a first disc without disc token, is added to the set
+    # as disc 0.
+    # Meant for scanner addons, which collect their own candidates. Nothing in this module calls it.
+    @staticmethod
+    def get_multidisc_sets(ROM_FNs: typing.Iterable[io.FileName]) -> typing.Dict[str, typing.List[MultiDiscInfo]]:
+        MDSets = {}
+        num_discs = 0
+        for ROM_FN in ROM_FNs:
+            MDSet = MultiDiscInfo._parse_multidisc_info(ROM_FN)
+            if MDSet.isMultiDisc:
+                num_discs += 1
+                set_path = ROM_FN.getDir() + MDSet.setName
+            else:
+                set_path = ROM_FN.getPath()
+            if set_path in MDSets:
+                MDSets[set_path].append(MDSet)
+            else:
+                MDSets[set_path] = [MDSet]
+
+        num_sets = 0
+        for discs in MDSets.values():
+            if len(discs) > 1:
+                num_sets += 1
+                discs.sort(key=lambda disc: disc.order)
+        logger.debug('get_multidisc_sets() {0} discs in {1} multidisc sets'.format(num_discs, num_sets))
+
+        return MDSets
+
+    # Algorithm:
+    # 1) Split the ROM base_noext into tokens. Trurip '-' tokens are removed.
+    # 2) The first token that marks a multidisc ROM gives the set order
+    # 3) The set basename are the other tokens
+    @staticmethod
+    def _parse_multidisc_info(ROM_FN: io.FileName) -> MultiDiscInfo:
         MDSet = MultiDiscInfo(ROM_FN)
-        
-        # --- Parse ROM base_noext into tokens ---
-        tokens = text.get_ROM_basename_tokens(ROM_FN.getBaseNoExt())
-
-        # --- Check if ROM belongs to a multidisc set and get set name and order ---
-        # Algortihm:
-        # 1) Iterate list of tokens
-        # 2) If a token marks a multidisk ROM extract set order
-        # 3) Define the set basename by removing the multidisk token
-        MultDiscFound = False
-        for index, token in enumerate(tokens):
-            # --- Redump ---
-            matchObj = re.match(r'\(Dis[ck] ([0-9]+)\)', token)
-            if matchObj:
-                logger.debug('get_multidisc_info() ### Matched Redump multidisc ROM ###')
-                tokens_idx = list(range(0, len(tokens)))
-                tokens_idx.remove(index)
-                tokens_nodisc_idx = list(tokens_idx)
-                tokens_mdisc = [tokens[x] for x in tokens_nodisc_idx]
-                MultDiscFound = True
-                break
+        base_noext = MDSet.discName[:len(MDSet.discName) - len(MDSet.extension)]
+        if '(Dis' not in base_noext:
+            return MDSet
 
-            # --- TOSEC/Trurip ---
-            matchObj = re.match(r'\(Dis[ck] ([0-9]+) of ([0-9]+)\)', token)
+        tokens = text.get_ROM_basename_tokens(base_noext)
+        for index, token in enumerate(tokens):
+            matchObj = MULTIDISC_TOKEN_PATTERN.fullmatch(token)
             if matchObj:
-                logger.debug('get_multidisc_info() ### Matched TOSEC/Trurip multidisc ROM ###')
-                tokens_idx = list(range(0, len(tokens)))
-                tokens_idx.remove(index)
-                tokens_nodisc_idx = list(tokens_idx)
-                # logger.debug('text_get_multidisc_info() tokens_idx         = {0}'.format(tokens_idx))
-                # logger.debug('text_get_multidisc_info() index              = {0}'.format(index))
-                # logger.debug('text_get_multidisc_info() tokens_nodisc_idx  = {0}'.format(tokens_nodisc_idx))
-                tokens_mdisc = [tokens[x] for x in tokens_nodisc_idx]
-                MultDiscFound = True
+                MDSet.isMultiDisc = True
+                MDSet.setName = ' '.join(tokens[:index] + tokens[index + 1:]) + MDSet.extension
+                MDSet.order = int(matchObj.group(1))
                 break
 
-        if MultDiscFound:
-            MDSet.isMultiDisc = True
-            MDSet.setName = ' '.join(tokens_mdisc) + MDSet.extension
-            MDSet.order = int(matchObj.group(1))
-            logger.debug('get_multidisc_info() base_noext   "{0}"'.format(ROM_FN.getBaseNoExt()))
-            logger.debug('get_multidisc_info() tokens       {0}'.format(tokens))
-            logger.debug('get_multidisc_info() tokens_mdisc {0}'.format(tokens_mdisc))
-            logger.debug('get_multidisc_info() setName      "{0}"'.format(MDSet.setName))
-            logger.debug('get_multidisc_info() discName     "{0}"'.format(MDSet.discName))
-            logger.debug('get_multidisc_info() extension    "{0}"'.format(MDSet.extension))
-            logger.debug('get_multidisc_info() order        {0}'.format(MDSet.order))
-
         return MDSet
 
 
@@ -113,6 +132,145 @@ class MultiDiscInfo:
 # ROM scanners
 # #################################################################################################
 # #################################################################################################
+# Normalises a file path for comparisons. Directory separators are always '/' and
+# optionally the case is ignored. When ignore_case is None it depends on the file system of
+# the path, see is_case_insensitive_path().
+def normalise_file_path(path: str, ignore_case: bool = False) -> str:
+    if ignore_case is None:
+        ignore_case = is_case_insensitive_path(path)
+    path = path.replace('\\', '/')
+    return path.lower() if ignore_case else path
+
+
+WINDOWS_DRIVE_PATH_PATTERN = re.compile(r'^[A-Za-z]:[\\/]')
+
+# Paths on Windows and macOS, Windows drive paths and SMB shares are case-insensitive.
+# Other paths, like local paths on Linux and Android or NFS shares, are case-sensitive.
+def is_case_insensitive_path(path: str) -> bool:
+    if io.is_windows() or io.is_osx():
+        return True
+    return path[:6].lower() == 'smb://' or WINDOWS_DRIVE_PATH_PATTERN.match(path) is not None
+
+
+#
+# Returns the ROMs of which the file in the scanned data is not one of the given candidate files.
+# The candidate paths are put in a hashed index, so this takes linear time.
+# ROMs without a file in the scanned data are never dead.
+# By default the case of the paths is ignored depending on their file system.
+#
+def find_dead_roms(candidate_paths: typing.Iterable[str],
+                   roms: typing.List[ROMObj],
+                   ignore_case: bool = None) -> typing.List[ROMObj]:
+    candidate_index = set(normalise_file_path(path, ignore_case) for path in candidate_paths)
+    dead_roms = []
+    for rom in roms:
+        rom_file = rom.get_scanned_data_element('file')
+        if not rom_file:
+            continue
+        if normalise_file_path(rom_file, ignore_case) not in candidate_index:
+            dead_roms.append(rom)
+    return dead_roms
+
+
+# Difference between the files found in the current scan and the files found in the previous scan.
+class ScanDelta(object):
+    def __init__(self, is_initial_scan: bool):
+        # True if there was no previous scan to compare with.
+        self.is_initial_scan = is_initial_scan
+        self.added: typing.List[str] = []
+        self.changed: typing.List[str] = []
+        self.removed: typing.List[str] = []
+        self.num_unchanged = 0
+
+    def has_changes(self) -> bool:
+        return self.is_initial_scan or len(self.added) > 0 or len(self.changed) > 0 or len(self.removed) > 0
+
+
+#
+# Persisted manifest with the size and modification time (and optionally the CRC) of every file
+# found in the last scan of a source. Comparing the files of a new scan with the manifest tells
+# which files were added, changed or removed, so only those need to be processed.
+#
+# Entries are stored as { path: [size, mtime, crc] }.
+#
+class ScanManifest(object):
+    def __init__(self, manifest_FN: io.FileName, use_checksums: bool = False,
+                 checksum_store: io.ChecksumStore = None):
+        self.manifest_FN = manifest_FN
+        # When a file has a different size or modification time its CRC is compared too, so
+        # files that are only touched or copied again are not processed as changed.
+        self.use_checksums = use_checksums
+        # Optional persistent store of the checksums of the compared files.
+        self.checksum_store = checksum_store
+        self.entries: typing.Dict[str, list] = {}
+        self.pending_entries: typing.Dict[str, list] = None
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if not self.manifest_FN.exists():
+            return
+        try:
+            self.entries = self.manifest_FN.readJson()
+        except Exception:
+            logger.exception(f'Failure loading scan manifest "{self.manifest_FN.getPath()}"')
+
+    def is_empty(self) -> bool:
+        return len(self.entries) == 0
+
+    # Compares the files with the manifest. The new state of the files is kept until commit().
+    def compare(self, files: typing.List[io.FileName]) -> ScanDelta:
+        delta = ScanDelta(self.is_empty())
+        self.pending_entries = {}
+        modified_files = []
+        for file in files:
+            path = file.getPath()
+            previous_entry = self.entries.get(path)
+            try:
+                size, mtime = io.misc_get_size_and_mtime(file)
+            except Exception:
+                logger.warning(f'Cannot stat file "{path}"')
+                continue
+
+            entry = [size, mtime, None]
+            self.pending_entries[path] = entry
+            if previous_entry is not None and previous_entry[0] == size and previous_entry[1] == mtime:
+                entry[2] = previous_entry[2]
+                delta.num_unchanged += 1
+            else:
+                modified_files.append(file)
+
+        checksums = {}
+        if self.use_checksums:
+            checksums = io.misc_calculate_checksums_bulk(modified_files, store=self.checksum_store)
+        for file in modified_files:
+            path = file.getPath()
+            previous_entry = self.entries.get(path)
+            entry = self.pending_entries[path]
+            if checksums.get(path):
+                entry[2] = checksums[path]['crc']
+            if previous_entry is None:
+                delta.added.append(path)
+            elif entry[2] is not None and entry[2] == previous_entry[2]:
+                delta.num_unchanged += 1
+            else:
+                delta.changed.append(path)
+
+        delta.removed = [path for path in self.entries if path not in self.pending_entries]
+        return delta
+
+    # Stores the state of the last compared files as the new manifest.
+    def commit(self):
+        if self.pending_entries is None:
+            return
+        self.entries = self.pending_entries
+        self.pending_entries = None
+        try:
+            self.manifest_FN.writeJson(self.entries, JSON_indent=None)
+        except Exception:
+            logger.exception(f'Failure storing scan manifest "{self.manifest_FN.getPath()}"')
+
+
 class ScannerStrategyABC(object):
     __metaclass__ = abc.ABCMeta
 
@@ -212,17 +370,24 @@ class ScannerStrategyABC(object):
         if not is_stored:
             kodi.notify_error('Failed to store scanner settings')
      
-    def store_scanned_roms(self):
-        roms = [*(r.get_data_dic() for r in self.scanned_roms)]
+    # The ROMs are posted in batches. ROMs of failed batches are kept in scanned_roms, so storing
+    # again only posts the ROMs which are not stored yet.
+    def store_scanned_roms(self) -> bool:
         post_data = {
-            'source_id': self.source_id,
-            'roms': roms
+            'source_id': self.source_id
         }
-        is_stored = api.client_post_scanned_roms(self.webservice_host, self.webservice_port, post_data)
+        self.progress_dialog.startProgress('Storing scanned ROMs', max(1, len(self.scanned_roms)))
+        self.scanned_roms = api.client_post_scanned_roms_in_batches(
+            self.webservice_host, self.webservice_port, post_data, self.scanned_roms,
+            progress_callback=lambda num_stored, num_roms: self.progress_dialog.updateProgress(num_stored))
+        self.progress_dialog.endProgress()
+
+        is_stored = len(self.scanned_roms) == 0
         if not is_stored:
-            kodi.notify_error('Failed to store scanned ROMs')
+            kodi.notify_error(f'Failed to store {len(self.scanned_roms)} scanned ROMs')
+        return is_stored
 
-    def remove_dead_roms(self):
+    def remove_dead_roms(self) -> bool:
         dead_rom_ids = [*(r.get_id() for r in self.marked_dead_roms)]
         post_data = {
             'source_id': self.source_id,
@@ -231,6 +396,7 @@ class ScannerStrategyABC(object):
         is_removed = api.client_post_dead_roms(self.webservice_host, self.webservice_port, post_data)
         if not is_removed:
             kodi.notify_error('Failed to remove dead ROMs')
+        return is_removed
 
 
 class NullScanner(ScannerStrategyABC):
@@ -254,16 +420,40 @@ class NullScanner(ScannerStrategyABC):
 class RomScannerStrategy(ScannerStrategyABC):
     __metaclass__ = abc.ABCMeta
 
+    # Ignore the case of paths when looking for dead ROMs. None depends on the file system of the paths.
+    dead_roms_ignore_case = None
+    # ROM fields retrieved when only looking for dead ROMs (cleanup). None retrieves all fields.
+    # Scanners which override _getDeadRoms() retrieve all fields unless they set their own fields.
+    dead_roms_fields = ['id', 'm_name', 'scanned_data', 'asset_paths']
+
+    # @param manifest_dir: [FileName] Enables incremental scans. Directory where the manifest with
+    #                      the files found in the last scan of the source is stored.
+    # @param manifest_checksums: [bool] Compare the CRC of files with a different size or modification time.
     def __init__(self,
                  reports_dir: io.FileName,
                  source_id: str,
                  webservice_host: str,
                  webservice_port: int,
-                 progress_dialog: kodi.ProgressDialog):
+                 progress_dialog: kodi.ProgressDialog,
+                 manifest_dir: io.FileName = None,
+                 manifest_checksums: bool = False):
         
         self.reports_dir = reports_dir
         super(RomScannerStrategy, self).__init__(source_id, webservice_host, webservice_port, progress_dialog)
 
+        self.scan_manifest: ScanManifest = None
+        self.scan_delta: ScanDelta = None
+        # False while the dead ROMs found in the last scan are not removed yet.
+        self.dead_roms_removed = True
+        if manifest_dir is not None and source_id is not None:
+            if not manifest_dir.exists():
+                manifest_dir.makedirs()
+            manifest_FN = manifest_dir.pjoin(f'{source_id}_manifest.json')
+            checksum_store = None
+            if manifest_checksums:
+                checksum_store = io.misc_open_checksum_store(manifest_dir.pjoin('checksums.db'))
+            self.scan_manifest = ScanManifest(manifest_FN, manifest_checksums, checksum_store)
+
     # --------------------------------------------------------------------------------------------
     # Scanner configuration wizard methods
     # --------------------------------------------------------------------------------------------
@@ -325,24 +515,42 @@ class RomScannerStrategy(ScannerStrategyABC):
         launcher_report = report.FileReporter(self.reports_dir, self.get_name(), report.LogReporter())
         launcher_report.open()
         
+        # >> Start with an empty ROM name cache, so the logged statistics are of this scan.
+        text.clear_ROM_name_cache()
+        launcher_report.write('Collecting candidates ...')
+        candidates = self._getCandidates(launcher_report)
+        if candidates is None:
+            candidates = []
+        num_candidates = len(candidates)
+        launcher_report.write(f'{num_candidates} candidates found')
+
         # >> Check if we already have existing ROMs
         launcher_report.write('Loading existing ROMs ...')
         try:
-            roms = api.client_get_roms_in_source(self.webservice_host, self.webservice_port, self.source_id)
+            roms = list(api.client_iter_roms_in_source(self.webservice_host, self.webservice_port, self.source_id))
         except Exception:
             logger.exception('Failure retrieving existing ROMs')
             roms = []
         
         num_roms = len(roms)
         launcher_report.write(f'{num_roms} ROMs currently in database for this source.')
+
+        # >> Incremental scan. Only process the files changed since the last scan
+        # >> and the files without ROM in the source.
+        candidates_to_process = candidates
+        check_dead_roms = True
+        if self.scan_manifest is not None:
+            candidates_to_process, check_dead_roms = self._get_changed_candidates(candidates, roms, launcher_report)
+            if not candidates_to_process and not check_dead_roms:
+                launcher_report.write('No files added, changed or removed since the last scan.')
+                launcher_report.close()
+                kodi.notify('No changes found since the last scan')
+                return
         
-        launcher_report.write('Collecting candidates ...')
-        candidates = self._getCandidates(launcher_report)
-        num_candidates = len(candidates) if candidates else 0
-        launcher_report.write(f'{num_candidates} candidates found')
-        
-        launcher_report.write('Checking for dead ROMs ...')
-        dead_roms = self._getDeadRoms(candidates, roms)
+        dead_roms = []
+        if check_dead_roms:
+            launcher_report.write('Checking for dead ROMs ...')
+            dead_roms = self._getDeadRoms(candidates, roms)
         num_dead_roms = len(dead_roms)
 
         if num_dead_roms > 0:
@@ -352,13 +560,21 @@ class RomScannerStrategy(ScannerStrategyABC):
             logger.info('No dead ROMs found')
         
         self.marked_dead_roms = dead_roms
+        self.dead_roms_removed = num_dead_roms == 0
         
         # --- Prepare list of candidates to be processed ----------------------------------------------
         # List has candidates. List already sorted alphabetically.
-        candidates = sorted(candidates, key=lambda c: c.get_sort_value())
-        new_roms = self._processFoundItems(candidates, roms, launcher_report)
+        candidates_to_process = sorted(candidates_to_process, key=lambda c: c.get_sort_value())
+        new_roms = self._processFoundItems(candidates_to_process, roms, launcher_report)
+        ROM_name_cache_stats = text.get_ROM_name_cache_stats()
+        logger.info(f'ROM name cache hits {ROM_name_cache_stats["hits"]}, '
+                    f'misses {ROM_name_cache_stats["misses"]}, {ROM_name_cache_stats["entries"]} entries')
         
         if not new_roms and not dead_roms:
+            # Nothing to store, so the changes are processed.
+            if self.scan_manifest is not None:
+                self.scan_manifest.commit()
+            launcher_report.close()
             return
 
         num_new_roms = len(new_roms)
@@ -385,20 +601,40 @@ class RomScannerStrategy(ScannerStrategyABC):
         launcher_report.write('*** END of the ROM scanner report ***')
         launcher_report.close()
 
+    # The manifest is only updated once the scanned ROMs are stored and the dead ROMs are removed,
+    # so files of a scan that is not stored are processed again in the next scan and removed
+    # files are checked again.
+    def store_scanned_roms(self) -> bool:
+        is_stored = super(RomScannerStrategy, self).store_scanned_roms()
+        if is_stored:
+            self._commit_scan_manifest()
+        return is_stored
+
+    def remove_dead_roms(self) -> bool:
+        is_removed = super(RomScannerStrategy, self).remove_dead_roms()
+        if is_removed:
+            self.dead_roms_removed = True
+            self._commit_scan_manifest()
+        return is_removed
+
+    def _commit_scan_manifest(self):
+        if self.scan_manifest is None or self.scanned_roms or not self.dead_roms_removed:
+            return
+        self.scan_manifest.commit()
+
     def cleanup(self):
         launcher_report = report.FileReporter(self.reports_dir, self.get_name(), report.LogReporter())
         launcher_report.open()
         launcher_report.write('Dead ROM Cleaning operation')
         
         try:
-            roms = api.client_get_roms_in_source(self.webservice_host, self.webservice_port, self.source_id)
+            roms = list(api.client_iter_roms_in_source(self.webservice_host, self.webservice_port, self.source_id,
+                                                       fields=self._get_dead_roms_fields()))
         except Exception:
             logger.exception('Failure retrieving existing ROMs')
-            roms = []
-        
-        if roms is None:
+            launcher_report.write('Failure retrieving existing ROMs. Cleanup cancelled.')
             launcher_report.close()
-            logger.info('No roms available to cleanup')
+            kodi.notify_error('Failure retrieving existing ROMs')
             return {}
               
         num_roms = len(roms)
@@ -447,15 +683,66 @@ class RomScannerStrategy(ScannerStrategyABC):
     # ---------------------------------------------------------------------------------------------
     # Execution methods
     # ---------------------------------------------------------------------------------------------
+    # Compares the candidates with the manifest of the last scan.
+    # Unchanged candidates are processed too when the source has no ROM for their file, like
+    # a ROM removed by the user or a file that was filtered with other scanner settings.
+    # Returns the candidates to process and whether dead ROMs need to be checked.
+    def _get_changed_candidates(self,
+                                candidates: typing.List[ROMCandidateABC],
+                                roms: typing.List[ROMObj],
+                                launcher_report: report.Reporter) -> typing.Tuple[typing.List[ROMCandidateABC], bool]:
+        launcher_report.write('Comparing candidates with the last scan ...')
+        candidate_files = [(c, c.get_file()) for c in candidates]
+        delta = self.scan_manifest.compare([f for c, f in candidate_files if f is not None])
+        self.scan_delta = delta
+
+        launcher_report.write('Added files         {0:6d}'.format(len(delta.added)))
+        launcher_report.write('Changed files       {0:6d}'.format(len(delta.changed)))
+        launcher_report.write('Removed files       {0:6d}'.format(len(delta.removed)))
+        launcher_report.write('Unchanged files     {0:6d}'.format(delta.num_unchanged))
+
+        # Without a previous scan everything is processed.
+        if delta.is_initial_scan:
+            return candidates, True
+
+        changed_paths = set(delta.added)
+        changed_paths.update(delta.changed)
+        rom_paths = set()
+        for rom in roms:
+            rom_file = rom.get_scanned_data_element('file')
+            if rom_file:
+                rom_paths.add(normalise_file_path(rom_file, self.dead_roms_ignore_case))
+        changed_candidates = []
+        num_missing_roms = 0
+        for candidate, file in candidate_files:
+            if file is None or file.getPath() in changed_paths:
+                changed_candidates.append(candidate)
+            elif normalise_file_path(file.getPath(), self.dead_roms_ignore_case) not in rom_paths:
+                changed_candidates.append(candidate)
+                num_missing_roms += 1
+        launcher_report.write('Files without ROM   {0:6d}'.format(num_missing_roms))
+        return changed_candidates, len(delta.removed) > 0
+
     # ~~~ Scan for new files (*.*) and put them in a list ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     @abc.abstractmethod
     def _getCandidates(self, launcher_report: report.Reporter) -> typing.List[ROMCandidateABC]:
         return []
 
+    # The default fields are only enough for the default _getDeadRoms().
+    def _get_dead_roms_fields(self) -> typing.List[str]:
+        scanner_class = type(self)
+        if scanner_class._getDeadRoms is not RomScannerStrategy._getDeadRoms and \
+                scanner_class.dead_roms_fields is RomScannerStrategy.dead_roms_fields:
+            return None
+        return self.dead_roms_fields
+
     # --- Get dead entries -----------------------------------------------------------------
-    @abc.abstractmethod
+    # ROMs are dead when their scanned file is not one of the candidate files (get_file()).
+    # Scanners of which the candidates have no files must override this method.
     def _getDeadRoms(self, candidates: typing.List[ROMCandidateABC], roms: typing.List[ROMObj]) -> typing.List[ROMObj]:
-        return []
+        candidate_files = (c.get_file() for c in candidates)
+        candidate_paths = [f.getPath() for f in candidate_files if f is not None]
+        return find_dead_roms(candidate_paths, roms, self.dead_roms_ignore_case)
 
     # ~~~ Now go processing item by item ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     @abc.abstractmethod
@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: Scraper disk cache backends
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+from __future__ import annotations
+
+import abc
+import collections
+import collections.abc
+import logging
+import os
+import sqlite3
+import threading
+import typing
+
+# --- AKL packages ---
+from akl.utils import io, jsoncodec
+
+logger = logging.getLogger(__name__)
+
+
+#
+# Storage of the scraper disk caches (candidates, metadata, assets, internal).
+# Entries are addressed by scraper, platform, cache type and key, so single entries can be
+# looked up, stored and deleted without loading or writing the whole cache.
+#
+class ScraperCacheBackend(object):
+    __metaclass__ = abc.ABCMeta
+
+    # Returns the cached data or None if the key is not in the cache.
+    @abc.abstractmethod
+    def get(self, scraper: str, platform: str, cache_type: str, cache_key: str) -> typing.Any:
+        return None
+
+    @abc.abstractmethod
+    def contains(self, scraper: str, platform: str, cache_type: str, cache_key: str) -> bool:
+        return False
+
+    # Inserts or replaces the data of the key.
+    @abc.abstractmethod
+    def put(self, scraper: str, platform: str, cache_type: str, cache_key: str, data: typing.Any):
+        pass
+
+    # Inserts or replaces all the entries of the dictionary { cache_key: data }.
+    @abc.abstractmethod
+    def put_many(self, scraper: str, platform: str, cache_type: str, entries: dict):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, scraper: str, platform: str, cache_type: str, cache_key: str):
+        pass
+
+    # Returns True if there are cached entries of the scraper.
+    @abc.abstractmethod
+    def has_scraper(self, scraper: str) -> bool:
+        return False
+
+    # Makes sure all changes are stored on disk.
+    @abc.abstractmethod
+    def flush(self):
+        pass
+
+    @abc.abstractmethod
+    def close(self):
+        pass
+
+
+#
+# Disk cache backend using a SQLite database in WAL mode.
+# One connection is shared by all threads of the scraper and guarded by a lock. Changes are
+# committed in batches of COMMIT_INTERVAL changes and when flushing.
+#
+class SQLiteScraperCacheBackend(ScraperCacheBackend):
+    COMMIT_INTERVAL = 100
+
+    def __init__(self, db_FN: io.FileName):
+        self.db_path = db_FN.getPathTranslated()
+        self.lock = threading.RLock()
+        self.pending_changes = 0
+
+        logger.debug(f'SQLiteScraperCacheBackend() Opening "{db_FN.getPath()}"')
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS scraper_cache ('
+            'scraper TEXT NOT NULL, '
+            'platform TEXT NOT NULL, '
+            'cache_type TEXT NOT NULL, '
+            'cache_key TEXT NOT NULL, '
+            'data TEXT NOT NULL, '
+            'PRIMARY KEY (scraper, platform, cache_type, cache_key)) WITHOUT ROWID')
+        self.connection.commit()
+
+    def get(self, scraper: str, platform: str, cache_type: str, cache_key: str) -> typing.Any:
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT data FROM scraper_cache WHERE scraper = ? AND platform = ? AND cache_type = ? AND cache_key = ?',
+                (scraper, platform or '', cache_type, cache_key)).fetchone()
+        return jsoncodec.loads(row[0]) if row is not None else None
+
+    def contains(self, scraper: str, platform: str, cache_type: str, cache_key: str) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM scraper_cache WHERE scraper = ? AND platform = ? AND cache_type = ? AND cache_key = ?',
+                (scraper, platform or '', cache_type, cache_key)).fetchone()
+        return row is not None
+
+    def put(self, scraper: str, platform: str, cache_type: str, cache_key: str, data: typing.Any):
+        self.put_many(scraper, platform, cache_type, {cache_key: data})
+
+    def put_many(self, scraper: str, platform: str, cache_type: str, entries: dict):
+        rows = [
+            (scraper, platform or '', cache_type, cache_key, self._serialize(data))
+            for cache_key, data in entries.items()
+        ]
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO scraper_cache (scraper, platform, cache_type, cache_key, data) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+            self._changed(len(rows))
+
+    def delete(self, scraper: str, platform: str, cache_type: str, cache_key: str):
+        with self.lock:
+            self.connection.execute(
+                'DELETE FROM scraper_cache WHERE scraper = ? AND platform = ? AND cache_type = ? AND cache_key = ?',
+                (scraper, platform or '', cache_type, cache_key))
+            self._changed(1)
+
+    def has_scraper(self, scraper: str) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM scraper_cache WHERE scraper = ? LIMIT 1', (scraper,)).fetchone()
+        return row is not None
+
+    def flush(self):
+        with self.lock:
+            self.connection.commit()
+            self.pending_changes = 0
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+
+    def _changed(self, num_changes: int):
+        self.pending_changes += num_changes
+        if self.pending_changes >= SQLiteScraperCacheBackend.COMMIT_INTERVAL:
+            self.connection.commit()
+            self.pending_changes = 0
+
+    def _serialize(self, data: typing.Any) -> str:
+        return jsoncodec.dumps(data)
+
+
+#
+# Imports the JSON disk cache files of a scraper (<scraper>__<platform>__<cache type>.json)
+# into a cache backend. The JSON files are not changed.
+#
+# @param backend: [ScraperCacheBackend] Backend to import into.
+# @param cache_dir: [FileName] Scraper cache directory with the JSON files.
+# @param scraper: [str] Scraper filename (Scraper.get_filename()).
+# @param cache_types: [list] Cache types to import.
+# @return: [int] Number of imported entries.
+#
+def import_json_caches(backend: ScraperCacheBackend,
+                       cache_dir: io.FileName,
+                       scraper: str,
+                       cache_types: typing.List[str]) -> int:
+    num_entries = 0
+    prefix = scraper + '__'
+    for file_name in sorted(os.listdir(cache_dir.getPathTranslated())):
+        if not file_name.startswith(prefix):
+            continue
+        for cache_type in cache_types:
+            suffix = '__' + cache_type + '.json'
+            if not file_name.endswith(suffix):
+                continue
+            platform = file_name[len(prefix):-len(suffix)]
+            try:
+                entries = cache_dir.pjoin(file_name).readJson()
+            except Exception:
+                logger.exception(f'import_json_caches() Cannot read "{file_name}"')
+                break
+            backend.put_many(scraper, platform, cache_type, entries)
+            num_entries += len(entries)
+            logger.debug(f'import_json_caches() Imported {len(entries)} entries of "{file_name}"')
+            break
+
+    backend.flush()
+    logger.info(f'import_json_caches() Imported {num_entries} entries of scraper "{scraper}"')
+    return num_entries
+
+
+#
+# Append-only journal of the changes of a JSON disk cache. Every change is appended as one JSON
+# line as it happens, so the changes since the last snapshot survive a crash. When loading the
+# cache the journal is replayed over the snapshot. After writing a new snapshot the journal is
+# reset (compaction).
+#
+# Lines are { "op": "put", "key": "...", "data": ... } or { "op": "del", "key": "..." }.
+#
+class CacheJournal(object):
+    OP_PUT = 'put'
+    OP_DELETE = 'del'
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self.file = None
+        # Number of changes in the journal since the last snapshot.
+        self.num_entries = 0
+
+    def append_put(self, cache_key: str, data: typing.Any):
+        self._append({'op': CacheJournal.OP_PUT, 'key': cache_key, 'data': data})
+
+    def append_delete(self, cache_key: str):
+        self._append({'op': CacheJournal.OP_DELETE, 'key': cache_key})
+
+    # Applies the changes in the journal to the cache dictionary.
+    # Returns the number of applied changes.
+    def replay(self, cache: dict) -> int:
+        if not os.path.isfile(self.journal_path):
+            return 0
+        num_changes = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = jsoncodec.loads(line)
+                except ValueError:
+                    # The last line is incomplete when a crash happened while writing it.
+                    logger.warning(f'CacheJournal.replay() Skipping invalid line in "{self.journal_path}"')
+                    continue
+                if entry['op'] == CacheJournal.OP_PUT:
+                    cache[entry['key']] = entry['data']
+                elif entry['op'] == CacheJournal.OP_DELETE:
+                    cache.pop(entry['key'], None)
+                num_changes += 1
+        self.num_entries = num_changes
+        return num_changes
+
+    # Empties the journal. Call after the snapshot with all changes is written.
+    def reset(self):
+        self.close()
+        if os.path.isfile(self.journal_path):
+            os.remove(self.journal_path)
+        self.num_entries = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _append(self, entry: dict):
+        if self.file is None:
+            self.file = open(self.journal_path, 'a', encoding='utf-8')
+        self.file.write(jsoncodec.dumps(entry))
+        self.file.write('\n')
+        # Flushed to the OS, so the change survives a crash of Kodi.
+        self.file.flush()
+        self.num_entries += 1
+
+
+#
+# JSON disk cache of one platform and cache type, optionally with a journal of its changes.
+#
+class JSONDiskCache(object):
+    def __init__(self, file_path: str, file_name: str, use_journal: bool):
+        self.file_path = file_path
+        self.file_name = file_name
+        self.journal = CacheJournal(file_path + '.journal') if use_journal else None
+        self.data = {}
+        self.dirty = False
+
+    def load(self):
+        if os.path.isfile(self.file_path):
+            with open(self.file_path, 'rb') as f:
+                self.data = jsoncodec.loads(f.read())
+            logger.debug('Loaded "<SCRAPER_CACHE_DIR>/{}"'.format(self.file_name))
+        else:
+            logger.debug('Cache file not found. Resetting cache.')
+            self.data = {}
+        self.dirty = False
+
+        # --- Recover the changes that were not written to the cache file ---
+        if self.journal is not None:
+            num_changes = self.journal.replay(self.data)
+            if num_changes > 0:
+                logger.info('Recovered {} changes of "<SCRAPER_CACHE_DIR>/{}" from journal'.format(num_changes, self.file_name))
+                self.dirty = True
+
+    # Writes the cache file and empties the journal.
+    # The file is written to a temporary file first, so a crash never leaves a partial file.
+    def write(self, json_indent, json_separators):
+        json_data = jsoncodec.dumps(
+            self.data, sort_keys=True,
+            indent=json_indent, separators=json_separators)
+
+        temp_file = io.FileName(self.file_path + '.tmp')
+        temp_file.writeAll(json_data)
+        temp_file.rename(io.FileName(self.file_path))
+        logger.debug('Saved "<SCRAPER_CACHE_DIR>/{}"'.format(self.file_name))
+
+        # All changes in the journal are in the file now.
+        if self.journal is not None:
+            self.journal.reset()
+        self.dirty = False
+
+    def put(self, cache_key: str, data: typing.Any):
+        self.data[cache_key] = data
+        self.dirty = True
+        if self.journal is not None:
+            self.journal.append_put(cache_key, data)
+
+    def delete(self, cache_key: str):
+        del self.data[cache_key]
+        self.dirty = True
+        if self.journal is not None:
+            self.journal.append_delete(cache_key)
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+
+
+#
+# Keeps the JSON disk caches of a scraper per platform and cache type.
+# Only the caches of the last max_platforms used platforms are kept in memory. The caches of the
+# least recently used platform are written (if changed) and released when another platform is
+# loaded, so scraping a collection with ROMs of many platforms uses bounded memory.
+#
+class DiskCacheManager(object):
+    # @param get_file_name: [function] Returns a tuple with the full path and the name of the
+    #                       cache file of (cache_type, platform).
+    # @param max_platforms: [int] Maximum number of platforms of which caches are kept in memory.
+    # @param use_journal: [bool] Record all changes in a journal next to the cache files.
+    def __init__(self,
+                 get_file_name: typing.Callable[[str, str], typing.Tuple[str, str]],
+                 max_platforms: int = 4,
+                 use_journal: bool = True,
+                 json_indent=1,
+                 json_separators=(',', ':'),
+                 journal_compact_threshold: int = 500):
+        self.get_file_name = get_file_name
+        self.max_platforms = max(1, max_platforms)
+        self.use_journal = use_journal
+        self.json_indent = json_indent
+        self.json_separators = json_separators
+        self.journal_compact_threshold = journal_compact_threshold
+        self.lock = threading.RLock()
+        # { platform: { cache_type: JSONDiskCache } } in least recently used order.
+        self.platform_caches: typing.Dict[str, typing.Dict[str, JSONDiskCache]] = collections.OrderedDict()
+
+    def is_loaded(self, platform: str, cache_type: str) -> bool:
+        with self.lock:
+            return cache_type in self.platform_caches.get(platform, {})
+
+    def contains(self, platform: str, cache_type: str, cache_key: str) -> bool:
+        with self.lock:
+            return cache_key in self._get_cache(platform, cache_type).data
+
+    def get(self, platform: str, cache_type: str, cache_key: str) -> typing.Any:
+        with self.lock:
+            return self._get_cache(platform, cache_type).data[cache_key]
+
+    def put(self, platform: str, cache_type: str, cache_key: str, data: typing.Any):
+        with self.lock:
+            cache = self._get_cache(platform, cache_type)
+            cache.put(cache_key, data)
+            self._compact_if_needed(cache)
+
+    def delete(self, platform: str, cache_type: str, cache_key: str):
+        with self.lock:
+            cache = self._get_cache(platform, cache_type)
+            cache.delete(cache_key)
+            self._compact_if_needed(cache)
+
+    # Writes all changed caches. Empty caches are not written.
+    # @param progress_function: [function] Optional, called for every cache.
+    def flush(self, progress_function: typing.Callable[[], None] = None):
+        with self.lock:
+            for platform, caches in self.platform_caches.items():
+                for cache_type, cache in caches.items():
+                    if progress_function is not None:
+                        progress_function()
+                    self._flush_cache(cache, f'{platform} {cache_type}')
+
+    def get_num_caches(self) -> int:
+        with self.lock:
+            return sum(len(caches) for caches in self.platform_caches.values())
+
+    # Returns the dictionary with all the entries of a cache, loading it if needed.
+    # Changes made directly in the dictionary are not journaled, mark the cache dirty to write them.
+    def get_data(self, platform: str, cache_type: str) -> dict:
+        with self.lock:
+            return self._get_cache(platform, cache_type).data
+
+    def set_data(self, platform: str, cache_type: str, data: dict):
+        with self.lock:
+            cache = self._get_cache(platform, cache_type)
+            cache.data = data
+            cache.dirty = True
+
+    def is_dirty(self, platform: str, cache_type: str) -> bool:
+        with self.lock:
+            caches = self.platform_caches.get(platform, {})
+            return cache_type in caches and caches[cache_type].dirty
+
+    def set_dirty(self, platform: str, cache_type: str, dirty: bool):
+        with self.lock:
+            self._get_cache(platform, cache_type).dirty = dirty
+
+    def _get_cache(self, platform: str, cache_type: str) -> JSONDiskCache:
+        caches = self.platform_caches.get(platform)
+        if caches is None:
+            caches = {}
+            self.platform_caches[platform] = caches
+            self._evict_platforms()
+        else:
+            self.platform_caches.move_to_end(platform)
+
+        cache = caches.get(cache_type)
+        if cache is None:
+            logger.debug('DiskCacheManager() Loading cache "{}" of platform "{}"'.format(cache_type, platform))
+            file_path, file_name = self.get_file_name(cache_type, platform)
+            cache = JSONDiskCache(file_path, file_name, self.use_journal)
+            cache.load()
+            caches[cache_type] = cache
+        return cache
+
+    def _evict_platforms(self):
+        while len(self.platform_caches) > self.max_platforms:
+            platform, caches = self.platform_caches.popitem(last=False)
+            logger.debug('DiskCacheManager() Releasing caches of platform "{}"'.format(platform))
+            for cache_type, cache in caches.items():
+                self._flush_cache(cache, f'{platform} {cache_type}')
+                cache.close()
+
+    def _flush_cache(self, cache: JSONDiskCache, cache_name: str):
+        # Skip empty caches
+        if not cache.data:
+            logger.debug('Skipping {} (Empty)'.format(cache_name))
+            return
+        # Skip clean caches.
+        if not cache.dirty:
+            logger.debug('Skipping {} (Clean)'.format(cache_name))
+            return
+        cache.write(self.json_indent, self.json_separators)
+
+    def _compact_if_needed(self, cache: JSONDiskCache):
+        if cache.journal is not None and cache.journal.num_entries >= self.journal_compact_threshold:
+            cache.write(self.json_indent, self.json_separators)
+
+
+#
+# Dictionary of the caches of the current platform of a scraper, keyed by cache type.
+# Keeps the old Scraper.disk_caches, disk_caches_loaded and disk_caches_dirty dictionaries
+# working on top of a DiskCacheManager.
+# @param field: [str] 'data', 'loaded' or 'dirty'.
+#
+class DiskCacheView(collections.abc.MutableMapping):
+    def __init__(self,
+                 manager: DiskCacheManager,
+                 get_platform: typing.Callable[[], str],
+                 cache_types: typing.List[str],
+                 field: str):
+        self.manager = manager
+        self.get_platform = get_platform
+        self.cache_types = cache_types
+        self.field = field
+
+    def __getitem__(self, cache_type: str):
+        if cache_type not in self.cache_types:
+            raise KeyError(cache_type)
+        platform = self.get_platform()
+        if self.field == 'loaded':
+            return self.manager.is_loaded(platform, cache_type)
+        if self.field == 'dirty':
+            return self.manager.is_dirty(platform, cache_type)
+        return self.manager.get_data(platform, cache_type)
+
+    def __setitem__(self, cache_type: str, value):
+        if cache_type not in self.cache_types:
+            raise KeyError(cache_type)
+        platform = self.get_platform()
+        if self.field == 'loaded':
+            # Caches are loaded on first use and cannot be unloaded.
+            if value:
+                self.manager.get_data(platform, cache_type)
+        elif self.field == 'dirty':
+            self.manager.set_dirty(platform, cache_type, bool(value))
+        else:
+            self.manager.set_data(platform, cache_type, value)
+
+    def __delitem__(self, cache_type: str):
+        raise TypeError('Disk caches cannot be removed')
+
+    def __iter__(self):
+        return iter(self.cache_types)
+
+    def __len__(self):
+        return len(self.cache_types)
@@ -30,16 +30,18 @@ import abc
 import time
 from datetime import datetime
 import os
-import re
 import json
+import threading
+import warnings
+import concurrent.futures
 
 # Kodi libs
 import xbmcgui
 
 # AKL libs
-from akl.utils import kodi, io, net, text
+from akl.utils import kodi, io, net, text, jsoncodec
 from akl import constants, platforms, settings
-from akl import api
+from akl import api, scraper_cache
 
 from akl.api import ROMObj
 
@@ -133,6 +135,13 @@ class ScraperSettings(object):
         self.clean_tags = False
         self.update_nfo_files = False
         self.show_info_verbose = False
+
+        # Number of ROMs scraped at the same time. 1 means sequential scraping.
+        # The effective amount is limited by the scrapers, see Scraper.get_max_concurrent_roms().
+        self.max_concurrent_roms = 1
+        # Number of asset files downloaded at the same time for a ROM.
+        # The effective amount is limited by the asset scraper, see Scraper.get_max_concurrent_downloads().
+        self.max_concurrent_downloads = 4
     
     def get_data_dic(self) -> dict:
         return self.__dict__
@@ -169,6 +178,8 @@ class ScraperSettings(object):
         scraper_settings.clean_tags = settings['clean_tags']
         scraper_settings.update_nfo_files = settings['update_nfo_files']
         scraper_settings.show_info_verbose = settings['show_info_verbose']
+        scraper_settings.max_concurrent_roms = settings.get('max_concurrent_roms', 1)
+        scraper_settings.max_concurrent_downloads = settings.get('max_concurrent_downloads', 4)
         
         return scraper_settings
     
@@ -206,8 +217,8 @@ class FilterROM(object):
 
     def _load_JSON(self, filename):
         self.logger.debug('FilterROM::_load_JSON() Loading "{}"'.format(filename))
-        with open(filename) as file:
-            data = json.load(file)
+        with open(filename, 'rb') as file:
+            data = jsoncodec.loads(file.read())
 
         return data
 
@@ -231,13 +242,50 @@ class FilterROM(object):
         else:
             # If it is not MAME it is No-Intro
             # Name of bios is: '[BIOS] Rom name example (Rev A).zip'
-            BIOS_m = re.findall('\[BIOS\]', basename)
-            if BIOS_m:
+            # The name is parsed without extension, like the scanner and scrapers do, to share the parse.
+            ROM_name, ext = os.path.splitext(basename)
+            if 'BIOS' in text.parse_ROM_filename(ROM_name).flags:
                 self.logger.debug('FilterROM::ROM_is_filtered() Filtered No-Intro BIOS "{}"'.format(basename))
                 return True
 
         return False
 
+
+
+# Descriptor for attributes that have a separate value for every thread.
+# Used to keep the state of the ROM being scraped apart when multiple ROMs are
+# scraped concurrently with the same ScrapeStrategy and Scraper objects.
+# Returns the default value when the attribute was not set yet in the current thread.
+class PerThreadAttribute(object):
+    def __init__(self, default=None):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def _get_state(self, obj) -> threading.local:
+        return obj.__dict__.setdefault('_per_thread_state', threading.local())
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return getattr(self._get_state(obj), self.name, self.default)
+
+    def __set__(self, obj, value):
+        setattr(self._get_state(obj), self.name, value)
+
+
+
+# A resolved asset URL waiting to be downloaded by ScrapeStrategy._download_assets().
+class AssetDownloadJob(object):
+    def __init__(self, rom: ROMObj, asset_info_id: str, image_url: str, image_url_log: str,
+                 image_local_path: io.FileName):
+        self.rom = rom
+        self.asset_info_id = asset_info_id
+        self.image_url = image_url
+        self.image_url_log = image_url_log
+        self.image_local_path = image_local_path
+
          
 #
 # Main scraping logic.
@@ -259,6 +307,15 @@ class ScrapeStrategy(object):
     SCRAPE_ROM = 'ROM'
     SCRAPE_LAUNCHER = 'Launcher'
 
+    # Maximum number of asset directories listed at the same time.
+    MAX_CONCURRENT_DIR_SCANS = 8
+
+    # --- State of the ROM being processed (one per worker thread) -------------------------------
+    metadata_action = PerThreadAttribute()
+    asset_action_list = PerThreadAttribute()
+    local_asset_list = PerThreadAttribute()
+    NFO_file = PerThreadAttribute()
+
     # --- Constructor ----------------------------------------------------------------------------
     # @param settings: [dict] Addon settings.
     def __init__(self,
@@ -297,8 +354,13 @@ class ScrapeStrategy(object):
             self.asset_scraper_obj = Null_Scraper()
                 
         self.meta_and_asset_scraper_same = self.meta_scraper_obj is self.asset_scraper_obj
+        # Local assets are searched even when no assets are scraped, so the listings of the asset
+        # directories are stored with the given scraper.
+        self.file_cache_store: io.FileCacheStore = scraper.file_cache_store if scraper is not None else None
         self.pdialog = progress_dialog
         self.pdialog_verbose = scraper_settings.show_info_verbose
+        # Set while ROMs are scraped concurrently. GUI calls from the workers go through it.
+        self.gui_dispatcher: kodi.MainThreadDispatcher = None
         
         self.logger.debug('========================== Applied scraper settings ==========================')
         self.logger.debug('Metadata policy:      {}'.format(self._translate(scraper_settings.scrape_metadata_policy)))
@@ -313,28 +375,107 @@ class ScrapeStrategy(object):
         self.logger.debug(' - Assets             {}'.format('Yes' if scraper_settings.overwrite_existing_assets else 'No'))
         self.logger.debug('Ignore scrape title:  {}'.format('Yes' if scraper_settings.ignore_scrap_title else 'No'))
         self.logger.debug('Update NFO files:     {}'.format('Yes' if scraper_settings.update_nfo_files else 'No'))
+        self.logger.debug('Concurrent ROMs:      {}'.format(self._get_max_concurrent_roms()))
+        self.logger.debug('Concurrent downloads: {}'.format(self._get_max_concurrent_downloads()))
         self.logger.debug('==============================================================================')
  
+    # The ROMs are retrieved page by page while the first ROMs are already scraped.
     def process_roms(self, entity_type: int, entity_id) -> typing.List[ROMObj]:
+        if entity_type == constants.OBJ_SOURCE:
+            rom_pages = api.client_iter_rom_pages_in_source(self.webservice_host, self.webservice_port, entity_id)
+        else:
+            rom_pages = api.client_iter_rom_pages_in_collection(self.webservice_host, self.webservice_port, entity_id)
         try:
-            if entity_type == constants.OBJ_SOURCE:
-                roms = api.client_get_roms_in_source(self.webservice_host, self.webservice_port, entity_id)
-            else:
-                roms = api.client_get_roms_in_collection(self.webservice_host, self.webservice_port, entity_id)
+            first_page = next(rom_pages, [])
         except Exception:
             self.logger.exception('Failure while retrieving ROMs from database')
             return
         
-        num_items = len(roms)
-        num_items_checked = 0
-        self.pdialog.startProgress('Scraping multiple ROMs', num_items)
+        # >> Start with an empty ROM name cache, so the logged statistics are of this run.
+        text.clear_ROM_name_cache()
+        roms = []
+        self.pdialog.startProgress('Scraping multiple ROMs', max(1, len(first_page)))
         self.logger.debug('============================== Scraping ROMs ==============================')
+        rom_feed = self._feed_roms(first_page, rom_pages, roms)
         
-        all_paths = []
-        for rom in roms:
-            all_paths.extend(rom.get_all_asset_paths())
-        self._cache_assets(all_paths)
+        max_concurrent_roms = self._get_max_concurrent_roms()
+        if max_concurrent_roms > 1:
+            self.logger.debug(f'Scraping ROMs with {max_concurrent_roms} workers')
+            is_canceled = self._process_ROMs_concurrently(rom_feed, max_concurrent_roms)
+        else:
+            is_canceled = self._process_ROMs_sequentially(rom_feed)
+        self.logger.debug(f'Scraped {len(roms)} ROMs')
+
+        for scraper_obj in {self.meta_scraper_obj, self.asset_scraper_obj}:
+            if scraper_obj is None or scraper_obj.http_cache is None:
+                continue
+            http_cache_stats = scraper_obj.http_cache.get_stats()
+            self.logger.info(f'HTTP cache of {scraper_obj.get_name()} hits {http_cache_stats["hits"]}, '
+                             f'misses {http_cache_stats["misses"]}, {http_cache_stats["entries"]} entries '
+                             f'with {http_cache_stats["size"]:,} bytes')
+        ROM_name_cache_stats = text.get_ROM_name_cache_stats()
+        self.logger.info(f'ROM name cache hits {ROM_name_cache_stats["hits"]}, '
+                         f'misses {ROM_name_cache_stats["misses"]}, {ROM_name_cache_stats["entries"]} entries')
+        for host, breaker_stats in net.get_circuit_breaker_stats().items():
+            if breaker_stats['failures'] > 0:
+                self.logger.info(f'Host "{host}": {breaker_stats["failure_rate"]:.0%} of '
+                                 f'{breaker_stats["requests"]} requests failed, circuit {breaker_stats["state"]}, '
+                                 f'{breaker_stats["rejected"]} requests rejected')
+        for limiter_key, limiter_stats in net.get_rate_limiter_stats().items():
+            self.logger.info(f'Rate limit "{limiter_key}": {limiter_stats["throttled"]} of {limiter_stats["requests"]} '
+                             f'requests throttled for {limiter_stats["throttled_time"]:.1f} seconds, '
+                             f'{limiter_stats["backoffs"]} back offs')
+            
+        # ~~~ Check if user pressed the cancel button ~~~
+        if is_canceled:
+            self.pdialog.endProgress()
+            self.logger.info('User pressed Cancel button when scraping ROMs. ROM scraping stopped.')
+            if kodi.dialog_yesno('Stopping ROM scraping. Store currently scraped items anyway?'):
+                return roms
+            return None
         
+        self.pdialog.endProgress()
+        return roms
+
+    # Yields the ROMs while they are retrieved and collects them in the roms list.
+    # The new asset directories of a page are cached together before its ROMs are scraped, so
+    # every directory is listed once. The number of progress steps is the number of ROMs
+    # retrieved so far, it grows with every page.
+    def _feed_roms(self, first_page: typing.List[ROMObj], rom_pages: typing.Iterator[typing.List[ROMObj]],
+                   roms: typing.List[ROMObj]) -> typing.Iterator[ROMObj]:
+        cached_dirs = set()
+        asset_dir_timings = {}
+        page = first_page
+        while page:
+            roms.extend(page)
+            self.pdialog.updateNumSteps(len(roms))
+
+            new_dirs = {}
+            for rom in page:
+                for path in rom.get_all_asset_paths():
+                    if path.getPath() not in cached_dirs:
+                        new_dirs.setdefault(path.getPath(), path)
+            if new_dirs:
+                cached_dirs.update(new_dirs.keys())
+                asset_dir_timings.update(self._cache_assets(list(new_dirs.values())))
+            yield from page
+
+            try:
+                page = next(rom_pages, [])
+            except Exception:
+                self.logger.exception('Failure while retrieving ROMs from database')
+                kodi.notify_warn('Could not retrieve all ROMs')
+                page = []
+
+        if asset_dir_timings:
+            slowest_dir = max(asset_dir_timings, key=asset_dir_timings.get)
+            self.logger.info(f'Cached {len(asset_dir_timings)} asset directories, slowest "{slowest_dir}" '
+                             f'took {asset_dir_timings[slowest_dir]:.2f} seconds')
+
+    # Scrapes the ROMs one by one.
+    # Returns True if the user canceled the scraping.
+    def _process_ROMs_sequentially(self, roms: typing.Iterable[ROMObj]) -> bool:
+        num_items_checked = 0
         for rom in roms:
             self.pdialog.updateProgress(num_items_checked)
             num_items_checked = num_items_checked + 1
@@ -346,16 +487,99 @@ class ScrapeStrategy(object):
                 self.logger.exception(f'Could not scrape "{ROM_name}"')
                 kodi.notify_warn(f'Could not scrape "{ROM_name}"')
             
-            # ~~~ Check if user pressed the cancel button ~~~
             if self.pdialog.isCanceled():
-                self.pdialog.endProgress()
-                self.logger.info('User pressed Cancel button when scraping ROMs. ROM scraping stopped.')
-                if kodi.dialog_yesno('Stopping ROM scraping. Store currently scraped items anyway?'):
-                    return roms
-                return None
-        
-        self.pdialog.endProgress()
-        return roms
+                return True
+        return False
+
+    # Scrapes multiple ROMs at the same time on a bounded pool of worker threads.
+    # The ROM objects are edited in place, so the order of the ROM list is kept.
+    # All GUI calls (progress dialog, error dialogs) are executed in this (the calling) thread.
+    # At most 2 times the amount of workers are queued, so canceling stops the scraping quickly.
+    # Returns True if the user canceled the scraping.
+    def _process_ROMs_concurrently(self, roms: typing.Iterable[ROMObj], max_workers: int) -> bool:
+        progress_dialog = self.pdialog
+        self.gui_dispatcher = kodi.MainThreadDispatcher()
+        self.pdialog = self.gui_dispatcher.wrap(progress_dialog)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='akl_scraper')
+        rom_iterator = iter(roms)
+        pending_roms = {}
+        num_items_checked = 0
+        is_canceled = False
+        try:
+            while True:
+                # --- Keep the queue of the worker pool filled ---
+                while not is_canceled and len(pending_roms) < max_workers * 2:
+                    rom = next(rom_iterator, None)
+                    if rom is None:
+                        break
+                    pending_roms[executor.submit(self._process_ROM, rom)] = rom
+                if not pending_roms:
+                    break
+
+                # --- Execute GUI calls from the workers and collect finished ROMs ---
+                self.gui_dispatcher.process_pending(timeout=0.05)
+                done_futures, _ = concurrent.futures.wait(pending_roms, timeout=0)
+                for future in done_futures:
+                    rom = pending_roms.pop(future)
+                    num_items_checked = num_items_checked + 1
+                    ROM_name = rom.get_identifier()
+                    progress_dialog.updateProgress(num_items_checked, f'Scraped ROM {ROM_name}')
+                    if future.exception() is not None:
+                        self.logger.error(f'Could not scrape "{ROM_name}"', exc_info=future.exception())
+                        kodi.notify_warn(f'Could not scrape "{ROM_name}"')
+
+                if not is_canceled and progress_dialog.isCanceled():
+                    self.logger.debug('Waiting for the ROMs being scraped to finish...')
+                    is_canceled = True
+                    self._cancel_queued_ROMs(pending_roms)
+        finally:
+            # >> After an error the ROMs that did not start are dropped. The running workers may be
+            # >> waiting for a GUI call, so the calls are executed until all workers are finished.
+            self._cancel_queued_ROMs(pending_roms)
+            while pending_roms:
+                self.gui_dispatcher.process_pending(timeout=0.05)
+                done_futures, _ = concurrent.futures.wait(pending_roms, timeout=0)
+                for future in done_futures:
+                    pending_roms.pop(future)
+            executor.shutdown(wait=True)
+            self.pdialog = progress_dialog
+            self.gui_dispatcher = None
+        return is_canceled
+
+    # Cancels the queued ROMs which are not being scraped yet and removes them from the pending ROMs.
+    def _cancel_queued_ROMs(self, pending_roms: dict):
+        for future in list(pending_roms):
+            if future.cancel():
+                pending_roms.pop(future)
+
+    # Amount of ROMs that can be scraped at the same time with the current settings.
+    # Manual search term, game or asset selection needs the user for every ROM, so in that case
+    # the ROMs are always scraped sequentially.
+    def _get_max_concurrent_roms(self) -> int:
+        if self.scraper_settings.search_term_mode == constants.SCRAPE_MANUAL or \
+            self.scraper_settings.game_selection_mode == constants.SCRAPE_MANUAL or \
+                self.scraper_settings.asset_selection_mode == constants.SCRAPE_MANUAL:
+            return 1
+        max_concurrent_roms = self.scraper_settings.max_concurrent_roms
+        for scraper_obj in [self.meta_scraper_obj, self.asset_scraper_obj]:
+            if scraper_obj is not None:
+                max_concurrent_roms = min(max_concurrent_roms, scraper_obj.get_max_concurrent_roms())
+        return max(1, max_concurrent_roms)
+
+    # Amount of asset files that can be downloaded at the same time with the current settings.
+    def _get_max_concurrent_downloads(self) -> int:
+        max_concurrent_downloads = self.scraper_settings.max_concurrent_downloads
+        if self.asset_scraper_obj is not None:
+            max_concurrent_downloads = min(max_concurrent_downloads, self.asset_scraper_obj.get_max_concurrent_downloads())
+        return max(1, max_concurrent_downloads)
+
+    # Executes a function which shows a Kodi dialog. When ROMs are scraped concurrently the
+    # function is executed in the thread that owns the GUI.
+    def _run_in_gui_thread(self, func, *args, **kwargs):
+        if self.gui_dispatcher is None:
+            return func(*args, **kwargs)
+        return self.gui_dispatcher.call(func, *args, **kwargs)
     
     def process_single_rom(self, rom_id: str) -> ROMObj:
         self.logger.debug('ScrapeStrategy.process_single_rom() Load and scrape a single ROM...')
@@ -474,6 +698,9 @@ class ScrapeStrategy(object):
         
         # --- Process asset by asset actions ---
         # --- Asset scraping ---
+        # Scraped assets are first set to the local asset (if any). The resolved asset URLs are
+        # collected and downloaded in parallel afterwards, replacing the local asset on success.
+        download_jobs: typing.List[AssetDownloadJob] = []
         for asset_id in self.scraper_settings.asset_IDs_to_scrape:
             asset_name = asset_id.capitalize()
             if self.asset_action_list[asset_id] == ScrapeStrategy.ACTION_ASSET_NONE:
@@ -488,7 +715,7 @@ class ScrapeStrategy(object):
                 if local_asset:
                     rom.set_asset(asset_id, local_asset.getPath())
             elif self.asset_action_list[asset_id] == ScrapeStrategy.ACTION_ASSET_SCRAPER:
-                asset_path = self._scrap_ROM_asset(asset_id, self.local_asset_list[asset_id], rom)
+                asset_path = self._scrap_ROM_asset(asset_id, self.local_asset_list[asset_id], rom, download_jobs)
                 if asset_path is None:
                     self.logger.debug(f'No asset scraped. Skipping {asset_name}')
                     continue
@@ -496,6 +723,8 @@ class ScrapeStrategy(object):
             else:
                 raise ValueError(f'Asset ID {asset_id} unknown action {self.asset_action_list[asset_id]}')
 
+        self._download_assets(download_jobs)
+
         romdata = rom.get_data_dic()
         # --- Print some debug info ---
         self.logger.debug('Set Title     file "{}"'.format(romdata['assets'][constants.ASSET_TITLE_ID]))
@@ -685,7 +914,7 @@ class ScrapeStrategy(object):
                 self.pdialog.close()
                 # Close error message dialog automatically 1 minute to keep scanning.
                 yesno_msg = f"{status_dic['msg']}\nStop scraping?"
-                if kodi.dialog_yesno_timer(yesno_msg, 60000):
+                if self._run_in_gui_thread(kodi.dialog_yesno_timer, yesno_msg, 60000):
                     status_dic['dialog'] = kodi.KODI_MESSAGE_CANCEL
                     return
                 status_dic = kodi.new_status_dic('No error')
@@ -767,7 +996,7 @@ class ScrapeStrategy(object):
             self.pdialog.close()
             # Close error message dialog automatically 1 minute to keep scanning.
             yesno_msg = f"{status_dic['msg']}\nStop scraping?"
-            if kodi.dialog_yesno_timer(yesno_msg, 60000):
+            if self._run_in_gui_thread(kodi.dialog_yesno_timer, yesno_msg, 60000):
                 status_dic['dialog'] = kodi.KODI_MESSAGE_CANCEL
                 return
             self.pdialog.reopen()
@@ -779,12 +1008,16 @@ class ScrapeStrategy(object):
     #
     # Returns a valid filename of the downloaded scrapped image, filename of local image
     # or empty string if scraper finds nothing or download failed.
+    # When a list of download jobs is given the image is not downloaded here. A download job is
+    # added to the list instead and the local image is returned.
     #
     # @param asset_info_id [str]
     # @param local_asset_path: [FileName]
     # @param rom: [Rom object]
+    # @param download_jobs: [list] Optional list to queue the image download.
     # @return: [str] Filename string with the asset path.
-    def _scrap_ROM_asset(self, asset_info_id: str, local_asset_path: io.FileName, rom: ROMObj):
+    def _scrap_ROM_asset(self, asset_info_id: str, local_asset_path: io.FileName, rom: ROMObj,
+                         download_jobs: typing.List[AssetDownloadJob] = None):
         # --- Cached frequent used things ---
         asset_dir_FN = rom.get_asset_path(asset_info_id)
         if not asset_dir_FN:
@@ -832,7 +1065,7 @@ class ScrapeStrategy(object):
             self.pdialog.close()
             # Close error message dialog automatically 1 minute to keep scanning.
             yesno_msg = f"{status_dic['msg']}\nStop scraping?"
-            if kodi.dialog_yesno_timer(yesno_msg, 60000):
+            if self._run_in_gui_thread(kodi.dialog_yesno_timer, yesno_msg, 60000):
                 status_dic['dialog'] = kodi.KODI_MESSAGE_CANCEL
                 return
             status_dic = kodi.new_status_dic('No error')
@@ -904,7 +1137,7 @@ class ScrapeStrategy(object):
             self.pdialog.close()
             # Close error message dialog automatically 1 minute to keep scanning.
             yesno_msg = f"{status_dic['msg']}\nStop scraping?"
-            if kodi.dialog_yesno_timer(yesno_msg, 60000):
+            if self._run_in_gui_thread(kodi.dialog_yesno_timer, yesno_msg, 60000):
                 status_dic['dialog'] = kodi.KODI_MESSAGE_CANCEL
                 return
             status_dic = kodi.new_status_dic('No error')
@@ -925,7 +1158,7 @@ class ScrapeStrategy(object):
             self.pdialog.close()
             # Close error message dialog automatically 1 minute to keep scanning.
             yesno_msg = f"{status_dic['msg']}\nStop scraping?"
-            if kodi.dialog_yesno_timer(yesno_msg, 60000):
+            if self._run_in_gui_thread(kodi.dialog_yesno_timer, yesno_msg, 60000):
                 status_dic['dialog'] = kodi.KODI_MESSAGE_CANCEL
                 return
             status_dic = kodi.new_status_dic('No error')
@@ -939,11 +1172,17 @@ class ScrapeStrategy(object):
         if image_ext == "url":
             return io.Url(image_url)
         
+        # --- Queue image download ---
+        image_local_path = asset_path_noext_FN.append('.' + image_ext)
+        if download_jobs is not None:
+            self.logger.debug(f'Queued download "{image_url_log}"')
+            download_jobs.append(AssetDownloadJob(rom, asset_info_id, image_url, image_url_log, image_local_path))
+            return ret_asset_path
+
         # --- Download image ---
         if self.pdialog_verbose:
             scraper_text = f'Downloading {asset_info_id} from {self.asset_scraper_obj.get_name()}...'
             self.pdialog.updateMessage(scraper_text)
-        image_local_path = asset_path_noext_FN.append('.' + image_ext)
         self.logger.debug(f'Download  "{image_url_log}"')
         self.logger.debug(f'Into file "{image_local_path.getPath()}"')
         try:
@@ -952,7 +1191,7 @@ class ScrapeStrategy(object):
             self.logger.exception('(Exception) In scraper.download_image.')
             self.pdialog.close()
             # Close error message dialog automatically 1 minute to keep scanning.
-            if kodi.dialog_yesno_timer(f'Cannot download {asset_name} image (Timeout).\nStop scraping?', 60000):
+            if self._run_in_gui_thread(kodi.dialog_yesno_timer, f'Cannot download {asset_name} image (Timeout).\nStop scraping?', 60000):
                 status_dic['msg'] = f'Cannot download {asset_name} image (Timeout)'
                 status_dic['dialog'] = kodi.KODI_MESSAGE_CANCEL
                 return
@@ -970,6 +1209,48 @@ class ScrapeStrategy(object):
         # --- Return value is downloaded image ---
         return image_local_path
 
+    # Downloads the queued asset images in parallel and sets every downloaded file as asset
+    # of its ROM. Jobs can belong to one ROM or to a batch of ROMs.
+    # Failed downloads keep the asset that was set before (the local asset if found).
+    #
+    # @param download_jobs: [list] Jobs queued by _scrap_ROM_asset().
+    def _download_assets(self, download_jobs: typing.List[AssetDownloadJob]):
+        if not download_jobs:
+            return
+        if self.pdialog_verbose:
+            scraper_text = f'Downloading {len(download_jobs)} assets from {self.asset_scraper_obj.get_name()}...'
+            self.pdialog.updateMessage(scraper_text)
+
+        def download(job: AssetDownloadJob):
+            self.logger.debug(f'Download  "{job.image_url_log}"')
+            self.logger.debug(f'Into file "{job.image_local_path.getPath()}"')
+            return self.asset_scraper_obj.download_image(job.image_url, job.image_local_path)
+
+        max_workers = max(1, min(self._get_max_concurrent_downloads(), len(download_jobs)))
+        num_failures = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='akl_download') as executor:
+            futures = [(job, executor.submit(download, job)) for job in download_jobs]
+            for job, future in futures:
+                try:
+                    image_local_path = future.result()
+                except Exception:
+                    self.logger.exception(f'(Exception) Downloading "{job.image_url_log}"')
+                    num_failures += 1
+                    continue
+                if image_local_path is None:
+                    self.logger.debug(f'No {job.asset_info_id} downloaded for "{job.rom.get_identifier()}"')
+                    continue
+                job.rom.set_asset(job.asset_info_id, image_local_path.getPath())
+
+        if num_failures > 0:
+            self.pdialog.close()
+            # Close error message dialog automatically 1 minute to keep scanning.
+            yesno_msg = f'Cannot download {num_failures} asset image(s).\nStop scraping?'
+            if self._run_in_gui_thread(kodi.dialog_yesno_timer, yesno_msg, 60000):
+                self.pdialog.cancel()
+                return
+            self.pdialog.reopen()
+
     # This function to be used in AKL 0.10.x series.
     #
     # @param gamedata: Dictionary with game data.
@@ -1037,19 +1318,45 @@ class ScrapeStrategy(object):
 
         return local_assets
 
-    def _cache_assets(self, paths: typing.List[io.FileName]):
-        duplicates = []
+    # Lists the distinct asset directories in parallel, so slow network shares are listed
+    # at the same time instead of one after another.
+    # Returns a dictionary with the time in seconds it took to cache each directory.
+    def _cache_assets(self, paths: typing.List[io.FileName]) -> typing.Dict[str, float]:
+        distinct_paths: typing.Dict[str, io.FileName] = {}
         for path in paths:
             if path is None:
                 continue
             
             path_str = path.getPath()
-            if path_str in duplicates or path_str == '':
+            if path_str == '' or path_str in distinct_paths:
                 continue
-            
-            self.logger.debug('Caching directory "{}"'.format(path_str))
-            io.misc_add_file_cache(path)
-            duplicates.append(path_str)
+            distinct_paths[path_str] = path
+
+        timings = {}
+        if not distinct_paths:
+            return timings
+
+        max_workers = min(len(distinct_paths), ScrapeStrategy.MAX_CONCURRENT_DIR_SCANS)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='akl_dirscan') as executor:
+            futures = {executor.submit(self._cache_asset_dir, path): path_str for path_str, path in distinct_paths.items()}
+            for future in concurrent.futures.as_completed(futures):
+                path_str = futures[future]
+                try:
+                    timings[path_str] = future.result()
+                except Exception:
+                    self.logger.exception(f'Failure while caching directory "{path_str}"')
+
+        if self.file_cache_store is not None:
+            self.file_cache_store.save()
+        return timings
+
+    def _cache_asset_dir(self, path: io.FileName) -> float:
+        self.logger.debug('Caching directory "{}"'.format(path.getPath()))
+        start_time = time.perf_counter()
+        io.misc_add_file_cache(path, self.file_cache_store)
+        elapsed_time = time.perf_counter() - start_time
+        self.logger.debug(f'Cached directory "{path.getPath()}" in {elapsed_time:.2f} seconds')
+        return elapsed_time
 
     def store_scraped_rom(self, scraper_id: str, rom_id: str, rom: ROMObj):
         if rom is None:
@@ -1066,18 +1373,25 @@ class ScrapeStrategy(object):
         if not is_stored:
             kodi.notify_error('Failed to store scraped ROM')
   
-    def store_scraped_roms(self, scraper_id: str, entity_type: int, entity_id: str, scraped_roms: typing.List[ROMObj]):
-        roms = [*(r.get_data_dic() for r in scraped_roms)]
+    # The ROMs are posted in batches. Returns the ROMs which could not be stored, so storing those
+    # again resumes a partially failed store.
+    def store_scraped_roms(self, scraper_id: str, entity_type: int, entity_id: str,
+                           scraped_roms: typing.List[ROMObj]) -> typing.List[ROMObj]:
         post_data = {
             'entity_type': int(entity_type),
             'entity_id': entity_id,
             'akl_addon_id': scraper_id,
-            'roms': roms,
             'applied_settings': self.scraper_settings.get_data_dic()
         }
-        is_stored = api.client_post_scraped_roms(self.webservice_host, self.webservice_port, post_data)
-        if not is_stored:
-            kodi.notify_error('Failed to store scraped ROMs')
+        self.pdialog.startProgress('Storing scraped ROMs', max(1, len(scraped_roms)))
+        unstored_roms = api.client_post_scraped_roms_in_batches(
+            self.webservice_host, self.webservice_port, post_data, scraped_roms,
+            progress_callback=lambda num_stored, num_roms: self.pdialog.updateProgress(num_stored))
+        self.pdialog.endProgress()
+
+        if unstored_roms:
+            kodi.notify_error(f'Failed to store {len(unstored_roms)} scraped ROMs')
+        return unstored_roms
 
     def _translate(self, key):
         if key == constants.SCRAPE_ACTION_NONE:
@@ -1125,9 +1439,21 @@ class Scraper(object):
     ]
     GLOBAL_CACHE_LIST = []
     
-    JSON_indent = 1
+    # Scraper caches are machine-only files, they are written compact.
+    JSON_indent = None
     JSON_separators = (',', ':')
 
+    # Number of changes in the journal of a JSON disk cache after which a new snapshot is written.
+    JOURNAL_COMPACT_THRESHOLD = 500
+    # Maximum number of platforms of which the JSON disk caches are kept in memory.
+    MAX_CACHED_PLATFORMS = 4
+
+    # Candidate, cache key and platform of the ROM being scraped. Kept per thread so the same
+    # scraper object can be used to scrape multiple ROMs concurrently.
+    candidate = PerThreadAttribute()
+    cache_key = PerThreadAttribute()
+    platform = PerThreadAttribute()
+
     # --- Constructor ----------------------------------------------------------------------------
     # @param cache_dir: [io.FileName] Path to scraper cache dir.
     def __init__(self, cache_dir: io.FileName):
@@ -1154,16 +1480,41 @@ class Scraper(object):
             self.scraper_cache_dir.makedirs()
 
         self.logger.info(f'Scraper cache dir set to: {self.scraper_cache_dir.getPath()}')
+        # Deprecated, time of the last request allowed by _wait_for_API_request().
         self.last_http_call = datetime.now()
+        # Shared rate limiter of this scraper and its (rate, burst), set by _wait_for_API_request().
+        self.api_rate_limiter: net.RateLimiter = None
+        self.api_rate_limit = None
+        # On-disk cache of the HTTP responses of this scraper. Set with enable_http_cache().
+        self.http_cache: net.HTTPCache = None
+        # Scrapers with a disk cache also store the listings of the asset directories and the
+        # checksums of the ROM files, so repeated scrapes only list and hash what has changed.
+        # The stores belong to this scraper, pass them to the io functions that use them.
+        # The checksum store is opened on first use and closed by flush_disk_cache().
+        self.file_cache_store: io.FileCacheStore = None
+        self.checksum_store: io.ChecksumStore = None
+        self.checksum_store_lock = threading.Lock()
+        if self.supports_disk_cache():
+            self.file_cache_store = io.FileCacheStore(self.scraper_cache_dir.pjoin('file_listings.json'))
         
         # --- Disk caches ---
-        self.disk_caches = {}
-        self.disk_caches_loaded = {}
-        self.disk_caches_dirty = {}
-        for cache_name in Scraper.CACHE_LIST:
-            self.disk_caches[cache_name] = {}
-            self.disk_caches_loaded[cache_name] = False
-            self.disk_caches_dirty[cache_name] = False
+        # When a backend is set the disk caches are stored in the backend instead of JSON files.
+        self.cache_backend: scraper_cache.ScraperCacheBackend = None
+        # JSON disk caches per platform and cache type. Changes are recorded in a journal.
+        self.disk_cache_manager = scraper_cache.DiskCacheManager(
+            self._get_scraper_file_name,
+            max_platforms=Scraper.MAX_CACHED_PLATFORMS,
+            use_journal=bool(self.supports_disk_cache()),
+            json_indent=Scraper.JSON_indent,
+            json_separators=Scraper.JSON_separators,
+            journal_compact_threshold=Scraper.JOURNAL_COMPACT_THRESHOLD)
+        # Deprecated views of the caches of the current platform, use the disk cache functions.
+        self.disk_caches = scraper_cache.DiskCacheView(
+            self.disk_cache_manager, lambda: self.platform, Scraper.CACHE_LIST, 'data')
+        self.disk_caches_loaded = scraper_cache.DiskCacheView(
+            self.disk_cache_manager, lambda: self.platform, Scraper.CACHE_LIST, 'loaded')
+        self.disk_caches_dirty = scraper_cache.DiskCacheView(
+            self.disk_cache_manager, lambda: self.platform, Scraper.CACHE_LIST, 'dirty')
         # Candidate game is set with functions set_candidate_from_cache() or set_candidate()
         # and used by functions get_metadata() and get_assets()
         self.candidate = None
@@ -1178,6 +1529,15 @@ class Scraper(object):
             self.global_disk_caches_dirty[cache_name] = False
 
     # --- Methods --------------------------------------------------------------------------------
+    # Caches the API responses and revalidates them with conditional requests (ETag and
+    # Last-Modified), so unchanged responses are not downloaded again. Only the requests of
+    # this scraper done with _get_URL() and download_image() use the cache.
+    # Call it in the constructor of scrapers with APIs that send validators.
+    def enable_http_cache(self, max_size: int = None):
+        if max_size is None:
+            max_size = net.HTTP_CACHE_MAX_SIZE
+        self.http_cache = net.HTTPCache(self.scraper_cache_dir.pjoin('http', isdir=True), max_size)
+
     # Scraper is much more verbose (even more than AKL Debug level).
     def set_verbose_mode(self, verbose_flag):
         self.logger.debug('Scraper.set_verbose_mode() verbose_flag {0}'.format(verbose_flag))
@@ -1201,6 +1561,26 @@ class Scraper(object):
         self.debug_sha1 = sha1_str
         self.debug_size = size
 
+    # Calculates the checksums of a ROM file. Scrapers with a disk cache store them in their cache
+    # directory, other scrapers in the default store, so unchanged files are not hashed again.
+    # Returns None in case of error.
+    def calculate_checksums(self, rom_checksums_FN: io.FileName) -> dict:
+        return io.misc_calculate_checksums(rom_checksums_FN, store=self._get_checksum_store())
+
+    def _get_checksum_store(self) -> io.ChecksumStore:
+        if not self.supports_disk_cache():
+            return None
+        with self.checksum_store_lock:
+            if self.checksum_store is None:
+                self.checksum_store = io.misc_open_checksum_store(self.scraper_cache_dir.pjoin('checksums.db'))
+            return self.checksum_store
+
+    def _close_checksum_store(self):
+        with self.checksum_store_lock:
+            if self.checksum_store is not None:
+                self.checksum_store.close()
+                self.checksum_store = None
+
     # Dump dictionary as JSON file for debugging purposes.
     # This function is used internally by the scrapers if the flag self.dump_file_flag is True.
     def _dump_json_debug(self, file_name, data_dic):
@@ -1251,6 +1631,18 @@ class Scraper(object):
     def supports_assets(self):
         pass
 
+    # Maximum number of ROMs this scraper can scrape at the same time.
+    # Scrapers are sequential by default. Scrapers which are thread safe and whose API allows
+    # parallel requests can override this method.
+    def get_max_concurrent_roms(self) -> int:
+        return 1
+
+    # Maximum number of asset images this scraper can download at the same time.
+    # Downloads are sequential by default. Scrapers with a thread safe download_image() can
+    # override this method.
+    def get_max_concurrent_downloads(self) -> int:
+        return 1
+
     # Check if the scraper is ready to work. For example, check if required API keys are
     # configured, etc. If there is some fatal errors then deactivate the scraper.
     #
@@ -1306,57 +1698,47 @@ class Scraper(object):
             if self._check_disk_cache(cache_type, self.cache_key):
                 self._delete_from_disk_cache(cache_type, self.cache_key)
 
+    # Stores the disk caches in the given backend instead of in JSON files per platform.
+    def set_cache_backend(self, cache_backend: scraper_cache.ScraperCacheBackend):
+        self.cache_backend = cache_backend
+
+    # Stores the disk caches in a SQLite database in the scraper cache dir. The first time the
+    # existing JSON cache files of this scraper are imported into the database.
+    def enable_sqlite_disk_cache(self):
+        if not self.supports_disk_cache():
+            return
+        db_FN = self.scraper_cache_dir.pjoin('scraper_cache.db')
+        cache_backend = scraper_cache.SQLiteScraperCacheBackend(db_FN)
+        if not cache_backend.has_scraper(self.get_filename()):
+            scraper_cache.import_json_caches(cache_backend, self.scraper_cache_dir, self.get_filename(), Scraper.CACHE_LIST)
+        self.set_cache_backend(cache_backend)
+
     # Only write to disk non-empty caches.
     # Only write to disk dirty caches. If cache has not been modified then do not write it.
     def flush_disk_cache(self, pdialog: kodi.ProgressDialog = None):
+        # The checksums are stored when calculated, the store is opened again on next use.
+        self._close_checksum_store()
+
         # If scraper does not use disk cache (notably AKL Offline) return.
         if not self.supports_disk_cache():
             self.logger.debug('Scraper.flush_disk_cache() Scraper {} does not use disk cache.'.format(
                 self.get_name()))
             return
 
+        # Changes in a cache backend are stored entry by entry.
+        if self.cache_backend is not None:
+            self.cache_backend.flush()
+            return
+
         # Create progress dialog.
-        num_steps = len(Scraper.CACHE_LIST)  # + len(Scraper.GLOBAL_CACHE_LIST)
-        step_count = 0
+        num_steps = max(1, self.disk_cache_manager.get_num_caches())
         if pdialog is not None:
             pdialog.startProgress('Flushing scraper disk caches...', num_steps)
 
         # --- Scraper caches ---
         self.logger.debug('Scraper.flush_disk_cache() Saving scraper {} disk cache...'.format(
             self.get_name()))
-        for cache_type in Scraper.CACHE_LIST:
-            if pdialog is not None:
-                pdialog.updateProgress(step_count)
-                step_count += 1
-
-            # Skip unloaded caches
-            if not self.disk_caches_loaded[cache_type]:
-                self.logger.debug('Skipping {} (Unloaded)'.format(cache_type))
-                continue
-            # Skip empty caches
-            if not self.disk_caches[cache_type]:
-                self.logger.debug('Skipping {} (Empty)'.format(cache_type))
-                continue
-            # Skip clean caches.
-            if not self.disk_caches_dirty[cache_type]:
-                self.logger.debug('Skipping {} (Clean)'.format(cache_type))
-                continue
-
-            # Get JSON data.
-            json_data = json.dumps(
-                self.disk_caches[cache_type], ensure_ascii=False, sort_keys=True,
-                indent=Scraper.JSON_indent, separators=Scraper.JSON_separators)
-
-            # Write to disk
-            json_file_path, json_fname = self._get_scraper_file_name(cache_type, self.platform)
-            file = io.FileName(json_file_path)
-            file.writeAll(json_data)
-            
-            # self.logger.debug('Saved "{}"'.format(json_file_path))
-            self.logger.debug('Saved "<SCRAPER_CACHE_DIR>/{}"'.format(json_fname))
-
-            # Cache written to disk is clean gain.
-            self.disk_caches_dirty[cache_type] = False
+        self.disk_cache_manager.flush(pdialog.incrementStep if pdialog is not None else None)
 
         # --- Global caches ---
         # self.logger.debug('Scraper.flush_disk_cache() Saving scraper {} global disk cache...'.format(
@@ -1476,10 +1858,12 @@ class Scraper(object):
 
     # Downloads an image from the given url to the local path.
     # Can overwrite this method in scraper implementation to support extra actions, like
-    # request throttling.
+    # request throttling. Called from multiple threads when assets are downloaded in parallel.
+    # Returns the local path or None if the download failed.
     def download_image(self, image_url, image_local_path):
         # net_download_img() never prints URLs or paths.
-        net.download_img(image_url, image_local_path)
+        if not net.download_img(image_url, image_local_path, http_cache=self.http_cache):
+            return None
         return image_local_path
 
     # Not used now. candidate['id'] is used as hash value for the whole candidate dictionary.
@@ -1570,51 +1954,45 @@ class Scraper(object):
 
         return json_full_path, json_fname
 
-    def _lazy_load_disk_cache(self, cache_type):
-        if not self.disk_caches_loaded[cache_type]:
-            self._load_disk_cache(cache_type, self.platform)
-
-    def _load_disk_cache(self, cache_type, platform):
-        # --- Get filename ---
-        json_file_path, json_fname = self._get_scraper_file_name(cache_type, platform)
-        self.logger.debug('Scraper._load_disk_cache() Loading cache "{}"'.format(cache_type))
-
-        # --- Load cache if file exists ---
-        if os.path.isfile(json_file_path):
-            file = open(json_file_path)
-            file_contents = file.read()
-            file.close()
-            self.disk_caches[cache_type] = json.loads(file_contents)
-            # self.logger.debug('Loaded "{}"'.format(json_file_path))
-            self.logger.debug('Loaded "<SCRAPER_CACHE_DIR>/{}"'.format(json_fname))
-        else:
-            self.logger.debug('Cache file not found. Resetting cache.')
-            self.disk_caches[cache_type] = {}
-        self.disk_caches_loaded[cache_type] = True
-        self.disk_caches_dirty[cache_type] = False
-
     # Returns True if item is in the cache, False otherwise.
     # Lazy loads cache files from disk.
     def _check_disk_cache(self, cache_type: str, cache_key: str):
-        self._lazy_load_disk_cache(cache_type)
-
-        return True if cache_key in self.disk_caches[cache_type] else False
+        if self.cache_backend is not None:
+            return self.cache_backend.contains(self.get_filename(), self.platform, cache_type, cache_key)
+        return self.disk_cache_manager.contains(self.platform, cache_type, cache_key)
 
     # _check_disk_cache() must be called before this.
     def _retrieve_from_disk_cache(self, cache_type: str, cache_key: str):
-        return self.disk_caches[cache_type][cache_key]
+        if self.cache_backend is not None:
+            return self.cache_backend.get(self.get_filename(), self.platform, cache_type, cache_key)
+        return self.disk_cache_manager.get(self.platform, cache_type, cache_key)
 
     # _check_disk_cache() must be called before this.
     def _delete_from_disk_cache(self, cache_type: str, cache_key: str):
-        del self.disk_caches[cache_type][cache_key]
-        self.disk_caches_dirty[cache_type] = True
+        if self.cache_backend is not None:
+            self.cache_backend.delete(self.get_filename(), self.platform, cache_type, cache_key)
+            return
+        self.disk_cache_manager.delete(self.platform, cache_type, cache_key)
 
     # Lazy loading should be done here because the internal cache for ScreenScraper
     # could be updated withouth being loaded first with _check_disk_cache().
     def _update_disk_cache(self, cache_type: str, cache_key: str, data):
-        self._lazy_load_disk_cache(cache_type)
-        self.disk_caches[cache_type][cache_key] = data
-        self.disk_caches_dirty[cache_type] = True
+        if self.cache_backend is not None:
+            self.cache_backend.put(self.get_filename(), self.platform, cache_type, cache_key, data)
+            return
+        self.disk_cache_manager.put(self.platform, cache_type, cache_key, data)
+
+    # Deprecated, the disk caches are loaded on first use by the DiskCacheManager.
+    def _lazy_load_disk_cache(self, cache_type):
+        warnings.warn('Scraper._lazy_load_disk_cache() is deprecated, use _check_disk_cache()',
+                      DeprecationWarning, stacklevel=2)
+        self.disk_cache_manager.get_data(self.platform, cache_type)
+
+    # Deprecated, the disk caches are loaded on first use by the DiskCacheManager.
+    def _load_disk_cache(self, cache_type, platform):
+        warnings.warn('Scraper._load_disk_cache() is deprecated, use _check_disk_cache()',
+                      DeprecationWarning, stacklevel=2)
+        self.disk_cache_manager.get_data(platform, cache_type)
 
     # --- Private global disk caches -------------------------------------------------------------
     def _get_global_file_name(self, cache_type: str):
@@ -1634,10 +2012,8 @@ class Scraper(object):
 
         # --- Load cache if file exists ---
         if os.path.isfile(json_file_path):
-            file = open(json_file_path)
-            file_contents = file.read()
-            file.close()
-            self.global_disk_caches[cache_type] = json.loads(file_contents)
+            with open(json_file_path, 'rb') as file:
+                self.global_disk_caches[cache_type] = jsoncodec.loads(file.read())
             # self.logger.debug('Loaded "{}"'.format(json_file_path))
             self.logger.debug('Loaded "<SCRAPER_CACHE_DIR>/{}"'.format(json_fname))
         else:
@@ -1665,17 +2041,43 @@ class Scraper(object):
         self.global_disk_caches[cache_type] = data
         self.global_disk_caches_dirty[cache_type] = True
 
-    # Generic waiting method to avoid too many requests
-    # and website abuse. 
-    def _wait_for_API_request(self, wait_time_in_miliseconds=1000):
+    # HTTP GET for the scraper APIs, with retries and a circuit breaker per API host.
+    # See net.get_URL_with_retry(). A successful request resets the error counter, so only errors
+    # in a row disable the scraper and occasional network failures do not stop a long scrape.
+    # @return: [tuple] Content and HTTP status code. The status code is None when there was no
+    #          response or the API host failed too often and no request was done.
+    def _get_URL(self, url: str, url_log: str = None, headers: dict = None, verify_ssl=None,
+                 content_type: net.ContentType = net.ContentType.STRING) -> typing.Tuple[typing.Any, int]:
+        page_data, http_code = net.get_URL_with_retry(url, url_log, headers=headers, verify_ssl=verify_ssl,
+                                                      content_type=content_type, http_cache=self.http_cache)
+        if http_code == 200:
+            self.exception_counter = 0
+        return page_data, http_code
+
+    def _get_URL_as_json(self, url: str, url_log: str = None, headers: dict = None, verify_ssl=None) -> typing.Any:
+        page_data, http_code = self._get_URL(url, url_log, headers, verify_ssl, net.ContentType.JSON)
+        return page_data
+
+    # Generic waiting method to avoid too many requests and website abuse.
+    # All instances and threads of a scraper share one token bucket rate limiter, so this only
+    # sleeps the time remaining until the next request is allowed. With a burst larger than 1
+    # that many requests can be done at once after a quiet period.
+    # Use net.configure_rate_limit() with the API host to limit every request of net.get_URL()
+    # to the host instead.
+    # The rate limiter is configured on the first call and again only when the rate changes.
+    def _wait_for_API_request(self, wait_time_in_miliseconds=1000, burst=1):
         if wait_time_in_miliseconds == 0:
             return
         
-        # Make sure we dont go over the TooManyRequests limit of 1 second.
-        now = datetime.now()
-        if (now - self.last_http_call).total_seconds() * 1000 < wait_time_in_miliseconds:
-            self.logger.debug('Scraper._wait_for_API_request() Sleeping {}ms to avoid overloading...'.format(wait_time_in_miliseconds))
-            time.sleep(wait_time_in_miliseconds / 1000)
+        rate_limit = (1000.0 / wait_time_in_miliseconds, burst)
+        if self.api_rate_limiter is None or self.api_rate_limit != rate_limit:
+            self.api_rate_limiter = net.configure_rate_limit(f'scraper:{self.get_name()}', *rate_limit)
+            self.api_rate_limit = rate_limit
+        waited_time = self.api_rate_limiter.acquire()
+        self.last_http_call = datetime.now()
+        if waited_time > 0:
+            self.logger.debug('Scraper._wait_for_API_request() Slept {:.0f}ms to avoid overloading...'.format(
+                waited_time * 1000))
 
 
 # ------------------------------------------------------------------------------------------------
@@ -1709,6 +2111,13 @@ class Null_Scraper(Scraper):
     def supports_assets(self):
         return False
 
+    # Null scraper does no IO, so it never limits the concurrency.
+    def get_max_concurrent_roms(self) -> int:
+        return 64
+
+    def get_max_concurrent_downloads(self) -> int:
+        return 64
+
     def check_before_scraping(self, status_dic):
         return status_dic
 
@@ -29,26 +29,38 @@ from __future__ import division
 from __future__ import annotations
 
 import abc
+import collections
+import concurrent.futures
 import logging
 import errno
 import fnmatch
-import json
 import sys
 import os
 import shutil
 import typing
+import threading
 import zlib
 import hashlib
+import mmap
+import sqlite3
+import zipfile
 
 # Python 3
 from urllib.parse import urlparse
+from io import BufferedReader, RawIOBase, SEEK_SET
 
 # --- Python standard library named imports ---
 import xml.etree.ElementTree as ET
 
 import xbmcvfs
 
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
 from akl import constants
+from akl.utils import jsoncodec
 
 logger = logging.getLogger(__name__)
 FILENAME_VERBOSE = False
@@ -228,6 +240,7 @@ class FileName(FileType):
             self.write    = self.write_python
             self.close    = self.close_python
             self.unlink   = self.unlink_python
+            self.rename   = self.rename_python
             self.stat     = self.stat_python
         else:
             self.exists         = self.exists_kodivfs
@@ -240,6 +253,7 @@ class FileName(FileType):
             self.write    = self.write_kodivfs
             self.close    = self.close_kodivfs
             self.unlink   = self.unlink_kodivfs
+            self.rename   = self.rename_kodivfs
             self.stat     = self.stat_kodivfs
     
     # ---------------------------------------------------------------------------------------------
@@ -384,6 +398,10 @@ class FileName(FileType):
 
     def unlink_python(self):
         os.remove(self.path_tr)
+
+    # Replaces the target file if it exists. Atomic when both files are on the same filesystem.
+    def rename_python(self, to_FN: FileName):
+        os.replace(self.path_tr, to_FN.getPathTranslated())
             
     # ---------------------------------------------------------------------------------------------
     # File low-level IO functions. Kodi VFS implementation.
@@ -420,6 +438,13 @@ class FileName(FileType):
         #logger.debug('xbmcvfs.delete() failed, applying hard delete')
         if self.exists():
             self.unlink_python()
+
+    def rename_kodivfs(self, to_FN: FileName):
+        # xbmcvfs.rename() does not overwrite existing files on all protocols.
+        if to_FN.exists():
+            to_FN.unlink()
+        if not xbmcvfs.rename(self.path_tr, to_FN.getPathTranslated()):
+            raise OSError('Cannot rename {0} file'.format(self.path_tr))
             
     # ---------------------------------------------------------------------------------------------
     # File high-level IO functions
@@ -552,16 +577,17 @@ class FileName(FileType):
     # Opens JSON file and reads it
     def readJson(self) -> typing.Any:
         contents = self.loadFileToStr()
-        return json.loads(contents)
+        return jsoncodec.loads(contents)
         
     # --- Configure JSON writer ---
     # >> json_unicode is either str or unicode
     # >> See https://docs.python.org/2.7/library/json.html#json.dumps
     # unicode(json_data) auto-decodes data to unicode if str
     # NOTE More compact JSON files (less blanks) load faster because size is smaller.
+    #      Use JSON_indent=None for compact files, they are written with the fastest JSON library.
     def writeJson(self, raw_data, JSON_indent=1, JSON_separators=(',', ':')):
-        json_data = json.dumps(raw_data, ensure_ascii=False, sort_keys=True,
-                               indent=JSON_indent, separators=JSON_separators)
+        json_data = jsoncodec.dumps(raw_data, sort_keys=True,
+                                    indent=JSON_indent, separators=JSON_separators)
         self.saveStrToFile(json_data)
 
     def readXml(self) -> ET.Element:
@@ -691,22 +717,100 @@ def get_image_URL_extension(url) -> str:
 # -------------------------------------------------------------------------------------------------
 # File cache
 # -------------------------------------------------------------------------------------------------
+# Files of each cached directory are indexed by lowercase filename without extension. Each entry
+# maps the lowercase extensions (without dot) to the original filename, so lookups are
+# case-insensitive, take constant time and return the real filename.
+# { dir_path: { 'super mario': { 'png': 'Super Mario.PNG', 'jpg': 'super mario.jpg' } } }
 file_cache = {}
-def misc_add_file_cache(dir_FN:FileName):
+
+def misc_add_file_cache(dir_FN:FileName, store: 'FileCacheStore' = None):
     global file_cache
-    # >> Create a set with all the files in the directory
+    # >> Create an index with all the files in the directory
     if not dir_FN:
         logger.debug('misc_add_file_cache() Empty dir_str. Exiting')
         return
 
-    logger.debug('misc_add_file_cache() Scanning path "{0}"'.format(dir_FN.getPath()))
+    file_names = _misc_list_dir_with_store(dir_FN, store)
+    file_index = {}
+    for file_base in file_names:
+        stem, ext = os.path.splitext(file_base)
+        file_index.setdefault(stem.lower(), {})[ext[1:].lower()] = file_base
+
+    logger.debug('misc_add_file_cache() Adding {0} files to cache'.format(len(file_names)))
+    file_cache[dir_FN.getPath()] = file_index
+
+#
+# Persistent store of the directory listings, so unchanged directories do not need to be listed
+# again on the next run (listing SMB shares is slow). Listings are invalidated when the
+# modification time of the directory changes. Pass it to misc_add_file_cache().
+# { dir_path: { 'mtime': 1650000000.0, 'files': [ 'Super Mario.PNG', ... ] } }
+#
+class FileCacheStore(object):
+    def __init__(self, store_FN: FileName):
+        self.store_FN = store_FN
+        self.listings: dict = None
+        self.dirty = False
+        self.lock = threading.RLock()
+
+    # Returns the stored filenames of a directory or None if the directory changed.
+    def get_files(self, dir_str: str, dir_mtime: float) -> typing.List[str]:
+        with self.lock:
+            stored_listing = self._load().get(dir_str)
+        if stored_listing and stored_listing.get('mtime') == dir_mtime:
+            return stored_listing['files']
+        return None
+
+    def put_files(self, dir_str: str, dir_mtime: float, file_names: typing.List[str]):
+        with self.lock:
+            self._load()[dir_str] = {'mtime': dir_mtime, 'files': file_names}
+            self.dirty = True
+
+    # Writes the directory listings to disk if any listing changed.
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                self.store_FN.writeJson(self.listings, JSON_indent=None)
+                self.dirty = False
+            except Exception:
+                logger.exception('FileCacheStore::save() Cannot write "{0}"'.format(self.store_FN.getPath()))
+
+    def _load(self) -> dict:
+        if self.listings is None:
+            self.listings = {}
+            try:
+                if self.store_FN.exists():
+                    self.listings = self.store_FN.readJson()
+            except Exception:
+                logger.exception('FileCacheStore::_load() Cannot read "{0}"'.format(self.store_FN.getPath()))
+        return self.listings
+
+# Returns the modification time of a directory, or None if it is not available.
+# For Kodi VFS paths this is a single stat call, which is much cheaper than listing the directory.
+def _misc_get_dir_mtime(dir_FN: FileName):
+    try:
+        size, mtime = misc_get_size_and_mtime(dir_FN)
+    except Exception:
+        return None
+    return mtime if mtime else None
 
-    file_list = dir_FN.scanFilesInPath()
-    # lower all filenames for easier matching
-    file_set = [file.getBase().lower() for file in file_list]
+def _misc_list_dir_with_store(dir_FN: FileName, store: FileCacheStore) -> typing.List[str]:
+    dir_str = dir_FN.getPath()
+    dir_mtime = None
+    if store is not None:
+        dir_mtime = _misc_get_dir_mtime(dir_FN)
+        stored_files = store.get_files(dir_str, dir_mtime) if dir_mtime is not None else None
+        if stored_files is not None:
+            logger.debug('misc_add_file_cache() Directory unchanged "{0}"'.format(dir_str))
+            return stored_files
 
-    logger.debug('misc_add_file_cache() Adding {0} files to cache'.format(len(file_set)))
-    file_cache[dir_FN.getPath()] = file_set
+    logger.debug('misc_add_file_cache() Scanning path "{0}"'.format(dir_str))
+    file_names = [file.getBase() for file in dir_FN.scanFilesInPath()]
+
+    if store is not None and dir_mtime is not None:
+        store.put_files(dir_str, dir_mtime, file_names)
+    return file_names
 
 
 #
@@ -719,12 +823,13 @@ def misc_search_file_cache(dir_path: FileName, filename_noext: str, file_exts):
         logger.warning('Directory {0} not in file_cache'.format(dir_str))
         return None
 
-    current_cache_set = file_cache[dir_str]
+    available_exts = file_cache[dir_str].get(filename_noext.lower())
+    if not available_exts:
+        return None
+
     for ext in file_exts:
-        file_base = filename_noext + '.' + ext
-        file_base_as_cached = file_base.lower()
-        # logger.debug('misc_search_file_cache() file_Base = "{0}"'.format(file_base))
-        if file_base_as_cached in current_cache_set:
+        file_base = available_exts.get(ext.lower())
+        if file_base is not None:
             # logger.debug('misc_search_file_cache() Found in cache')
             return dir_path.pjoin(file_base)
 
@@ -767,53 +872,360 @@ def get_filesearch_extension_list(exts):
     return ext_list
 
 
+# Arguments keep the separators of the standard library, so other addons parse the same text.
 def parse_to_json_arg(obj) -> str:
-    arg = '"{}"'.format(json.dumps(obj))
+    arg = '"{}"'.format(jsoncodec.dumps(obj, separators=(', ', ': '), ensure_ascii=True))
     arg = arg.replace('\\', '\\\\') #double encoding
     return arg
 
 
+# Files are read in large buffers, local files are memory mapped.
+CHECKSUM_BUFFER_SIZE = 8 * 1024 * 1024
+# Files from this size are hashed with each algorithm on its own thread.
+# hashlib and zlib release the GIL while hashing large buffers.
+CHECKSUM_PARALLEL_MIN_SIZE = 32 * 1024 * 1024
+# Number of files hashed concurrently by misc_calculate_checksums_bulk().
+CHECKSUM_MAX_WORKERS = 4
+CHECKSUM_MEMO_MAX_ENTRIES = 10000
+
+# Calculated checksums keyed by (path, size, mtime_ns), least recently used first.
+checksum_memo = collections.OrderedDict()
+checksum_memo_lock = threading.Lock()
+
+# Checksum store shared by all callers that do not pass their own store. Opened on first use.
+DEFAULT_CHECKSUM_STORE_PATH = 'special://profile/addon_data/script.module.akl/checksums.db'
+default_checksum_store = None
+default_checksum_store_opened = False
+default_checksum_store_lock = threading.Lock()
+
+#
+# SQLite database with the checksums of files keyed by path, size and modification time, so
+# unchanged files are not hashed again on the next run. Pass it to misc_calculate_checksums().
+# A stored checksum is only valid while the size and modification time of the file are the same,
+# stale entries are removed when they are looked up.
+#
+class ChecksumStore(object):
+    # Maximum number of parameters in a single SQLite query.
+    QUERY_BATCH_SIZE = 500
+
+    def __init__(self, db_FN: FileName):
+        self.db_FN = db_FN
+        self.lock = threading.Lock()
+
+        logger.debug('ChecksumStore() Opening "{}"'.format(db_FN.getPath()))
+        self.connection = sqlite3.connect(db_FN.getPathTranslated(), check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS checksums ('
+            'path TEXT NOT NULL PRIMARY KEY, '
+            'size INTEGER NOT NULL, '
+            'mtime_ns INTEGER NOT NULL, '
+            'crc TEXT NOT NULL, '
+            'md5 TEXT NOT NULL, '
+            'sha1 TEXT NOT NULL) WITHOUT ROWID')
+        self.connection.commit()
+
+    # Returns the stored checksums of the files which did not change, keyed by path.
+    # @param keys: [list] Tuples with the path, size and mtime_ns of the files.
+    def get_many(self, keys: typing.List[typing.Tuple[str, int, int]]) -> typing.Dict[str, dict]:
+        wanted = {path: (size, mtime_ns) for path, size, mtime_ns in keys}
+        paths = list(wanted.keys())
+        checksums = {}
+        stale_paths = []
+        with self.lock:
+            for index in range(0, len(paths), ChecksumStore.QUERY_BATCH_SIZE):
+                batch = paths[index:index + ChecksumStore.QUERY_BATCH_SIZE]
+                rows = self.connection.execute(
+                    'SELECT path, size, mtime_ns, crc, md5, sha1 FROM checksums WHERE path IN ({})'.format(
+                        ','.join('?' * len(batch))), batch)
+                for path, size, mtime_ns, crc, md5, sha1 in rows:
+                    if wanted[path] != (size, mtime_ns):
+                        stale_paths.append(path)
+                        continue
+                    checksums[path] = {'crc': crc, 'md5': md5, 'sha1': sha1, 'size': size}
+
+            if stale_paths:
+                logger.debug('ChecksumStore::get_many() Invalidating {} changed files'.format(len(stale_paths)))
+                self.connection.executemany('DELETE FROM checksums WHERE path = ?', [(path,) for path in stale_paths])
+                self.connection.commit()
+        return checksums
+
+    def get(self, path: str, size: int, mtime_ns: int) -> dict:
+        return self.get_many([(path, size, mtime_ns)]).get(path)
+
+    # @param entries: [dict] Checksums keyed by tuples with the path, size and mtime_ns of the files.
+    def put_many(self, entries: typing.Dict[typing.Tuple[str, int, int], dict]):
+        rows = [
+            (path, size, mtime_ns, checksums['crc'], checksums['md5'], checksums['sha1'])
+            for (path, size, mtime_ns), checksums in entries.items()
+        ]
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO checksums (path, size, mtime_ns, crc, md5, sha1) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self.connection.commit()
+
+    def invalidate(self, path: str):
+        with self.lock:
+            self.connection.execute('DELETE FROM checksums WHERE path = ?', (path,))
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
 #
 # Calculates CRC, MD5 and SHA1 of a file in an efficient way.
 # Returns a dictionary with the checksums or None in case of error.
+# Results are memoised and stored by path, size and modification time of the file.
+# For the ROM inside an archive use misc_calculate_archive_checksums().
 #
-# https://stackoverflow.com/questions/519633/lazy-method-for-reading-big-file-in-python
-# https://stackoverflow.com/questions/1742866/compute-crc-of-file-in-python 
+# @param full_file_path: [FileName] File to hash.
+# @param parallel_hashes: [bool] Hash large files with each algorithm on a separate thread.
+# @param store: [ChecksumStore] Persistent store of the checksums. None uses the default shared
+#               store, see misc_get_default_checksum_store().
 #
-def misc_calculate_checksums(full_file_path: FileName):
+def misc_calculate_checksums(full_file_path: FileName, parallel_hashes: bool = True,
+                             store: ChecksumStore = None):
     if full_file_path is None:
         logger.debug('No checksum to complete')
         return None
-    
-    logger.debug('Computing checksums "{}"'.format(full_file_path.getPath()))
+
     try:
-        f = full_file_path.open('rb')
-        crc_prev = 0
-        md5 = hashlib.md5()
-        sha1 = hashlib.sha1()
-        for piece in misc_read_file_in_chunks(f):
-            crc_prev = zlib.crc32(piece, crc_prev)
-            md5.update(piece)
-            sha1.update(piece)
-        crc_digest = '{:08X}'.format(crc_prev & 0xFFFFFFFF)
-        md5_digest = md5.hexdigest()
-        sha1_digest = sha1.hexdigest()
-        size = full_file_path.stat().st_size
-        #os.path.getsize(full_file_path)
-    except Exception as ex:
+        size, mtime_ns = misc_get_size_and_mtime_ns(full_file_path)
+    except Exception:
+        logger.exception('misc_calculate_checksums() Cannot stat "{}"'.format(full_file_path.getPath()))
+        return None
+
+    key = (full_file_path.getPath(), size, mtime_ns)
+    checksums = _misc_get_known_checksums([key], store).get(key[0])
+    if checksums is not None:
+        return checksums
+
+    checksums = _misc_compute_checksums(full_file_path, size, parallel_hashes)
+    if checksums is None:
+        return None
+    _misc_remember_checksums({key: checksums}, store)
+    return dict(checksums)
+
+
+#
+# Calculates the checksums of many files concurrently.
+# Known checksums are looked up in the memo and the checksum store first, in one query.
+# Returns a dictionary with the path of each file and its checksums, None in case of error.
+#
+def misc_calculate_checksums_bulk(files: typing.List[FileName],
+                                  max_workers: int = CHECKSUM_MAX_WORKERS,
+                                  parallel_hashes: bool = False,
+                                  store: ChecksumStore = None) -> typing.Dict[str, dict]:
+    results = {}
+    file_keys = []
+    for file in files:
+        try:
+            size, mtime_ns = misc_get_size_and_mtime_ns(file)
+        except Exception:
+            logger.exception('misc_calculate_checksums_bulk() Cannot stat "{}"'.format(file.getPath()))
+            results[file.getPath()] = None
+            continue
+        file_keys.append((file, (file.getPath(), size, mtime_ns)))
+
+    results.update(_misc_get_known_checksums([key for file, key in file_keys], store))
+    missing = [(file, key) for file, key in file_keys if key[0] not in results]
+    if not missing:
+        return results
+
+    logger.debug('misc_calculate_checksums_bulk() Computing checksums of {} files'.format(len(missing)))
+    computed = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='akl_checksum') as executor:
+        futures = {
+            executor.submit(_misc_compute_checksums, file, key[1], parallel_hashes): key for file, key in missing
+        }
+        for future in concurrent.futures.as_completed(futures):
+            key = futures[future]
+            checksums = future.result()
+            if checksums is not None:
+                computed[key] = checksums
+                checksums = dict(checksums)
+            results[key[0]] = checksums
+
+    _misc_remember_checksums(computed, store)
+    return results
+
+
+# Opens the database where the checksums are stored between runs. Returns None if it cannot be opened.
+def misc_open_checksum_store(store_FN: FileName) -> ChecksumStore:
+    try:
+        return ChecksumStore(store_FN)
+    except Exception:
+        logger.exception('misc_open_checksum_store() Cannot open "{}"'.format(store_FN.getPath()))
+        return None
+
+
+# Returns the checksum store shared by the callers without their own store, in the addon data
+# of this module. It is opened on first use. Returns None if it cannot be opened.
+def misc_get_default_checksum_store() -> ChecksumStore:
+    global default_checksum_store, default_checksum_store_opened
+    with default_checksum_store_lock:
+        if default_checksum_store_opened:
+            return default_checksum_store
+        default_checksum_store_opened = True
+        store_FN = FileName(DEFAULT_CHECKSUM_STORE_PATH)
+        # Without Kodi special:// paths are not translated.
+        if not store_FN.getPathTranslated():
+            return None
+        store_dir = FileName(store_FN.getDir(), isdir=True)
+        try:
+            if not store_dir.exists():
+                store_dir.makedirs()
+        except Exception:
+            logger.exception('misc_get_default_checksum_store() Cannot create "{}"'.format(store_dir.getPath()))
+            return None
+        default_checksum_store = misc_open_checksum_store(store_FN)
+        return default_checksum_store
+
+
+# Closes the default checksum store. It is opened again on next use.
+def misc_close_default_checksum_store():
+    global default_checksum_store, default_checksum_store_opened
+    with default_checksum_store_lock:
+        if default_checksum_store is not None:
+            default_checksum_store.close()
+        default_checksum_store = None
+        default_checksum_store_opened = False
+
+
+def misc_clear_checksum_memo():
+    with checksum_memo_lock:
+        checksum_memo.clear()
+
+
+# Returns the memoised or stored checksums of the files, keyed by path.
+def _misc_get_known_checksums(keys: typing.List[typing.Tuple[str, int, int]],
+                              store: ChecksumStore) -> typing.Dict[str, dict]:
+    known = {}
+    missing_keys = []
+    with checksum_memo_lock:
+        for key in keys:
+            checksums = checksum_memo.get(key)
+            if checksums is None:
+                missing_keys.append(key)
+                continue
+            checksum_memo.move_to_end(key)
+            known[key[0]] = dict(checksums)
+
+    if not missing_keys:
+        return known
+    if store is None:
+        store = misc_get_default_checksum_store()
+        if store is None:
+            return known
+
+    try:
+        stored = store.get_many(missing_keys)
+    except Exception:
+        logger.exception('_misc_get_known_checksums() Cannot read the checksum store')
+        return known
+    _misc_memoise_checksums({key: stored[key[0]] for key in missing_keys if key[0] in stored})
+    known.update({path: dict(checksums) for path, checksums in stored.items()})
+    return known
+
+def _misc_remember_checksums(entries: typing.Dict[typing.Tuple[str, int, int], dict], store: ChecksumStore):
+    if not entries:
+        return
+    _misc_memoise_checksums(entries)
+    if store is None:
+        store = misc_get_default_checksum_store()
+        if store is None:
+            return
+    try:
+        store.put_many(entries)
+    except Exception:
+        logger.exception('_misc_remember_checksums() Cannot write the checksum store')
+
+def _misc_memoise_checksums(entries: typing.Dict[typing.Tuple[str, int, int], dict]):
+    with checksum_memo_lock:
+        for key, checksums in entries.items():
+            checksum_memo[key] = checksums
+            checksum_memo.move_to_end(key)
+        while len(checksum_memo) > CHECKSUM_MEMO_MAX_ENTRIES:
+            checksum_memo.popitem(last=False)
+
+def _misc_compute_checksums(file_FN: FileName, size: int, parallel_hashes: bool) -> dict:
+    logger.debug('Computing checksums "{}"'.format(file_FN.getPath()))
+    try:
+        if parallel_hashes and size >= CHECKSUM_PARALLEL_MIN_SIZE and (os.cpu_count() or 1) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='akl_hash') as executor:
+                checksums = _misc_hash_buffers(_misc_read_checksum_buffers(file_FN, size), executor)
+        else:
+            checksums = _misc_hash_buffers(_misc_read_checksum_buffers(file_FN, size))
+    except Exception:
         logger.exception('Exception in plugin')
         logger.debug('(Exception) In misc_calculate_checksums()')
         logger.debug('Returning None')
         return None
-    checksums = {
-        'crc': crc_digest.upper(),
-        'md5': md5_digest.upper(),
-        'sha1': sha1_digest.upper(),
-        'size': size,
-    }
-
+    checksums['size'] = size
     return checksums
 
+# Yields the contents of a file in buffers of CHECKSUM_BUFFER_SIZE.
+# Local files are memory mapped, remote files are read with Kodi VFS.
+def _misc_read_checksum_buffers(file_FN: FileName, size: int):
+    if not file_FN.is_local:
+        file_handle = xbmcvfs.File(file_FN.getPathTranslated())
+        try:
+            while True:
+                buffer = file_handle.readBytes(CHECKSUM_BUFFER_SIZE)
+                if not buffer:
+                    break
+                yield buffer
+        finally:
+            file_handle.close()
+        return
+
+    with open(file_FN.getPathTranslated(), 'rb') as file_handle:
+        mapped_file = None
+        if size > 0:
+            try:
+                mapped_file = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError, OverflowError):
+                logger.debug('Cannot memory map "{}", reading buffers'.format(file_FN.getPath()))
+
+        if mapped_file is None:
+            yield from misc_read_file_in_chunks(file_handle, CHECKSUM_BUFFER_SIZE)
+            return
+
+        with mapped_file, memoryview(mapped_file) as view:
+            for offset in range(0, len(view), CHECKSUM_BUFFER_SIZE):
+                # Released before the next buffer, otherwise the mapping cannot be closed.
+                with view[offset:offset + CHECKSUM_BUFFER_SIZE] as buffer:
+                    yield buffer
+
+
+# Feeds the buffers to CRC32, MD5 and SHA1. With an executor CRC32 and MD5 are calculated
+# on the executor threads while SHA1 is calculated on the calling thread.
+def _misc_hash_buffers(buffers, executor: concurrent.futures.Executor = None) -> dict:
+    crc_prev = 0
+    md5 = hashlib.md5()
+    sha1 = hashlib.sha1()
+    for buffer in buffers:
+        if executor is None:
+            crc_prev = zlib.crc32(buffer, crc_prev)
+            md5.update(buffer)
+            sha1.update(buffer)
+            continue
+
+        crc_future = executor.submit(zlib.crc32, buffer, crc_prev)
+        md5_future = executor.submit(md5.update, buffer)
+        sha1.update(buffer)
+        md5_future.result()
+        crc_prev = crc_future.result()
+
+    return {
+        'crc': '{:08X}'.format(crc_prev & 0xFFFFFFFF),
+        'md5': md5.hexdigest().upper(),
+        'sha1': sha1.hexdigest().upper(),
+    }
+
 
 def misc_calculate_stream_checksums(file_bytes):
     logger.debug('Computing checksums of bytes stream...'.format(len(file_bytes)))
@@ -844,6 +1256,206 @@ def misc_calculate_stream_checksums(file_bytes):
     return checksums
 
 
+# Archives of which the checksums of the inner ROM file can be read.
+# 7z archives need the optional py7zr module.
+ARCHIVE_CHECKSUM_EXTENSIONS = ['.zip', '.7z']
+
+#
+# Returns the checksums of a ROM file inside a ZIP or 7z archive, as used by No-Intro and other
+# DAT files, or None in case of error. The CRC and size are read from the archive headers
+# without decompressing anything. MD5 and SHA1 need the inner file to be decompressed, which is
+# streamed in buffers when with_hashes is True.
+#
+# @param archive_FN: [FileName] ZIP or 7z archive.
+# @param inner_file_name: [str] Name of the file in the archive. Default the largest file.
+# @param with_hashes: [bool] Also calculate MD5 and SHA1 of the inner file.
+#
+def misc_calculate_archive_checksums(archive_FN: FileName, inner_file_name: str = None,
+                                     with_hashes: bool = False) -> dict:
+    extension = archive_FN.getExt().lower()
+    try:
+        if extension == '.zip':
+            return _misc_calculate_zip_checksums(archive_FN, inner_file_name, with_hashes)
+        if extension == '.7z':
+            if py7zr is None:
+                logger.warning('misc_calculate_archive_checksums() py7zr is not available for "{}"'.format(
+                    archive_FN.getPath()))
+                return None
+            return _misc_calculate_7z_checksums(archive_FN, inner_file_name, with_hashes)
+    except Exception:
+        logger.exception('misc_calculate_archive_checksums() Cannot read "{}"'.format(archive_FN.getPath()))
+        return None
+
+    logger.warning('misc_calculate_archive_checksums() Unsupported archive "{}"'.format(archive_FN.getPath()))
+    return None
+
+
+def _misc_calculate_zip_checksums(archive_FN: FileName, inner_file_name: str, with_hashes: bool) -> dict:
+    if archive_FN.is_local:
+        archive_file = open(archive_FN.getPathTranslated(), 'rb')
+    else:
+        archive_file = BufferedReader(_KodiVFSFileReader(archive_FN.getPathTranslated()), 64 * 1024)
+
+    # Only the central directory at the end of the file is read to list the files.
+    with archive_file, zipfile.ZipFile(archive_file) as archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        info = _misc_select_archive_file(infos, inner_file_name, lambda i: i.filename, lambda i: i.file_size)
+        if info is None:
+            logger.warning('No file "{}" in archive "{}"'.format(inner_file_name, archive_FN.getPath()))
+            return None
+
+        checksums = {
+            'crc': '{:08X}'.format(info.CRC & 0xFFFFFFFF),
+            'size': info.file_size,
+            'file': info.filename,
+        }
+        if with_hashes:
+            with archive.open(info) as inner_file:
+                hashes = _misc_hash_buffers(misc_read_file_in_chunks(inner_file, CHECKSUM_BUFFER_SIZE))
+            checksums['md5'] = hashes['md5']
+            checksums['sha1'] = hashes['sha1']
+    return checksums
+
+
+def _misc_calculate_7z_checksums(archive_FN: FileName, inner_file_name: str, with_hashes: bool) -> dict:
+    if not archive_FN.is_local:
+        logger.warning('7z checksums are only supported for local files "{}"'.format(archive_FN.getPath()))
+        return None
+
+    with py7zr.SevenZipFile(archive_FN.getPathTranslated(), mode='r') as archive:
+        infos = [info for info in archive.list() if not info.is_directory]
+        info = _misc_select_archive_file(infos, inner_file_name, lambda i: i.filename, lambda i: i.uncompressed)
+        if info is None or info.crc32 is None:
+            logger.warning('No file "{}" in archive "{}"'.format(inner_file_name, archive_FN.getPath()))
+            return None
+
+        checksums = {
+            'crc': '{:08X}'.format(info.crc32 & 0xFFFFFFFF),
+            'size': info.uncompressed,
+            'file': info.filename,
+        }
+        if with_hashes:
+            # The inner file is hashed while it is decompressed, nothing is written or kept in memory.
+            writer_factory = _ChecksumWriterFactory()
+            archive.extract(targets=[info.filename], factory=writer_factory)
+            writer = writer_factory.writers.get(info.filename)
+            if writer is None:
+                logger.warning('Cannot extract "{}" from archive "{}"'.format(info.filename, archive_FN.getPath()))
+                return None
+            hashes = writer.get_checksums()
+            checksums['md5'] = hashes['md5']
+            checksums['sha1'] = hashes['sha1']
+    return checksums
+
+
+# Writer of py7zr which calculates the checksums of the data written to it.
+class _ChecksumWriter(object):
+    def __init__(self):
+        self.crc_prev = 0
+        self.md5 = hashlib.md5()
+        self.sha1 = hashlib.sha1()
+        self.num_bytes = 0
+
+    def write(self, buffer) -> int:
+        self.crc_prev = zlib.crc32(buffer, self.crc_prev)
+        self.md5.update(buffer)
+        self.sha1.update(buffer)
+        self.num_bytes += len(buffer)
+        return len(buffer)
+
+    def read(self, size: int = None) -> bytes:
+        return b''
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        return 0
+
+    def flush(self):
+        pass
+
+    def size(self) -> int:
+        return self.num_bytes
+
+    def close(self):
+        pass
+
+    def get_checksums(self) -> dict:
+        return {
+            'crc': '{:08X}'.format(self.crc_prev & 0xFFFFFFFF),
+            'md5': self.md5.hexdigest().upper(),
+            'sha1': self.sha1.hexdigest().upper(),
+        }
+
+
+# Factory of py7zr extract() which hashes the extracted files instead of writing them.
+class _ChecksumWriterFactory(object):
+    def __init__(self):
+        self.writers: typing.Dict[str, _ChecksumWriter] = {}
+
+    def create(self, filename: str) -> _ChecksumWriter:
+        writer = _ChecksumWriter()
+        self.writers[filename] = writer
+        return writer
+
+
+# Returns the file with the given name (case insensitive) or the largest file if no name is given.
+def _misc_select_archive_file(infos: list, inner_file_name: str, get_name, get_size):
+    if inner_file_name is None:
+        return max(infos, key=get_size, default=None)
+    inner_file_name = inner_file_name.lower()
+    return next((info for info in infos if get_name(info).lower() == inner_file_name), None)
+
+
+# Seekable binary reader of a Kodi VFS file, so remote archives are read with random access
+# instead of being copied.
+class _KodiVFSFileReader(RawIOBase):
+    def __init__(self, path: str):
+        self.file_handle = xbmcvfs.File(path)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.file_handle.readBytes(len(buffer))
+        num_bytes = len(data)
+        buffer[:num_bytes] = data
+        self.position += num_bytes
+        return num_bytes
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        self.position = self.file_handle.seek(offset, whence)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def close(self):
+        if not self.closed:
+            self.file_handle.close()
+        super().close()
+
+
+# Returns a tuple with the size in bytes and the modification time of a file.
+# Works with both the Python stat result of local files and the Kodi VFS stat of remote files.
+def misc_get_size_and_mtime(file_FN: FileName) -> typing.Tuple[int, float]:
+    stat_info = file_FN.stat()
+    if file_FN.is_local:
+        return stat_info.st_size, stat_info.st_mtime
+    return stat_info.st_size(), stat_info.st_mtime()
+
+
+# Same as misc_get_size_and_mtime() with the modification time in nanoseconds.
+# Kodi VFS only reports whole seconds.
+def misc_get_size_and_mtime_ns(file_FN: FileName) -> typing.Tuple[int, int]:
+    stat_info = file_FN.stat()
+    if file_FN.is_local:
+        return stat_info.st_size, stat_info.st_mtime_ns
+    return stat_info.st_size(), int(stat_info.st_mtime()) * 1000000000
+
+
 #
 # Lazy function (generator) to read a file piece by piece. Default chunk size: 8k.
 #
@@ -910,15 +1522,20 @@ def misc_identify_image_id_by_contents(fpath: FileName):
     if statinfo.st_size < 64: return IMAGE_CORRUPT_ID
 
     # Read first 64 bytes of file.
-    # Search for the magic number of the beginning of the file.
     with open(fpath.getPath(), "rb") as f:
         file_bytes = f.read(64)
+    return misc_identify_image_id_by_bytes(file_bytes)
+
+# Determines the image type of the first (at least 64) bytes of an image, e.g. the first
+# chunk of a download. Returns an image id defined in list IMAGE_IDS, IMAGE_UKNOWN_ID or
+# IMAGE_CORRUPT_ID if there are less than 64 bytes.
+def misc_identify_image_id_by_bytes(file_bytes: bytes):
+    if len(file_bytes) < 64: return IMAGE_CORRUPT_ID
+
+    # Search for the magic number of the beginning of the file.
     for img_id in IMAGE_MAGIC_DIC:
         for magic_bytes in IMAGE_MAGIC_DIC[img_id]:
-            magic_bytes_len = len(magic_bytes)
-            file_chunk = file_bytes[0:magic_bytes_len]
-            if len(file_chunk) != magic_bytes_len: raise TypeError
-            if file_chunk == magic_bytes: return img_id
+            if file_bytes.startswith(magic_bytes): return img_id
 
     return IMAGE_UKNOWN_ID
 
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: JSON encoding and decoding
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# --- Module documentation ---
+# Uses orjson or ujson when one of them is installed, otherwise the Python standard library.
+# The accelerated libraries are used for decoding and for compact encoding (no indentation,
+# machine-only files and payloads). Indented (human readable) JSON is always encoded with the
+# standard library so the formatting does not depend on the installed libraries.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+
+import json
+import logging
+import typing
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    BACKEND = 'orjson'
+except ImportError:
+    orjson = None
+    try:
+        import ujson
+        BACKEND = 'ujson'
+    except ImportError:
+        ujson = None
+        BACKEND = 'json'
+
+COMPACT_SEPARATORS = (',', ':')
+
+
+# Decodes a JSON document.
+# Raises ValueError if the document is not valid JSON.
+def loads(data: typing.Union[str, bytes]) -> typing.Any:
+    if BACKEND == 'orjson':
+        return orjson.loads(data)
+    if BACKEND == 'ujson':
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+# Encodes an object as a JSON string.
+# Without indentation the output is compact and encoded with the fastest available library.
+#
+# @param obj: Object to encode.
+# @param indent: [int] Indentation for human readable files. None for compact output.
+# @param sort_keys: [bool] Sort the keys of dictionaries.
+# @param separators: [tuple] Item and key separators of indented output.
+# @param ensure_ascii: [bool] Escape all non-ASCII characters.
+def dumps(obj: typing.Any,
+          indent: int = None,
+          sort_keys: bool = False,
+          separators: typing.Tuple[str, str] = COMPACT_SEPARATORS,
+          ensure_ascii: bool = False) -> str:
+    if indent is None and separators == COMPACT_SEPARATORS:
+        if BACKEND == 'orjson' and not ensure_ascii:
+            option = orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, option=option).decode('utf-8')
+            except TypeError:
+                # Types orjson does not support (for example integers over 64 bits).
+                pass
+        elif BACKEND == 'ujson':
+            return ujson.dumps(obj, ensure_ascii=ensure_ascii, sort_keys=sort_keys, escape_forward_slashes=False)
+
+    return json.dumps(obj, indent=indent, sort_keys=sort_keys, separators=separators, ensure_ascii=ensure_ascii)
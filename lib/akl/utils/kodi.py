@@ -8,6 +8,9 @@ import collections
 import os
 import sys
 import shutil
+import threading
+import queue
+import concurrent.futures
 from urllib.parse import urlencode
 
 import xbmc
@@ -500,6 +503,11 @@ class ProgressDialog(object):
         self.progress = 0
         self.progress_step = 0
 
+    # Changes the number of steps and keeps the current step, for work of which the total is
+    # only known while it progresses.
+    def updateNumSteps(self, num_steps):
+        self.num_steps = num_steps
+
     def incrementStep(self, message=None):
         self.updateProgress(self.progress_step + 1, message)
         
@@ -559,6 +567,67 @@ class ProgressDialog(object):
         self.dialog_active = True
 
 
+# -------------------------------------------------------------------------------------------------
+# Kodi GUI calls from worker threads
+# -------------------------------------------------------------------------------------------------
+# Dialogs and the progress dialog must only be used from the thread that created them.
+# Worker threads (for example when scraping ROMs concurrently) use this dispatcher to execute
+# GUI calls on the owner thread. The owner thread must call process_pending() regularly while
+# the workers are running, otherwise the workers will block.
+class MainThreadDispatcher(object):
+    def __init__(self):
+        self.owner_thread = threading.current_thread()
+        self.pending_calls = queue.Queue()
+
+    def is_owner_thread(self) -> bool:
+        return threading.current_thread() is self.owner_thread
+
+    # Executes the function on the owner thread and returns the result.
+    # When called from a worker thread it blocks until the owner thread executed the call.
+    def call(self, func, *args, **kwargs):
+        if self.is_owner_thread():
+            return func(*args, **kwargs)
+        future = concurrent.futures.Future()
+        self.pending_calls.put((future, func, args, kwargs))
+        return future.result()
+
+    # Executes all queued calls. Waits at most timeout seconds for the first call to arrive.
+    # Returns the number of executed calls.
+    def process_pending(self, timeout: float = 0) -> int:
+        num_calls = 0
+        block = timeout > 0
+        while True:
+            try:
+                future, func, args, kwargs = self.pending_calls.get(block=block, timeout=timeout if block else None)
+            except queue.Empty:
+                return num_calls
+            block = False
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as ex:
+                future.set_exception(ex)
+            num_calls += 1
+
+    # Returns a proxy of the given object which executes all method calls on the owner thread.
+    def wrap(self, obj):
+        return MainThreadProxy(self, obj)
+
+
+class MainThreadProxy(object):
+    def __init__(self, dispatcher: MainThreadDispatcher, wrapped_obj):
+        self.dispatcher = dispatcher
+        self.wrapped_obj = wrapped_obj
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped_obj, name)
+        if not callable(attr):
+            return attr
+
+        def dispatched_call(*args, **kwargs):
+            return self.dispatcher.call(attr, *args, **kwargs)
+        return dispatched_call
+
+
 # -------------------------------------------------------------------------------------------------
 # Kodi Wizards (by Chrisism)
 # -------------------------------------------------------------------------------------------------
@@ -21,15 +21,29 @@ from __future__ import division
 
 import typing
 
+import codecs
+import collections
+import email.utils
+import gzip
+import hashlib
+import json
 import logging
+import os
 import random
+import threading
+import time
+from datetime import datetime, timezone
 from enum import Enum
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
 from urllib.error import HTTPError
+from urllib.parse import urlparse
 
 # AKL modules
-from akl.utils import io
+from akl.utils import io, jsoncodec
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +53,62 @@ logger = logging.getLogger(__name__)
 # USER_AGENT = 'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:54.0) Gecko/20100101 Firefox/68.0'
 USER_AGENT = 'Mozilla/5.0 (X11; Linux i586; rv:31.0) Gecko/20100101 Firefox/68.0'
 
+# --- Pooled HTTP sessions ---
+# Maximum number of connections kept alive per host.
+HTTP_POOL_SIZE = 10
+# Retries on connection errors and on the status codes below. POST requests are only
+# retried on connection errors. Waits backoff_factor * (2 ^ retry) seconds between retries.
+# Retry-After headers are ignored here, HTTP 429 responses are handled by get_URL() with the
+# rate limiter of the host. Requests of get_URL_with_retry() use sessions without these retries.
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUS_CODES = [500, 502, 503, 504]
+
+# Size of the chunks written to disk while streaming downloads.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Size of the chunks read while parsing streamed JSON responses.
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+# Compression level of gzip compressed POST bodies. Low levels are fast and compress JSON well.
+POST_COMPRESS_LEVEL = 5
+
+http_sessions = {}
+http_sessions_lock = threading.Lock()
+
+# --- Rate limiting ---
+# Rate limiters keyed by host, see configure_rate_limit().
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+# Back off time when a HTTP 429 response has no valid Retry-After header.
+RATE_LIMIT_DEFAULT_BACKOFF = 5.0
+RATE_LIMIT_MAX_BACKOFF = 300.0
+# Number of times a request is repeated after a HTTP 429 response.
+RATE_LIMIT_RETRIES = 2
+
+# Status code returned by get_URL() when the request failed in the client, for example when the
+# response cannot be decoded. It is not a HTTP status code and it is never retried.
+# Network errors (no response) return None.
+HTTP_CLIENT_ERROR = 0
+
+# --- Retries and circuit breakers of get_URL_with_retry() ---
+# Number of times a failed request is repeated. Waits a random time up to
+# RETRY_BASE_DELAY * (2 ^ retry) seconds, at most RETRY_MAX_DELAY, between retries.
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# The circuit of a host opens after this number of failures in a row. Requests to an open
+# circuit fail immediately until the recovery time has passed, then a single trial request is
+# done (half-open) which closes the circuit again when it succeeds.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RECOVERY_TIME = 60.0
+
+# Circuit breakers keyed by host.
+circuit_breakers = {}
+circuit_breakers_lock = threading.Lock()
+
+# --- HTTP response cache ---
+# Default maximum size of the on-disk HTTP response cache.
+HTTP_CACHE_MAX_SIZE = 200 * 1024 * 1024
+
 
 class ContentType(Enum):
     RAW = 0
@@ -97,23 +167,127 @@ def get_random_UserAgent():
         return 'Mozilla/5.0 (compatible; MSIE ' + version + '; ' + os_str + '; ' + token + 'Trident/' + engine + ')'
 
 
-def download_img(img_url, file_path: io.FileName):
-    # --- Download image to a buffer in memory ---
-    # If an exception happens here no file is created (avoid creating files with 0 bytes).
-    file_data, http_code = get_URL(img_url, verify_ssl=False, content_type=ContentType.BYTES)
-    if http_code != 200:
-        return
-    
-    # --- Write image file to disk ---
-    # There should be no more 0 size files with this code.
+# Downloads an image (or any other asset file) into the given file.
+# The response is streamed in chunks to a temporary file, so large files (fanart, trailers,
+# manuals) are never kept in memory. The temporary file is renamed into place only when the
+# download is complete, so an existing file is never replaced with a partial or invalid download.
+# When the target has an image extension the magic numbers of the first bytes are checked,
+# which rejects error pages that are returned with status code 200.
+#
+# @param img_url: [string] URL of the image.
+# @param file_path: [FileName] Target file.
+# @param session: [requests.Session] Optional session. Uses the pooled session of the host if None.
+# @param max_size: [int] Optional maximum size in bytes. Larger downloads are aborted.
+# @param http_cache: [HTTPCache] Optional cache to revalidate files downloaded before.
+# @return: [bool] True if the image was downloaded and written.
+def download_img(img_url, file_path: io.FileName, session: requests.Session = None, max_size: int = None,
+                 http_cache: 'HTTPCache' = None) -> bool:
+    if session is None:
+        session = get_http_session(img_url)
+
+    # Only revalidate files that are still on disk. A 304 response keeps the existing file.
+    cache = http_cache
+    headers = {"User-Agent": USER_AGENT}
+    validators = {}
+    if cache is not None:
+        if file_path.exists():
+            validators = cache.get_validators(img_url, with_content=False)
+        else:
+            cache.record_miss()
+    headers.update(validators)
+
+    check_magic_numbers = io.misc_identify_image_id_by_ext(file_path) != io.IMAGE_UKNOWN_ID
+    temp_file_path = io.FileName(file_path.getPath() + '.tmp')
+    success = False
+    response = None
+    f = None
     try:
-        f = file_path.open('wb')
-        f.write(file_data)
+        response = _get_with_rate_limit(
+            session,
+            img_url,
+            headers=headers,
+            timeout=120,
+            verify=False,
+            stream=True)
+        if response.status_code == 304 and validators:
+            logger.debug('download_img() Not modified, keeping local file')
+            cache.record_hit(img_url)
+            return True
+        if validators:
+            cache.record_miss()
+        if response.status_code != 200:
+            logger.debug(f'download_img() HTTP status code {response.status_code}')
+            return False
+
+        content_length = int(response.headers.get("content-length", "0") or 0)
+        if max_size and content_length > max_size:
+            logger.warning(f'download_img() Download of {content_length:,} bytes exceeds maximum of {max_size:,} bytes')
+            return False
+
+        f = temp_file_path.open('wb')
+        file_header = b''
+        num_bytes = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if not chunk:
+                continue
+            num_bytes += len(chunk)
+            if max_size and num_bytes > max_size:
+                logger.warning(f'download_img() Download exceeds maximum of {max_size:,} bytes')
+                return False
+            if check_magic_numbers and file_header is not None:
+                file_header += chunk[:64]
+                if len(file_header) >= 64:
+                    if not _is_valid_image_header(file_header):
+                        return False
+                    file_header = None
+            f.write(chunk)
+
+        if num_bytes == 0:
+            return False
+        if check_magic_numbers and file_header is not None and not _is_valid_image_header(file_header):
+            return False
+
         f.close()
+        f = None
+        temp_file_path.rename(file_path)
+        success = True
+        if cache is not None:
+            cache.store(img_url, response.headers)
     except IOError:
         logger.exception('(IOError) In download_img(), disk code.')
     except Exception:
-        logger.exception('(Exception) In download_img(), disk code.')
+        logger.exception('(Exception) In download_img()')
+    finally:
+        if f is not None:
+            f.close()
+        if response is not None:
+            response.close()
+        if not success and temp_file_path.exists():
+            temp_file_path.unlink()
+    return success
+
+
+# GET request within the rate limit of the host. After a HTTP 429 (Too Many Requests) response
+# the host is backed off and the request is repeated, at most RATE_LIMIT_RETRIES times.
+def _get_with_rate_limit(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    limiter = get_rate_limiter(url)
+    for retry in range(RATE_LIMIT_RETRIES + 1):
+        if limiter is not None:
+            limiter.acquire()
+        response: requests.Response = session.get(url, **kwargs)
+        if response.status_code != 429 or retry == RATE_LIMIT_RETRIES:
+            break
+        limiter = _back_off_host(url, response)
+        response.close()
+    return response
+
+
+def _is_valid_image_header(file_header: bytes) -> bool:
+    img_id = io.misc_identify_image_id_by_bytes(file_header)
+    if img_id in (io.IMAGE_UKNOWN_ID, io.IMAGE_CORRUPT_ID):
+        logger.warning(f'download_img() Downloaded data is not a valid image ({img_id})')
+        return False
+    return True
 
 #
 # User agent is fixed and defined in global var USER_AGENT
@@ -125,13 +299,15 @@ def download_img(img_url, file_path: io.FileName):
 # @param cert: [tuple(str,str)] Client side certificates. Tuple with paths to cert and key file. None if not used.
 # @param encoding: [string] If you want to override auto encoding, provide with preferred encoding.
 # @param content_type: [ContentType Enum] Define what kind of type will be returned (bytes, string, json, any).
+# @param http_cache: [HTTPCache] Optional cache. Cached responses are revalidated with conditional requests.
 # @return: [tuple] Tuple of content and code. First tuple element is a string, bytes or json object with the 
 #          web content or None if network error/exception. Second tuple element is the 
 #          HTTP status code as integer or None if network error/exception.
 def get_URL(url:str, url_log:str = None, headers:dict = None, 
             verify_ssl=None, cert=None, encoding=None, 
             content_type:ContentType=ContentType.STRING,
-            session: requests.Session = None) -> typing.Union[typing.Tuple[str,int],typing.Tuple[any,int]]:
+            session: requests.Session = None,
+            http_cache: 'HTTPCache' = None) -> typing.Union[typing.Tuple[str,int],typing.Tuple[any,int]]:
     try:
         if url_log is None:
             logger.debug(f'get_URL() GET URL "{url}"')
@@ -143,14 +319,34 @@ def get_URL(url:str, url_log:str = None, headers:dict = None,
         headers["User-Agent"] = USER_AGENT
 
         if session is None:
-            session = requests.Session()
+            session = get_http_session(url)
+
+        # Raw responses are streamed by the caller and never cached.
+        cache = http_cache if content_type != ContentType.RAW else None
+        request_headers = headers
+        validators = {}
+        if cache is not None:
+            validators = cache.get_validators(url)
+            request_headers = {**headers, **validators}
 
-        response: requests.Response = session.get(
+        response: requests.Response = _get_with_rate_limit(
+            session,
             url,
-            headers=headers, 
+            headers=request_headers, 
             timeout=120, 
             verify=verify_ssl,
             cert=cert)
+
+        if response.status_code == 304 and validators:
+            cached_content = cache.get_content(url)
+            if cached_content is not None:
+                logger.debug('get_URL() Not modified, using cached response')
+                content, cached_encoding = cached_content
+                return _decode_content(content, encoding or cached_encoding, content_type), 200
+            # Evicted in the meantime, request again without validators.
+            response = session.get(url, headers=headers, timeout=120, verify=verify_ssl, cert=cert)
+        if validators:
+            cache.record_miss()
         
         logger.debug(f'get_URL() encoding {response.encoding}')
         if encoding is not None:
@@ -158,6 +354,9 @@ def get_URL(url:str, url_log:str = None, headers:dict = None,
             logger.debug(f'get_URL() encoding override with {response.encoding}')
 
         http_code = response.status_code
+        if cache is not None and http_code == 200:
+            cache.store(url, response.headers, response.content, response.encoding)
+
         if content_type == ContentType.BYTES:
             page_data = response.content
         elif content_type == ContentType.RAW:
@@ -165,7 +364,7 @@ def get_URL(url:str, url_log:str = None, headers:dict = None,
         elif content_type == ContentType.STRING:
             page_data = response.text
         elif content_type == ContentType.JSON:
-            page_data = response.json()
+            page_data = _decode_JSON_response(response)
        
         logger.debug('get_URL() content-length {:,} bytes'.format(int(response.headers.get("content-length", "0"))))
         logger.debug(f'get_URL() HTTP status code {http_code}')
@@ -181,9 +380,28 @@ def get_URL(url:str, url_log:str = None, headers:dict = None,
         logger.exception('(HTTPError) In net_get_URL()')
         logger.error(f'(HTTPError) Code {http_code}')
         return page_data, http_code
+    except requests.exceptions.RequestException:
+        logger.exception('(RequestException) In net_get_URL()')
+        return None, None
     except Exception as ex:
+        # For example a response which is not valid JSON. Repeating the request does not help.
         logger.exception('(Exception) In net_get_URL()')
-        return None, 500
+        return None, HTTP_CLIENT_ERROR
+
+def _decode_content(content: bytes, encoding: str, content_type: ContentType):
+    if content_type == ContentType.BYTES:
+        return content
+    text = content.decode(encoding if encoding else 'utf-8', errors='replace')
+    if content_type == ContentType.JSON:
+        return jsoncodec.loads(text)
+    return text
+
+# UTF-8 responses are decoded from the raw bytes, which avoids decoding the text first.
+def _decode_JSON_response(response: requests.Response) -> any:
+    encoding = response.encoding.lower().replace('-', '') if response.encoding else None
+    if encoding is None or encoding == 'utf8':
+        return jsoncodec.loads(response.content)
+    return jsoncodec.loads(response.text)
 
 def get_URL_oneline(url, url_log = None):
     page_data, http_code = get_URL(url, url_log)
@@ -200,6 +418,180 @@ def get_URL_as_json(url, url_log = None, headers:dict = None, verify_ssl=None, e
                                     encoding=encoding, content_type = ContentType.JSON)
     return page_data
 
+# Do HTTP request with GET like get_URL(), retrying transient failures (no response or HTTP 5xx)
+# with exponential backoff and jitter. Every host has a circuit breaker, so requests to a broken
+# API fail immediately instead of being retried.
+# This is the only retry layer of these failures, the pooled session of the request does not
+# retry. HTTP 429 responses are retried by get_URL() only.
+#
+# @param retries: [int] Number of retries. Default RETRY_ATTEMPTS.
+# @return: [tuple] Same as get_URL(). The HTTP status code is None when the circuit of the
+#          host is open and no request was done.
+def get_URL_with_retry(url: str, url_log: str = None, headers: dict = None,
+                       verify_ssl=None, cert=None, encoding=None,
+                       content_type: ContentType = ContentType.STRING,
+                       session: requests.Session = None,
+                       retries: int = None,
+                       http_cache: 'HTTPCache' = None) -> typing.Tuple[any, typing.Optional[int]]:
+    breaker = get_circuit_breaker(url)
+    if retries is None:
+        retries = RETRY_ATTEMPTS
+    if session is None:
+        session = get_http_session(url, retries=False)
+
+    page_data, http_code = None, None
+    for attempt in range(retries + 1):
+        if not breaker.allow_request():
+            logger.warning(f'get_URL_with_retry() Circuit of "{breaker.endpoint}" is open, request skipped')
+            return page_data, http_code
+
+        page_data, http_code = get_URL(url, url_log, headers=headers,
+                                       verify_ssl=verify_ssl, cert=cert, encoding=encoding,
+                                       content_type=content_type, session=session, http_cache=http_cache)
+        if not _is_transient_failure(http_code):
+            breaker.record_success()
+            return page_data, http_code
+
+        breaker.record_failure()
+        if attempt < retries:
+            delay = get_backoff_delay(attempt)
+            logger.warning(f'get_URL_with_retry() HTTP status {http_code}, retry {attempt + 1} in {delay:.1f} seconds')
+            time.sleep(delay)
+
+    return page_data, http_code
+
+
+# Exponential backoff with full jitter. Random waits keep concurrent workers from retrying at
+# the same moment.
+def get_backoff_delay(attempt: int) -> float:
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _is_transient_failure(http_code: typing.Optional[int]) -> bool:
+    return http_code is None or http_code >= 500
+
+# Do HTTP request with GET and yield the elements of the JSON array in the response while it is
+# downloaded. Only the elements in the current chunk are kept in memory, not the whole response.
+# Unlike get_URL() errors are raised, so a failed request cannot be mistaken for an empty array.
+# Responses are not cached.
+#
+# @param url: [string] URL to open
+# @param url_log: [string] If not None this URL will be used in the logs.
+# @param headers: [Dict(string,string)] Optional collection of custom headers to add.
+# @param verify_ssl: [bool|string] Set to False to ignore SSL verification, or path to certificates to use.
+# @param chunk_size: [int] Number of bytes read from the socket at once.
+# @raise requests.RequestException: The request failed or the HTTP status code is an error.
+# @raise ValueError: The response is not a valid JSON array.
+def get_URL_as_json_array_stream(url: str, url_log: str = None, headers: dict = None, verify_ssl=None,
+                                 session: requests.Session = None,
+                                 chunk_size: int = JSON_STREAM_CHUNK_SIZE) -> typing.Iterator[any]:
+    logger.debug(f'get_URL_as_json_array_stream() GET URL "{url_log if url_log else url}"')
+    if headers is None:
+        headers = {}
+    headers["User-Agent"] = USER_AGENT
+    if session is None:
+        session = get_http_session(url)
+
+    response: requests.Response = session.get(url, headers=headers, timeout=120, verify=verify_ssl, stream=True)
+    try:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        parser = JSONArrayStreamParser()
+        num_elements = 0
+        for chunk in response.iter_content(chunk_size):
+            for element in parser.feed(decoder.decode(chunk)):
+                num_elements += 1
+                yield element
+        for element in parser.feed(decoder.decode(b'', final=True), final=True):
+            num_elements += 1
+            yield element
+        logger.debug(f'get_URL_as_json_array_stream() {num_elements} elements')
+    finally:
+        response.close()
+
+#
+# Incremental parser of a JSON array. Text is fed in pieces as it arrives and every complete
+# element is returned as soon as it is available. Elements are decoded with the standard library
+# decoder, the parser only finds where the elements start and checks the separators.
+#
+class JSONArrayStreamParser(object):
+    WHITESPACE = ' \t\n\r'
+
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.is_started = False
+        self.is_finished = False
+        self.expect_element = True
+        self.num_elements = 0
+
+    # Adds text to the parser and returns the elements completed by it.
+    # @param final: [bool] No more text follows, the array must be complete.
+    def feed(self, text: str, final: bool = False) -> typing.List[any]:
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        elements = []
+        while not self.is_finished and self._parse_next(elements, final):
+            pass
+
+        if self.is_finished:
+            if self.buffer[self.position:].strip(JSONArrayStreamParser.WHITESPACE):
+                raise ValueError('Unexpected data after the JSON array')
+            self.buffer = ''
+            self.position = 0
+        elif final:
+            raise ValueError('Incomplete JSON array')
+        return elements
+
+    # Parses the next token. Returns False when more text is needed.
+    def _parse_next(self, elements: list, final: bool) -> bool:
+        position = self.position
+        while position < len(self.buffer) and self.buffer[position] in JSONArrayStreamParser.WHITESPACE:
+            position += 1
+        self.position = position
+        if position >= len(self.buffer):
+            return False
+
+        character = self.buffer[position]
+        if not self.is_started:
+            if character != '[':
+                raise ValueError('JSON response is not an array')
+            self.is_started = True
+            self.position += 1
+            return True
+
+        if character == ']':
+            if self.expect_element and self.num_elements > 0:
+                raise ValueError('Invalid JSON array, trailing ","')
+            self.is_finished = True
+            self.position += 1
+            return True
+
+        if not self.expect_element:
+            if character != ',':
+                raise ValueError('Invalid JSON array, expected "," at position {}'.format(position))
+            self.expect_element = True
+            self.position += 1
+            return True
+
+        try:
+            element, end = self.decoder.raw_decode(self.buffer, position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False
+
+        # A number at the end of the text may continue in the next piece of text.
+        if end >= len(self.buffer) and not final:
+            return False
+
+        elements.append(element)
+        self.num_elements += 1
+        self.expect_element = False
+        self.position = end
+        return True
+
 # Do HTTP request with POST.
 # If an exception happens return empty data (None).
 #
@@ -222,7 +614,7 @@ def post_URL(url:str, data:dict, headers:dict = None, verify_ssl=None,
         headers["User-Agent"] = USER_AGENT
 
         if session is None:
-            session = requests.Session()
+            session = get_http_session(url)
 
         response:requests.Response = session.post(
             url,
@@ -245,7 +637,7 @@ def post_URL(url:str, data:dict, headers:dict = None, verify_ssl=None,
         elif content_type == ContentType.STRING:
             page_data = response.text
         elif content_type == ContentType.JSON:
-            page_data = response.json()
+            page_data = _decode_JSON_response(response)
 
         logger.debug('post_URL() content-length {:,} bytes'.format(int(response.headers.get("content-length", "0"))))
         logger.debug(f"post_URL() HTTP status code {http_code}")
@@ -279,21 +671,35 @@ def post_URL(url:str, data:dict, headers:dict = None, verify_ssl=None,
 # @param cert: [tuple(str,str)] Client side certificates. Tuple with paths to cert and key file. None if not used.
 # @param encoding: [string] If you want to override auto encoding, provide with preferred encoding.
 # @param content_type: [ContentType Enum] Define what kind of type will be returned (bytes, string, json, any).
+# @param session: [requests.Session] Optional session. Uses the pooled session of the host if None.
+# @param compress: [bool] Send the JSON gzip compressed (Content-Encoding: gzip).
 # @return: [tuple] Tuple of strings. First tuple element is a string with the web content as 
 #          a Unicode string or None if network error/exception. Second tuple element is the 
 #          HTTP status code as integer or hardcoded 500 if network error/exception.
 def post_JSON_URL(url, json_obj: any, headers:dict = None, 
                 verify_ssl=None, cert=None, encoding=None, 
-                content_type:ContentType=ContentType.STRING) -> typing.Union[typing.Tuple[str, int],typing.Tuple[any, int]]:
+                content_type:ContentType=ContentType.STRING,
+                session: requests.Session = None,
+                compress: bool = False) -> typing.Union[typing.Tuple[str, int],typing.Tuple[any, int]]:
     try:
         logger.debug(f"post_JSON_URL() POST URL '{url}'")
         if headers is None:
             headers = {}
         headers["User-Agent"] = USER_AGENT
 
-        response: requests.Response = requests.post(
+        headers["Content-Type"] = "application/json"
+
+        body = jsoncodec.dumps(json_obj).encode('utf-8')
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+            body = gzip.compress(body, compresslevel=POST_COMPRESS_LEVEL)
+
+        if session is None:
+            session = get_http_session(url)
+
+        response: requests.Response = session.post(
             url,
-            json=json_obj,
+            data=body,
             headers=headers, 
             timeout=120, 
             verify=verify_ssl,
@@ -312,7 +718,7 @@ def post_JSON_URL(url, json_obj: any, headers:dict = None,
         elif content_type == ContentType.STRING:
             page_data = response.text
         elif content_type == ContentType.JSON:
-            page_data = response.json()
+            page_data = _decode_JSON_response(response)
        
         logger.debug('post_JSON_URL() content-length {:,} bytes'.format(int(response.headers.get("content-length", "0"))))
         logger.debug(f"post_JSON_URL() HTTP status code {http_code}")
@@ -328,6 +734,13 @@ def post_JSON_URL(url, json_obj: any, headers:dict = None,
         logger.exception('(HTTPError) In post_JSON_URL()')
         logger.error(f'(HTTPError) Code {http_code}')
         return page_bytes, http_code
+    except requests.exceptions.RequestException as ex:
+        # Without a connection the request was not sent, the caller can safely send it again.
+        if is_connection_failure(ex):
+            logger.error(f'(ConnectionError) In post_JSON_URL() "{ex}"')
+            return None, None
+        logger.exception('(RequestException) In post_JSON_URL()')
+        return None, 500
     except IOError:
         logger.exception('(IOError exception) In post_JSON_URL()')
         return None, 500
@@ -336,5 +749,504 @@ def post_JSON_URL(url, json_obj: any, headers:dict = None,
         return None, 500
 
 
-def start_http_session():
-    return requests.Session()
+# Returns True if the request failed because no connection could be made, so it was not sent.
+# Errors after the request was sent (for example read timeouts) return False.
+def is_connection_failure(ex: Exception) -> bool:
+    if isinstance(ex, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(ex, requests.exceptions.ConnectionError) or not ex.args:
+        return False
+    # requests wraps the urllib3 error, or the MaxRetryError with the last urllib3 error.
+    reason = getattr(ex.args[0], 'reason', ex.args[0])
+    return isinstance(reason, ConnectTimeoutError)
+
+
+# Creates a new session with keep-alive connection pooling and optionally automatic retries.
+def start_http_session(retries: bool = True) -> requests.Session:
+    max_retries = Retry(
+        total=HTTP_RETRIES if retries else 0,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUS_CODES,
+        respect_retry_after_header=False,
+        raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=max_retries)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Returns the pooled session for the host of the URL. The session is created on first use and
+# shared by all following requests (and threads) to the same host, so connections and TLS
+# handshakes are reused.
+# @param retries: [bool] Retry connection errors and server errors. Callers with their own
+#                 retries use a session without them.
+def get_http_session(url: str, retries: bool = True) -> requests.Session:
+    host = urlparse(url).netloc.lower()
+    with http_sessions_lock:
+        session = http_sessions.get((host, retries))
+        if session is None:
+            logger.debug(f'get_http_session() New pooled session for host "{host}"')
+            session = start_http_session(retries)
+            http_sessions[(host, retries)] = session
+    return session
+
+
+# Returns the circuit breaker of the host of the URL. Paths often contain IDs, so breakers per
+# path would never see enough failures in a row to open.
+def get_circuit_breaker(url: str) -> 'CircuitBreaker':
+    endpoint = urlparse(url).netloc.lower()
+    with circuit_breakers_lock:
+        breaker = circuit_breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIME)
+            circuit_breakers[endpoint] = breaker
+    return breaker
+
+
+# Returns the statistics of all circuit breakers keyed by host.
+def get_circuit_breaker_stats() -> typing.Dict[str, dict]:
+    with circuit_breakers_lock:
+        breakers = dict(circuit_breakers)
+    return {endpoint: breaker.get_stats() for endpoint, breaker in breakers.items()}
+
+
+def clear_circuit_breakers():
+    with circuit_breakers_lock:
+        circuit_breakers.clear()
+
+
+#
+# Circuit breaker of an endpoint. Closed: requests are done. Open: after failure_threshold
+# failures in a row no requests are done for recovery_time seconds. Half-open: after the
+# recovery time one trial request is done, its result closes or opens the circuit again.
+#
+class CircuitBreaker(object):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, endpoint: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_time: float = CIRCUIT_RECOVERY_TIME):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.lock = threading.Lock()
+        self.state = CircuitBreaker.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_progress = False
+
+        self.num_requests = 0
+        self.num_failures = 0
+        self.num_rejected = 0
+        self.num_opened = 0
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == CircuitBreaker.OPEN and time.monotonic() - self.opened_at >= self.recovery_time:
+                logger.info(f'CircuitBreaker "{self.endpoint}" half-open, trying a request')
+                self.state = CircuitBreaker.HALF_OPEN
+                self.trial_in_progress = False
+
+            if self.state == CircuitBreaker.CLOSED:
+                self.num_requests += 1
+                return True
+            if self.state == CircuitBreaker.HALF_OPEN and not self.trial_in_progress:
+                self.trial_in_progress = True
+                self.num_requests += 1
+                return True
+            self.num_rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CircuitBreaker.CLOSED:
+                logger.info(f'CircuitBreaker "{self.endpoint}" closed')
+            self.state = CircuitBreaker.CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self.lock:
+            self.num_failures += 1
+            self.consecutive_failures += 1
+            self.trial_in_progress = False
+            if self.state == CircuitBreaker.HALF_OPEN or \
+                    (self.state == CircuitBreaker.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                logger.warning(f'CircuitBreaker "{self.endpoint}" open after {self.consecutive_failures} failures')
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic()
+                self.num_opened += 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                'state': self.state,
+                'requests': self.num_requests,
+                'failures': self.num_failures,
+                'failure_rate': self.num_failures / self.num_requests if self.num_requests else 0.0,
+                'rejected': self.num_rejected,
+                'opened': self.num_opened,
+            }
+
+
+# Changes the pool and retry settings. Existing pooled sessions are closed, new sessions
+# are created with the new settings on the next request.
+#
+# @param pool_size: [int] Maximum number of connections kept alive per host.
+# @param retries: [int] Maximum number of retries per request.
+# @param backoff_factor: [float] Factor of the exponential wait time between retries.
+def configure_http_pool(pool_size: int = None, retries: int = None, backoff_factor: float = None):
+    global HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_BACKOFF_FACTOR
+    if pool_size is not None:
+        HTTP_POOL_SIZE = pool_size
+    if retries is not None:
+        HTTP_RETRIES = retries
+    if backoff_factor is not None:
+        HTTP_BACKOFF_FACTOR = backoff_factor
+    close_http_sessions()
+
+
+def close_http_sessions():
+    with http_sessions_lock:
+        for session in http_sessions.values():
+            session.close()
+        http_sessions.clear()
+
+
+# Limits the request rate to a host (or another key). Requests done with get_URL() to a
+# configured host wait for the rate limiter of the host.
+#
+# @param key: [str] Host name (netloc) of the API or any other key, for example a scraper name.
+# @param requests_per_second: [float] Sustained request rate. None for no limit.
+# @param burst: [int] Number of requests that can be done at once after a quiet period.
+# @return: [RateLimiter] The rate limiter of the key. Reconfigured if it already existed.
+def configure_rate_limit(key: str, requests_per_second: float, burst: int = 1) -> 'RateLimiter':
+    key = key.lower()
+    with rate_limiters_lock:
+        limiter = rate_limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_second, burst)
+            rate_limiters[key] = limiter
+        else:
+            limiter.configure(requests_per_second, burst)
+    return limiter
+
+
+# Returns the rate limiter of the host of the URL, or None if requests to the host are not limited.
+def get_rate_limiter(url: str) -> typing.Optional['RateLimiter']:
+    with rate_limiters_lock:
+        return rate_limiters.get(urlparse(url).netloc.lower())
+
+
+# Returns the statistics of all rate limiters keyed by host or key.
+def get_rate_limiter_stats() -> typing.Dict[str, dict]:
+    with rate_limiters_lock:
+        limiters = dict(rate_limiters)
+    return {key: limiter.get_stats() for key, limiter in limiters.items()}
+
+
+def clear_rate_limiters():
+    with rate_limiters_lock:
+        rate_limiters.clear()
+
+
+# Backs off the host of the URL after a HTTP 429 (Too Many Requests) response.
+# Requests to hosts without a configured rate are only held back for the back off time.
+def _back_off_host(url: str, response: requests.Response) -> 'RateLimiter':
+    retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+    host = urlparse(url).netloc.lower()
+    with rate_limiters_lock:
+        limiter = rate_limiters.get(host)
+        if limiter is None:
+            limiter = RateLimiter(None)
+            rate_limiters[host] = limiter
+    logger.warning(f'Too many requests to "{host}", backing off {retry_after:.1f} seconds')
+    limiter.back_off(retry_after)
+    return limiter
+
+
+# Retry-After is either a number of seconds or a HTTP date.
+def _parse_retry_after(retry_after: str) -> float:
+    if not retry_after:
+        return RATE_LIMIT_DEFAULT_BACKOFF
+    try:
+        seconds = float(retry_after)
+    except ValueError:
+        try:
+            retry_date = email.utils.parsedate_to_datetime(retry_after)
+            seconds = (retry_date - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return RATE_LIMIT_DEFAULT_BACKOFF
+    return min(max(seconds, 0.0), RATE_LIMIT_MAX_BACKOFF)
+
+
+#
+# Thread-safe token bucket. Every request takes a token, tokens are added at a fixed rate up to
+# the burst capacity. A request without a token reserves the next one and sleeps only the time
+# until it is available, so concurrent requests are spread over time instead of waiting one
+# after another. After a back off no tokens are added until the back off time has passed.
+#
+class RateLimiter(object):
+
+    # @param requests_per_second: [float] Rate at which tokens are added. None for no limit.
+    # @param burst: [int] Maximum number of tokens.
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        self.lock = threading.Lock()
+        self.rate = requests_per_second
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.last_update = time.monotonic()
+
+        self.num_requests = 0
+        self.num_throttled = 0
+        self.num_backoffs = 0
+        self.throttled_time = 0.0
+
+    def configure(self, requests_per_second: float, burst: int = 1):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = requests_per_second
+            self.capacity = float(max(1, burst))
+            self.tokens = min(self.tokens, self.capacity)
+
+    # Waits until a request is allowed. Returns the time waited in seconds.
+    def acquire(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.num_requests += 1
+            wait_time = max(0.0, self.last_update - now)
+            if self.rate is not None:
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait_time += -self.tokens / self.rate
+            if wait_time > 0:
+                self.num_throttled += 1
+                self.throttled_time += wait_time
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    # Holds back all requests for the given time, for example after a HTTP 429 response.
+    def back_off(self, seconds: float):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.num_backoffs += 1
+            self.tokens = min(self.tokens, 1.0)
+            self.last_update = max(self.last_update, now + seconds)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                'requests': self.num_requests,
+                'throttled': self.num_throttled,
+                'throttled_time': self.throttled_time,
+                'backoffs': self.num_backoffs,
+            }
+
+    def _refill(self, now: float):
+        if now <= self.last_update:
+            return
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+        self.last_update = now
+
+
+# -------------------------------------------------------------------------------------------------
+# On-disk HTTP response cache.
+# Stores the ETag and Last-Modified validators of each URL together with the response body.
+# Requests for cached URLs are sent as conditional requests, so the server can answer with a
+# 304 Not Modified and the body is read from disk. Responses without validators are not cached.
+# Downloaded files (download_img()) only store the validators, the file itself is the content.
+# The cache is bounded by size, least recently used entries are evicted first.
+# A cache is only used by the requests it is passed to, see Scraper.enable_http_cache().
+#
+# Each entry consists of a <sha1 of url>.meta file with the validators and, if available,
+# a <sha1 of url>.bin file with the body. URLs often contain API keys or passwords, so only
+# their hash is stored. Entries of older versions (.json files with the URL) are removed.
+# -------------------------------------------------------------------------------------------------
+class HTTPCache(object):
+    METADATA_EXT = '.meta'
+    LEGACY_METADATA_EXT = '.json'
+
+    def __init__(self, cache_dir: io.FileName, max_size: int = HTTP_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir.getPathTranslated()
+        self.max_size = max_size
+        self.lock = threading.RLock()
+        # Entry key -> size in bytes, in least recently used order.
+        self.entries = collections.OrderedDict()
+        self.total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_entries()
+        logger.debug(f'HTTPCache() {len(self.entries)} entries, {self.total_size:,} bytes in "{self.cache_dir}"')
+
+    # Returns the headers for a conditional request of the URL. Empty if the URL is not cached,
+    # which counts as a cache miss.
+    # @param with_content: [bool] Only return validators if the response body is cached too.
+    def get_validators(self, url: str, with_content: bool = True) -> dict:
+        key = self._get_key(url)
+        with self.lock:
+            is_cached = key in self.entries
+        metadata = self._read_metadata(key) if is_cached else None
+        if metadata is None or (with_content and not metadata.get('has_content')):
+            self.record_miss()
+            return {}
+
+        headers = {}
+        if metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+        return headers
+
+    # Returns a tuple with the cached body and its encoding, or None if not cached.
+    def get_content(self, url: str) -> typing.Optional[typing.Tuple[bytes, str]]:
+        key = self._get_key(url)
+        metadata = self._read_metadata(key)
+        if metadata is None or not metadata.get('has_content'):
+            return None
+        try:
+            with open(self._get_path(key, '.bin'), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        self.record_hit(url)
+        return content, metadata.get('encoding')
+
+    def record_hit(self, url: str):
+        key = self._get_key(url)
+        with self.lock:
+            self.hits += 1
+            if key in self.entries:
+                self.entries.move_to_end(key)
+        # Modification time is the access time when loading the entries on the next start.
+        try:
+            os.utime(self._get_path(key, HTTPCache.METADATA_EXT))
+        except OSError:
+            pass
+
+    # A request that could not be answered from the cache.
+    def record_miss(self):
+        with self.lock:
+            self.misses += 1
+
+    # Stores the validators (and body) of a response.
+    def store(self, url: str, response_headers, content: bytes = None, encoding: str = None):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        key = self._get_key(url)
+        if not etag and not last_modified:
+            self._remove_entry(key)
+            return
+
+        metadata = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': encoding,
+            'has_content': content is not None
+        }
+        size = 0
+        try:
+            if content is not None:
+                size += self._write_file(key, '.bin', content)
+            size += self._write_file(key, HTTPCache.METADATA_EXT, jsoncodec.dumps(metadata).encode('utf-8'))
+        except OSError:
+            logger.exception('HTTPCache.store() Cannot write cache entry')
+            self._remove_entry(key)
+            return
+
+        with self.lock:
+            self.total_size += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries.keys()):
+                self._remove_entry(key)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            requests_total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests_total if requests_total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'size': self.total_size
+            }
+
+    def _load_entries(self):
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(file_name)
+            if ext == HTTPCache.LEGACY_METADATA_EXT:
+                self._remove_files(key, HTTPCache.LEGACY_METADATA_EXT)
+                continue
+            if ext != HTTPCache.METADATA_EXT:
+                continue
+            try:
+                metadata_stat = os.stat(self._get_path(key, HTTPCache.METADATA_EXT))
+                size = metadata_stat.st_size
+                bin_path = self._get_path(key, '.bin')
+                if os.path.exists(bin_path):
+                    size += os.path.getsize(bin_path)
+            except OSError:
+                continue
+            entries.append((metadata_stat.st_mtime, key, size))
+
+        for _, key, size in sorted(entries):
+            self.entries[key] = size
+            self.total_size += size
+        self._evict()
+
+    def _evict(self):
+        with self.lock:
+            while self.total_size > self.max_size and self.entries:
+                key = next(iter(self.entries))
+                self._remove_entry(key)
+                self.evictions += 1
+
+    def _remove_entry(self, key: str):
+        with self.lock:
+            self.total_size -= self.entries.pop(key, 0)
+        self._remove_files(key, HTTPCache.METADATA_EXT)
+
+    def _remove_files(self, key: str, metadata_ext: str):
+        for ext in (metadata_ext, '.bin'):
+            try:
+                os.remove(self._get_path(key, ext))
+            except OSError:
+                pass
+
+    def _read_metadata(self, key: str) -> typing.Optional[dict]:
+        try:
+            with open(self._get_path(key, HTTPCache.METADATA_EXT), 'rb') as f:
+                return jsoncodec.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    # Writes atomically, so readers in other threads never see partial entries.
+    def _write_file(self, key: str, ext: str, data: bytes) -> int:
+        path = self._get_path(key, ext)
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+    def _get_path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, key + ext)
+
+    def _get_key(self, url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
@@ -8,6 +8,8 @@ import random
 import hashlib
 import re
 import html
+import typing
+import functools
 
 logger = logging.getLogger(__name__)
 
@@ -207,6 +209,131 @@ def misc_generate_random_SID() -> str:
 # -------------------------------------------------------------------------------------------------
 # ROM name cleaning and formatting
 # -------------------------------------------------------------------------------------------------
+# No-Intro/TOSEC/Redump file names are a title followed by tags between (), [] or {}.
+# The tokenizer is compiled once and splits a name into (tag, text) tuples in a single pass.
+ROM_NAME_TOKEN_PATTERN = re.compile(r'(\[.+?\]|\(.+?\)|\{.+?\})\s*|([^\[\(\{]+)')
+# >> Tags without brackets inside, all removed in one pass when cleaning a name for scraping.
+ROM_NAME_TAG_PATTERN = re.compile(r'\[[^\[\]\(\)\{\}]*\]|\([^\[\]\(\)\{\}]*\)|\{[^\[\]\(\)\{\}]*\}')
+ROM_NAME_OPEN_BRACKET_PATTERN = re.compile(r'[\[\(\{]')
+ROM_NAME_TAG_PATTERNS = [re.compile(r'\[.*?\]'), re.compile(r'\(.*?\)'), re.compile(r'\{.*?\}')]
+
+ROM_REGIONS = frozenset([
+    # >> No-Intro/Redump region names
+    'World', 'USA', 'Europe', 'Japan', 'Asia', 'Australia', 'Brazil', 'Canada', 'China',
+    'France', 'Germany', 'Hong Kong', 'Italy', 'Korea', 'Netherlands', 'Russia', 'Scandinavia',
+    'Spain', 'Sweden', 'Taiwan', 'UK', 'Unknown',
+    # >> TOSEC country codes
+    'AU', 'BR', 'CA', 'CN', 'DE', 'ES', 'EU', 'FR', 'GB', 'HK', 'IT', 'JP', 'KR', 'NL', 'RU',
+    'SE', 'TW', 'US'])
+# >> No-Intro separates regions and languages with commas, TOSEC joins country and language
+# >> codes with '-'. Capitalised languages like Pt-Br are kept as one language.
+ROM_REGION_SEPARATOR_PATTERN = re.compile(r'\s*[,+-]\s*')
+ROM_LANGUAGE_SEPARATOR_PATTERN = re.compile(r'\s*[,+]\s*|(?<=[a-z]{2})-(?=[a-z]{2})')
+_ROM_REGION = '(?:{})'.format('|'.join(sorted(ROM_REGIONS, key=len, reverse=True)))
+_ROM_LANGUAGE = r'(?:[A-Z][a-z](?:-[A-Z][a-z]+)?|[a-z]{2}(?:-[a-z]{2})*)'
+# >> Disc, revision, version, development status, region and language tags, matched with a
+# >> single pattern. The name of the last matched group tells the kind of tag.
+ROM_TAG_PATTERN = re.compile(
+    r'\((?:(?:Dis[ck]|CD) ?(?P<disc>[0-9]+)(?: of (?P<disc_total>[0-9]+))?'
+    r'|Rev ?(?P<revision>[0-9A-Z][0-9A-Za-z.]*)'
+    r'|v ?(?P<version>[0-9][0-9A-Za-z.]*)'
+    r'|(?P<flag>(?:Alt|Beta|Demo|Kiosk|Pirate|Promo|Proto|Sample|Unl)(?: [0-9]+)?)'
+    r'|(?P<regions>{0}(?:\s*[,+-]\s*{0})*)'
+    r'|(?P<languages>{1}(?:\s*[,+]\s*{1})*))\)'.format(_ROM_REGION, _ROM_LANGUAGE))
+
+# >> Parsed ROM names are memoised. The same name is parsed for the search term, the title,
+# >> the multidisc detection and the BIOS filter.
+ROM_NAME_CACHE_SIZE = 20000
+
+#
+# Structured parse of a ROM file name without extension.
+# title     -> Name without tags. Trurip '-' separators are removed.
+# search_term -> Name cleaned to be used as search string, see format_ROM_name_for_scraping().
+# regions   -> Tuple of regions, e.g. ('USA', 'Europe').
+# languages -> Tuple of languages, e.g. ('En', 'Fr').
+# revision  -> Revision from (Rev A), '' if not present.
+# version   -> Version from (v1.1), '' if not present.
+# disc      -> Disc number from (Disc 1) or (Disc 1 of 2), None if not present.
+# disc_total-> Number of discs from (Disc 1 of 2), None if not present.
+# flags     -> Tuple of dump flags and development status, e.g. ('BIOS', '!', 'Beta').
+# tags      -> Tuple with all the tags including brackets, in order.
+# tokens    -> Tuple with all the stripped tokens, in order.
+#
+class ROMFilenameInfo(typing.NamedTuple):
+    title: str
+    search_term: str
+    regions: typing.Tuple[str, ...]
+    languages: typing.Tuple[str, ...]
+    revision: str
+    version: str
+    disc: typing.Optional[int]
+    disc_total: typing.Optional[int]
+    flags: typing.Tuple[str, ...]
+    tags: typing.Tuple[str, ...]
+    tokens: typing.Tuple[str, ...]
+
+#
+# Parses a No-Intro/TOSEC/Redump ROM name (without extension) into a ROMFilenameInfo.
+# Tags that are not recognised are only available in tags.
+# Results are kept in a LRU cache of ROM_NAME_CACHE_SIZE names, so do not change them.
+#
+@functools.lru_cache(maxsize=ROM_NAME_CACHE_SIZE)
+def parse_ROM_filename(name:str) -> ROMFilenameInfo:
+    tokens = [tag or text.strip() for tag, text in ROM_NAME_TOKEN_PATTERN.findall(name)]
+    tokens = tuple([token for token in tokens if token])
+    title_parts = []
+    regions = ()
+    languages = ()
+    revision = ''
+    version = ''
+    disc = None
+    disc_total = None
+    flags = []
+    tags = []
+    for token in tokens:
+        # >> Text tokens never start with a bracket.
+        if token[0] not in '[({':
+            if token != '-': title_parts.append(token)
+            continue
+        tags.append(token)
+        if token[0] == '[':
+            flags.append(token[1:-1])
+            continue
+        match = ROM_TAG_PATTERN.fullmatch(token)
+        if match is None: continue
+        tag_kind = match.lastgroup
+        if tag_kind == 'disc' or tag_kind == 'disc_total':
+            disc = int(match.group('disc'))
+            if match.group('disc_total'): disc_total = int(match.group('disc_total'))
+        elif tag_kind == 'revision':
+            revision = match.group('revision')
+        elif tag_kind == 'version':
+            version = match.group('version')
+        elif tag_kind == 'flag':
+            flags.append(match.group('flag'))
+        elif tag_kind == 'regions':
+            if not regions: regions = tuple(ROM_REGION_SEPARATOR_PATTERN.split(match.group('regions')))
+        elif not languages:
+            languages = tuple(ROM_LANGUAGE_SEPARATOR_PATTERN.split(match.group('languages')))
+
+    return ROMFilenameInfo(' '.join(title_parts), _clean_ROM_name_for_scraping(name), regions, languages,
+                           revision, version, disc, disc_total, tuple(flags), tuple(tags), tokens)
+
+# Statistics of the parsed ROM names cache.
+def get_ROM_name_cache_stats() -> dict:
+    cache_info = parse_ROM_filename.cache_info()
+    lookups = cache_info.hits + cache_info.misses
+    return {
+        'hits': cache_info.hits,
+        'misses': cache_info.misses,
+        'entries': cache_info.currsize,
+        'max_entries': cache_info.maxsize,
+        'hit_rate': cache_info.hits / lookups if lookups else 0.0
+    }
+
+def clear_ROM_name_cache():
+    parse_ROM_filename.cache_clear()
+
 #
 # This function is used to clean the ROM name to be used as search string for the scraper.
 #
@@ -214,17 +341,22 @@ def misc_generate_random_SID() -> str:
 # 2) Substitutes some characters by spaces
 #
 def format_ROM_name_for_scraping(title):
-    title = re.sub(r'\[.*?\]', '', title)
-    title = re.sub(r'\(.*?\)', '', title)
-    title = re.sub(r'\{.*?\}', '', title)
-    
-    title = title.replace('_', ' ')
-    title = title.replace('-', ' ')
-    title = title.replace(':', '')
-    title = title.replace('.', ' ')
-    title = title.strip()
+    return parse_ROM_filename(title).search_term
+
+def _clean_ROM_name_for_scraping(title):
+    cleaned_title = ROM_NAME_TAG_PATTERN.sub('', title)
+    # >> Unbalanced or nested brackets. Remove the tags type by type like it was always done so
+    # >> the search string does not change for them.
+    if ROM_NAME_OPEN_BRACKET_PATTERN.search(cleaned_title):
+        cleaned_title = title
+        for pattern in ROM_NAME_TAG_PATTERNS: cleaned_title = pattern.sub('', cleaned_title)
+
+    cleaned_title = cleaned_title.replace('_', ' ')
+    cleaned_title = cleaned_title.replace('-', ' ')
+    cleaned_title = cleaned_title.replace(':', '')
+    cleaned_title = cleaned_title.replace('.', ' ')
 
-    return title
+    return cleaned_title.strip()
 
 #
 # Format ROM file name when scraping is disabled.
@@ -236,20 +368,10 @@ def format_ROM_name_for_scraping(title):
 # Returns a Unicode string.
 #
 def  format_ROM_title(title, clean_tags):
-    #
-    # Regexp to decompose a string in tokens
-    #
     if clean_tags:
-        reg_exp = r'\[.+?\]\s?|\(.+?\)\s?|\{.+?\}|[^\[\(\{]+'
-        tokens = re.findall(reg_exp, title)
-        str_list = []
-        for token in tokens:
-            stripped_token = token.strip()
-            if (stripped_token[0] == '[' or stripped_token[0] == '(' or stripped_token[0] == '{') and \
-               stripped_token != '[BIOS]':
-                continue
-            str_list.append(stripped_token)
-        cleaned_title = ' '.join(str_list)
+        # >> Text tokens never start with a bracket.
+        tokens = parse_ROM_filename(title).tokens
+        cleaned_title = ' '.join([token for token in tokens if token[0] not in '[({' or token == '[BIOS]'])
     else:
         cleaned_title = title
 
@@ -268,36 +390,8 @@ def  format_ROM_title(title, clean_tags):
 # Multidisc ROM support
 # -------------------------------------------------------------------------------------------------
 def get_ROM_basename_tokens(basename_str):
-    DEBUG_TOKEN_PARSER = False
-
-    # --- Parse ROM base_noext/basename_str into tokens ---
-    reg_exp = r'\[.+?\]|\(.+?\)|\{.+?\}|[^\[\(\{]+'
-    tokens_raw = re.findall(reg_exp, basename_str)
-    if DEBUG_TOKEN_PARSER:
-        logger.debug('get_ROM_basename_tokens() tokens_raw   {0}'.format(tokens_raw))
-
-    # >> Strip tokens
-    tokens_strip = list()
-    for token in tokens_raw: tokens_strip.append(token.strip())
-    if DEBUG_TOKEN_PARSER:
-        logger.debug('get_ROM_basename_tokens() tokens_strip {0}'.format(tokens_strip))
-
-    # >> Remove empty tokens ''
-    tokens_clean = list()
-    for token in tokens_strip: 
-        if token: tokens_clean.append(token)
-    if DEBUG_TOKEN_PARSER:        
-        logger.debug('get_ROM_basename_tokens() tokens_clean {0}'.format(tokens_clean))
-
     # >> Remove '-' tokens from Trurip multidisc names
-    tokens = list()
-    for token in tokens_clean:
-        if token == '-': continue
-        tokens.append(token)
-    if DEBUG_TOKEN_PARSER:
-        logger.debug('get_ROM_basename_tokens() tokens       {0}'.format(tokens))
-
-    return tokens
+    return [token for token in parse_ROM_filename(basename_str).tokens if token != '-']
 #
 # Version helper class
 #
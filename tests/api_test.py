@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+
+import logging
+
+from lib.akl import api
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG)
+
+def rom_entries(*ids):
+    return [{'id': rom_id, 'm_name': f'Game {rom_id}', 'scanned_data': {'file': f'/roms/{rom_id}.zip'}} for rom_id in ids]
+
+class Test_api(unittest.TestCase):
+
+    @patch('lib.akl.api.net.get_URL_as_json_array_stream')
+    def test_roms_are_retrieved_page_by_page_with_projected_fields(self, get_json_mock):
+        # arrange
+        get_json_mock.side_effect = [iter(rom_entries('1', '2')), iter(rom_entries('3', '4')), iter(rom_entries('5'))]
+
+        # act
+        actual = list(api.client_iter_roms_in_source('localhost', 8080, 'abc', fields=['scanned_data'], page_size=2))
+
+        # assert
+        self.assertEqual(['1', '2', '3', '4', '5'], [rom.get_id() for rom in actual])
+        self.assertEqual({'id', 'scanned_data'}, set(actual[0].get_data_dic().keys()))
+        self.assertEqual(3, get_json_mock.call_count)
+        get_json_mock.assert_called_with(
+            'http://localhost:8080/query/source/roms/?id=abc&offset=4&limit=2&fields=id,scanned_data')
+
+    @patch('lib.akl.api.net.get_URL_as_json_array_stream')
+    def test_a_webservice_without_paging_is_read_once(self, get_json_mock):
+        # arrange
+        get_json_mock.side_effect = lambda url: iter(rom_entries('1', '2'))
+
+        # act
+        actual = list(api.client_iter_roms_in_collection('localhost', 8080, 'abc', page_size=2))
+
+        # assert
+        self.assertEqual(['1', '2'], [rom.get_id() for rom in actual])
+        self.assertEqual('Game 1', actual[0].get_name())
+        self.assertEqual(2, get_json_mock.call_count)
+
+    @patch('lib.akl.api.net.get_URL_as_json_array_stream')
+    def test_roms_are_retrieved_as_a_list_per_page(self, get_json_mock):
+        # arrange
+        get_json_mock.side_effect = [iter(rom_entries('1', '2')), iter(rom_entries('3', '4')), iter([])]
+
+        # act
+        actual = list(api.client_iter_rom_pages_in_source('localhost', 8080, 'abc', page_size=2))
+
+        # assert
+        self.assertEqual([['1', '2'], ['3', '4']], [[rom.get_id() for rom in page] for page in actual])
+
+    @patch('lib.akl.api.net.get_URL_as_json_array_stream')
+    def test_roms_without_id_are_not_taken_for_duplicates(self, get_json_mock):
+        # arrange
+        entries = [{'m_name': 'Game A'}, {'m_name': 'Game B'}, {'id': '1', 'm_name': 'Game 1'}, {'m_name': 'Game C'}]
+        get_json_mock.side_effect = [iter(entries)]
+
+        # act
+        actual = list(api.client_iter_roms_in_source('localhost', 8080, 'abc', page_size=10))
+
+        # assert
+        self.assertEqual(['Game A', 'Game B', 'Game 1', 'Game C'], [rom.get_name() for rom in actual])
+
+    @patch('lib.akl.api.net.get_URL_as_json_array_stream', side_effect=ConnectionError())
+    def test_a_failed_request_raises_an_error(self, get_json_mock):
+        with self.assertRaises(ConnectionError):
+            list(api.client_iter_roms_in_source('localhost', 8080, 'abc'))
+
+    @patch('lib.akl.api.time.sleep')
+    @patch('lib.akl.api.net.post_JSON_URL')
+    def test_roms_are_posted_in_batches_and_failed_batches_are_returned(self, post_mock, sleep_mock):
+        # arrange
+        roms = [api.ROMObj(entry) for entry in rom_entries('1', '2', '3', '4', '5')]
+        # 1st batch cannot connect, 2nd batch succeeds after one retry, 3rd batch succeeds.
+        post_mock.side_effect = [(None, None)] * (api.POST_RETRIES + 1) + [(None, 503), ('', 200), ('', 200)]
+        progress = []
+
+        # act
+        actual = api.client_post_scanned_roms_in_batches('localhost', 8080, {'source_id': 'abc'}, roms,
+                                                         batch_size=2, compress=True,
+                                                         progress_callback=lambda *args: progress.append(args))
+
+        # assert
+        self.assertEqual(['1', '2'], [rom.get_id() for rom in actual])
+        self.assertEqual([(0, 5), (2, 5), (3, 5)], progress)
+        posted_data = post_mock.call_args_list[-1][0][1]
+        self.assertEqual('abc', posted_data['source_id'])
+        self.assertEqual(['5'], [rom['id'] for rom in posted_data['roms']])
+        self.assertTrue(post_mock.call_args_list[-1][1]['compress'])
+        session = api.net.get_http_session('http://localhost:8080/store/roms/added', retries=False)
+        self.assertTrue(all(call[1]['session'] is session for call in post_mock.call_args_list))
+
+    @patch('lib.akl.api.time.sleep')
+    @patch('lib.akl.api.net.post_JSON_URL', return_value=(None, 500))
+    def test_posted_roms_that_reached_the_webservice_are_not_posted_again(self, post_mock, sleep_mock):
+        # arrange
+        roms = [api.ROMObj(entry) for entry in rom_entries('1', '2')]
+
+        # act
+        actual = api.client_post_scanned_roms_in_batches('localhost', 8080, {'source_id': 'abc'}, roms)
+
+        # assert
+        self.assertEqual(['1', '2'], [rom.get_id() for rom in actual])
+        self.assertEqual(1, post_mock.call_count)
+        sleep_mock.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
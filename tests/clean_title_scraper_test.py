@@ -3,6 +3,7 @@ from unittest.mock import patch, MagicMock
 
 import logging
 import random
+import threading
 import re
 
 from tests.fakes import FakeFile
@@ -74,6 +75,57 @@ class Test_clean_title_scraper(unittest.TestCase):
 
         assert expected == actual.get_name()     
         
+    @patch('lib.akl.scrapers.io.FileName', autospec=True, side_effect=FakeFile)
+    @patch('lib.akl.scrapers.api.client_iter_rom_pages_in_source')
+    def test_scraping_multiple_roms_concurrently_keeps_the_order(self, api: MagicMock, fakefiles):
+        
+        # arrange
+        settings = ScraperSettings()
+        settings.scrape_metadata_policy = constants.SCRAPE_POLICY_TITLE_ONLY
+        settings.scrape_assets_policy = constants.SCRAPE_ACTION_NONE
+        settings.clean_tags = True
+        settings.max_concurrent_roms = 4
+
+        subjects = [ROMObj({'scanned_data': {'file': f'/fake/game {i} (Europe).zip'}}) for i in range(20)]
+        api.return_value = iter([subjects[:8], subjects[8:16], subjects[16:]])
+        expected = [f'game {i}' for i in range(20)]
+
+        progress_dialog = MagicMock()
+        progress_dialog.isCanceled.return_value = False
+        target = ScrapeStrategy('', 0, settings, Null_Scraper(), progress_dialog)
+
+        # act
+        actual = target.process_roms(constants.OBJ_SOURCE, 'source_id')
+
+        # assert
+        self.assertIsNotNone(actual)
+        self.assertEqual(expected, [rom.get_name() for rom in actual])
+        self.assertEqual(4, target._get_max_concurrent_roms())
+
+    def test_an_error_while_scraping_concurrently_stops_the_queued_roms_and_finishes_the_running_ones(self):
+        # arrange
+        settings = ScraperSettings()
+        progress_dialog = MagicMock()
+        progress_dialog.isCanceled.return_value = False
+        progress_dialog.updateProgress.side_effect = RuntimeError('progress dialog failed')
+        target = ScrapeStrategy('', 0, settings, Null_Scraper(), progress_dialog)
+        scraped_roms = []
+        def process_ROM(rom):
+            # Workers wait for a GUI call which is executed in the thread of process_roms().
+            target._run_in_gui_thread(progress_dialog.updateMessage, 'Scraping')
+            scraped_roms.append(rom)
+        target._process_ROM = process_ROM
+        subjects = [ROMObj({'m_name': f'game {i}'}) for i in range(20)]
+
+        # act
+        with self.assertRaises(RuntimeError):
+            target._process_ROMs_concurrently(subjects, 2)
+
+        # assert
+        self.assertLess(len(scraped_roms), 20)
+        self.assertEqual([], [t for t in threading.enumerate() if t.name.startswith('akl_scraper')])
+        self.assertIsNone(target.gui_dispatcher)
+        
     ROM_title_list = {
       '[BIOS] CX4 (World)':                                       '[BIOS] CX4',
       '[BIOS] CX4':                                               '[BIOS] CX4',
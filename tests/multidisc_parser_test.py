@@ -82,3 +82,54 @@ class Test_multidic_parser_tests(unittest.TestCase):
             print('--------> "{0}"'.format(ROM_filename))
             MDSet = MultiDiscInfo.get_multidisc_info(io.FileName(ROM_filename))
             print('')
+
+    def test_multidisc_info_of_redump_tosec_and_trurip_names(self):
+        # act
+        actual = [MultiDiscInfo.get_multidisc_info(io.FileName(ROM_filename))
+                  for ROM_filename in Test_multidic_parser_tests.ROM_title_list]
+
+        # assert
+        self.assertEqual([True, True, True, True, True, True, False, False], [info.isMultiDisc for info in actual])
+        self.assertEqual([1, 2, 1, 2, 1, 2, 0, 0], [info.order for info in actual])
+        self.assertEqual('Final Fantasy I (USA).iso', actual[0].setName)
+        self.assertEqual('Final Fantasy II (USA).iso', actual[3].setName)
+        self.assertEqual('Final Fantasy VII (USA).iso', actual[4].setName)
+        self.assertEqual('Final Fantasy VII (USA) (Disc 2).iso', actual[5].discName)
+
+    def test_multidisc_sets_are_grouped_and_ordered(self):
+        # arrange
+        ROM_FNs = [io.FileName('/roms/psx/' + ROM_filename) for ROM_filename in reversed(Test_multidic_parser_tests.ROM_title_list)]
+        ROM_FNs.append(io.FileName('/roms/saturn/Final Fantasy VII (USA) (Disc 3).iso'))
+        ROM_FNs.append(io.FileName('/roms/psx/Final Fantasy VII (USA) (Disc 3).iso'))
+
+        # act
+        actual = MultiDiscInfo.get_multidisc_sets(ROM_FNs)
+
+        # assert
+        self.assertEqual([
+            '/roms/psx/[BIOS] PSX bios (EU).iso',
+            '/roms/psx/Tomb Raider (EU).iso',
+            '/roms/psx/Final Fantasy VII (USA).iso',
+            '/roms/psx/Final Fantasy II (USA).iso',
+            '/roms/psx/Final Fantasy I (USA).iso',
+            '/roms/saturn/Final Fantasy VII (USA).iso'], list(actual.keys()))
+        self.assertEqual([1, 2, 3], [info.order for info in actual['/roms/psx/Final Fantasy VII (USA).iso']])
+        self.assertEqual(['Final Fantasy II (USA) - (Disc 1 of 2).iso', 'Final Fantasy II (USA) - (Disc 2 of 2).iso'],
+                         [info.discName for info in actual['/roms/psx/Final Fantasy II (USA).iso']])
+        self.assertFalse(actual['/roms/psx/Tomb Raider (EU).iso'][0].isMultiDisc)
+
+    def test_grouping_a_library_of_10k_discs(self):
+        # arrange
+        ROM_FNs = [io.FileName(f'/roms/psx/Game {game} (Europe) (Disc {disc} of 4).bin')
+                   for disc in range(4, 0, -1) for game in range(2500)]
+
+        # act
+        actual = MultiDiscInfo.get_multidisc_sets(ROM_FNs)
+
+        # assert
+        self.assertEqual(2500, len(actual))
+        self.assertEqual([1, 2, 3, 4], [info.order for info in actual['/roms/psx/Game 42 (Europe).bin']])
+
+
+if __name__ == '__main__':
+    unittest.main()
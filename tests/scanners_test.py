@@ -0,0 +1,282 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import logging
+import os
+import tempfile
+
+from lib.akl.utils import io
+from lib.akl.api import ROMObj
+from lib.akl import scanners
+from lib.akl.scanners import RomScannerStrategy, ROMCandidateABC, find_dead_roms
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG) 
+
+class FakeCandidate(ROMCandidateABC):
+    def __init__(self, file: io.FileName):
+        self.file = file
+
+    def get_ROM(self) -> ROMObj:
+        return ROMObj({'scanned_data': {'file': self.file.getPath()}})
+
+    def get_sort_value(self) -> str:
+        return self.file.getBase()
+
+    def get_file(self) -> io.FileName:
+        return self.file
+
+class FakeScanner(RomScannerStrategy):
+    def __init__(self, rom_dir: str, *args, **kwargs):
+        self.rom_dir = io.FileName(rom_dir, isdir=True)
+        self.processed = []
+        super(FakeScanner, self).__init__(*args, **kwargs)
+
+    def get_name(self): return 'Fake'
+    def get_scanner_addon_id(self): return 'fake'
+    def _configure_get_wizard(self, wizard): return wizard
+    def _configure_get_edit_options(self): return {}
+    def _configure_pre_wizard_hook(self): return True
+    def _configure_post_wizard_hook(self): return True
+
+    def _getCandidates(self, launcher_report):
+        return [FakeCandidate(f) for f in self.rom_dir.scanFilesInPath('*.zip')]
+
+    def _getDeadRoms(self, candidates, roms):
+        return []
+
+    def _processFoundItems(self, candidates, roms, launcher_report):
+        self.processed = [c.get_sort_value() for c in candidates]
+        return [c.get_ROM() for c in candidates]
+
+class FakeRomSource(object):
+    def __init__(self):
+        self.roms = []
+
+    def iter_roms(self, *args, **kwargs):
+        return iter(list(self.roms))
+
+    def post_roms(self, host, port, post_data, roms, **kwargs):
+        self.roms.extend(roms)
+        return []
+
+class Test_scanners(unittest.TestCase):
+
+    @patch('lib.akl.scanners.api.client_post_scanned_roms_in_batches', return_value=[])
+    @patch('lib.akl.scanners.api.client_iter_roms_in_source', return_value=iter([]))
+    @patch('lib.akl.scanners.api.client_get_source_scanner_settings', return_value={})
+    def test_incremental_scan_only_processes_added_and_changed_files(self, settings_mock, get_roms_mock, post_roms_mock):
+        # arrange
+        source = FakeRomSource()
+        get_roms_mock.side_effect = source.iter_roms
+        post_roms_mock.side_effect = source.post_roms
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rom_dir = os.path.join(temp_dir, 'roms')
+            os.mkdir(rom_dir)
+            for name in ['a.zip', 'b.zip', 'c.zip']:
+                open(os.path.join(rom_dir, name), 'w').close()
+            manifest_dir = io.FileName(os.path.join(temp_dir, 'manifests'), isdir=True)
+            reports_dir = io.FileName(os.path.join(temp_dir, 'reports'), isdir=True)
+
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target.scan()
+            target.store_scanned_roms()
+            first_scan = target.processed
+
+            # act
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target.scan()
+            unchanged_scan = target.processed
+
+            open(os.path.join(rom_dir, 'd.zip'), 'w').close()
+            with open(os.path.join(rom_dir, 'b.zip'), 'w') as f:
+                f.write('changed')
+            target.scan()
+            changed_scan = target.processed
+
+            # assert
+            self.assertEqual(['a.zip', 'b.zip', 'c.zip'], first_scan)
+            self.assertEqual([], unchanged_scan)
+            self.assertEqual(['b.zip', 'd.zip'], changed_scan)
+            self.assertEqual(1, len(target.scan_delta.added))
+            self.assertEqual(1, len(target.scan_delta.changed))
+
+    @patch('lib.akl.scanners.api.client_post_scanned_roms_in_batches')
+    @patch('lib.akl.scanners.api.client_iter_roms_in_source')
+    @patch('lib.akl.scanners.api.client_get_source_scanner_settings', return_value={})
+    def test_incremental_scan_processes_unchanged_files_without_rom_in_the_source(self, settings_mock, get_roms_mock,
+                                                                                 post_roms_mock):
+        # arrange
+        source = FakeRomSource()
+        get_roms_mock.side_effect = source.iter_roms
+        post_roms_mock.side_effect = source.post_roms
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rom_dir = os.path.join(temp_dir, 'roms')
+            os.mkdir(rom_dir)
+            for name in ['a.zip', 'b.zip']:
+                open(os.path.join(rom_dir, name), 'w').close()
+            manifest_dir = io.FileName(os.path.join(temp_dir, 'manifests'), isdir=True)
+            reports_dir = io.FileName(os.path.join(temp_dir, 'reports'), isdir=True)
+
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target.scan()
+            target.store_scanned_roms()
+            source.roms = [rom for rom in source.roms if not rom.get_scanned_data_element('file').endswith('b.zip')]
+
+            # act
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target.scan()
+
+        # assert
+        self.assertEqual(0, len(target.scan_delta.changed))
+        self.assertEqual(['b.zip'], target.processed)
+
+    @patch('lib.akl.scanners.api.client_post_dead_roms', return_value=False)
+    @patch('lib.akl.scanners.api.client_post_scanned_roms_in_batches', return_value=[])
+    @patch('lib.akl.scanners.api.client_iter_roms_in_source', return_value=iter([]))
+    @patch('lib.akl.scanners.api.client_get_source_scanner_settings', return_value={})
+    def test_removed_files_are_checked_again_until_their_dead_roms_are_removed(self, settings_mock, get_roms_mock,
+                                                                              post_roms_mock, post_dead_roms_mock):
+        # arrange
+        source = FakeRomSource()
+        get_roms_mock.side_effect = source.iter_roms
+        post_roms_mock.side_effect = source.post_roms
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rom_dir = os.path.join(temp_dir, 'roms')
+            os.mkdir(rom_dir)
+            for name in ['a.zip', 'b.zip']:
+                open(os.path.join(rom_dir, name), 'w').close()
+            manifest_dir = io.FileName(os.path.join(temp_dir, 'manifests'), isdir=True)
+            reports_dir = io.FileName(os.path.join(temp_dir, 'reports'), isdir=True)
+            dead_rom = ROMObj({'id': 'b', 'scanned_data': {'file': os.path.join(rom_dir, 'b.zip')}})
+
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target.scan()
+            target.store_scanned_roms()
+            os.remove(os.path.join(rom_dir, 'b.zip'))
+
+            # act
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target._getDeadRoms = lambda candidates, roms: [dead_rom]
+            target.scan()
+            target.store_scanned_roms()
+            is_removed = target.remove_dead_roms()
+
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target._getDeadRoms = lambda candidates, roms: [dead_rom]
+            target.scan()
+            dead_roms_after_failure = target.amount_of_dead_roms()
+            post_dead_roms_mock.return_value = True
+            target.remove_dead_roms()
+
+            target = FakeScanner(rom_dir, reports_dir, 'source1', 'localhost', 0, MagicMock(), manifest_dir=manifest_dir)
+            target.scan()
+            removed_after_removal = target.scan_delta.removed
+
+        # assert
+        self.assertFalse(is_removed)
+        self.assertEqual(1, dead_roms_after_failure)
+        self.assertEqual([], removed_after_removal)
+
+    @patch('lib.akl.scanners.api.client_iter_roms_in_source', return_value=iter([]))
+    @patch('lib.akl.scanners.api.client_get_source_scanner_settings', return_value={})
+    def test_scanning_logs_the_rom_name_cache_statistics_of_that_scan(self, settings_mock, get_roms_mock):
+        # arrange
+        scanners.text.parse_ROM_filename('Game of an earlier run (USA)')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reports_dir = io.FileName(os.path.join(temp_dir, 'reports'), isdir=True)
+            target = FakeScanner(temp_dir, reports_dir, 'source1', 'localhost', 0, MagicMock())
+
+            # act
+            target.scan()
+            stats = scanners.text.get_ROM_name_cache_stats()
+
+        # assert
+        self.assertEqual(0, stats['misses'])
+        self.assertEqual(0, stats['entries'])
+
+    @patch('lib.akl.scanners.api.client_iter_roms_in_source', side_effect=ConnectionError('webservice is down'))
+    @patch('lib.akl.scanners.api.client_get_source_scanner_settings', return_value={})
+    def test_cleanup_stops_when_the_existing_roms_cannot_be_loaded(self, settings_mock, get_roms_mock):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            reports_dir = io.FileName(os.path.join(temp_dir, 'reports'), isdir=True)
+            target = FakeScanner(temp_dir, reports_dir, 'source1', 'localhost', 0, MagicMock())
+            target._getCandidates = MagicMock(return_value=[])
+
+            # act
+            actual = target.cleanup()
+
+        # assert
+        self.assertEqual({}, actual)
+        target._getCandidates.assert_not_called()
+        self.assertEqual(0, target.amount_of_dead_roms())
+
+    def test_finding_dead_roms_ignores_case_and_directory_separators(self):
+        # arrange
+        candidate_paths = ['smb://nas/roms/Zelda.zip', 'C:/roms/Mario.zip']
+        roms = [
+            ROMObj({'scanned_data': {'file': 'smb://nas/roms/zelda.ZIP'}}),
+            ROMObj({'scanned_data': {'file': 'C:\\roms\\Mario.zip'}}),
+            ROMObj({'scanned_data': {'file': 'C:/roms/Metroid.zip'}}),
+            ROMObj({'scanned_data': {}})
+        ]
+
+        # act
+        actual = find_dead_roms(candidate_paths, roms)
+
+        # assert
+        self.assertEqual([roms[2]], actual)
+
+    @patch('lib.akl.scanners.api.client_get_source_scanner_settings', return_value={})
+    def test_only_scanners_with_the_default_dead_rom_check_retrieve_a_subset_of_the_rom_fields(self, settings_mock):
+        # arrange
+        class DefaultDeadRomsScanner(FakeScanner):
+            _getDeadRoms = RomScannerStrategy._getDeadRoms
+        class NameOnlyScanner(FakeScanner):
+            dead_roms_fields = ['m_name']
+        args = ('/roms', io.FileName('/reports', isdir=True), 'source1', 'localhost', 0, MagicMock())
+
+        # act
+        default_fields = DefaultDeadRomsScanner(*args)._get_dead_roms_fields()
+        overridden_fields = FakeScanner(*args)._get_dead_roms_fields()
+        own_fields = NameOnlyScanner(*args)._get_dead_roms_fields()
+
+        # assert
+        self.assertEqual(RomScannerStrategy.dead_roms_fields, default_fields)
+        self.assertIsNone(overridden_fields)
+        self.assertEqual(['m_name'], own_fields)
+
+    @patch('lib.akl.scanners.io.is_osx', return_value=False)
+    @patch('lib.akl.scanners.io.is_windows', return_value=False)
+    def test_finding_dead_roms_on_a_case_sensitive_file_system_compares_the_case(self, is_windows, is_osx):
+        # arrange
+        candidate_paths = ['/home/kodi/roms/Zelda.zip', 'smb://nas/roms/Mario.zip']
+        roms = [
+            ROMObj({'scanned_data': {'file': '/home/kodi/roms/zelda.zip'}}),
+            ROMObj({'scanned_data': {'file': 'smb://nas/roms/mario.zip'}})
+        ]
+
+        # act
+        actual = find_dead_roms(candidate_paths, roms)
+        ignoring_case = find_dead_roms(candidate_paths, roms, ignore_case=True)
+
+        # assert
+        self.assertEqual([roms[0]], actual)
+        self.assertEqual([], ignoring_case)
+
+    def test_finding_dead_roms_in_100k_entries(self):
+        # arrange
+        candidate_paths = [f'/roms/game {i}.zip' for i in range(100000)]
+        roms = [ROMObj({'scanned_data': {'file': f'/roms/Game {i}.zip'}}) for i in range(0, 200000, 2)]
+
+        # act
+        actual = find_dead_roms(candidate_paths, roms, ignore_case=True)
+
+        # assert
+        self.assertEqual(50000, len(actual))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import json
+import logging
+import os
+import tempfile
+
+from lib.akl.utils import io
+from lib.akl.scraper_cache import SQLiteScraperCacheBackend, import_json_caches
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG) 
+
+class Test_scraper_cache(unittest.TestCase):
+
+    def test_sqlite_backend_stores_looks_up_and_deletes_single_entries(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_FN = io.FileName(os.path.join(temp_dir, 'scraper_cache.db'))
+            target = SQLiteScraperCacheBackend(db_FN)
+
+            # act
+            target.put('TheGamesDB', 'Nintendo SNES', 'candidates', 'Zelda', {'id': 1, 'title': 'Zelda'})
+            target.put('TheGamesDB', 'Nintendo SNES', 'candidates', 'Mario', {'id': 2})
+            target.delete('TheGamesDB', 'Nintendo SNES', 'candidates', 'Mario')
+            target.close()
+
+            target = SQLiteScraperCacheBackend(db_FN)
+            actual = target.get('TheGamesDB', 'Nintendo SNES', 'candidates', 'Zelda')
+            deleted = target.contains('TheGamesDB', 'Nintendo SNES', 'candidates', 'Mario')
+            other_platform = target.contains('TheGamesDB', 'Sega Genesis', 'candidates', 'Zelda')
+            target.close()
+
+            # assert
+            self.assertEqual({'id': 1, 'title': 'Zelda'}, actual)
+            self.assertFalse(deleted)
+            self.assertFalse(other_platform)
+
+    def test_importing_json_caches_of_a_scraper(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            files = {
+                'TheGamesDB__Nintendo SNES__candidates.json': {'Zelda': {'id': 1}, 'Mario': {'id': 2}},
+                'TheGamesDB__Sega Genesis__metadata.json': {'Sonic': {'title': 'Sonic'}},
+                'MobyGames__Nintendo SNES__candidates.json': {'Zelda': {'id': 3}},
+            }
+            for file_name, data in files.items():
+                with open(os.path.join(temp_dir, file_name), 'w') as f:
+                    json.dump(data, f)
+            target = SQLiteScraperCacheBackend(io.FileName(os.path.join(temp_dir, 'scraper_cache.db')))
+
+            # act
+            actual = import_json_caches(target, io.FileName(temp_dir, isdir=True), 'TheGamesDB', ['candidates', 'metadata'])
+
+            # assert
+            self.assertEqual(3, actual)
+            self.assertEqual({'title': 'Sonic'}, target.get('TheGamesDB', 'Sega Genesis', 'metadata', 'Sonic'))
+            self.assertEqual({'id': 1}, target.get('TheGamesDB', 'Nintendo SNES', 'candidates', 'Zelda'))
+            self.assertFalse(target.has_scraper('MobyGames'))
+            target.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
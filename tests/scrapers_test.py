@@ -0,0 +1,279 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import logging
+import os
+import tempfile
+
+from tests.fakes import FakeFile
+
+from lib.akl.api import ROMObj
+from lib.akl import constants
+from lib.akl.utils import io
+from lib.akl import scrapers
+from lib.akl.scrapers import Scraper, Null_Scraper, ScrapeStrategy, ScraperSettings, AssetDownloadJob, FilterROM
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG) 
+
+class DiskCacheScraper(Null_Scraper):
+    def __init__(self, cache_dir: str):
+        Scraper.__init__(self, io.FileName(cache_dir, isdir=True))
+
+    def get_filename(self):
+        return 'Test'
+
+    def supports_disk_cache(self):
+        return True
+
+class DefaultDownloadScraper(Null_Scraper):
+    def get_max_concurrent_downloads(self):
+        return Scraper.get_max_concurrent_downloads(self)
+
+class Test_scrapers(unittest.TestCase):
+
+    def test_downloading_queued_assets_sets_the_downloaded_files_on_the_roms(self):
+        # arrange
+        settings = ScraperSettings()
+        settings.scrape_metadata_policy = constants.SCRAPE_POLICY_TITLE_ONLY
+        settings.max_concurrent_downloads = 3
+
+        scraper = Null_Scraper()
+        scraper.download_image = lambda url, path: None if 'missing' in url else path
+
+        roms = [ROMObj({'assets': {}}) for _ in range(2)]
+        jobs = [
+            AssetDownloadJob(roms[0], constants.ASSET_SNAP_ID, 'http://x/snap.png', '', FakeFile('/a/snap.png')),
+            AssetDownloadJob(roms[0], constants.ASSET_FANART_ID, 'http://x/missing.png', '', FakeFile('/a/fanart.png')),
+            AssetDownloadJob(roms[1], constants.ASSET_BOXFRONT_ID, 'http://x/box.jpg', '', FakeFile('/b/box.jpg')),
+        ]
+        target = ScrapeStrategy('', 0, settings, scraper, MagicMock())
+        target.asset_scraper_obj = scraper
+
+        # act
+        target._download_assets(jobs)
+
+        # assert
+        self.assertEqual('/a/snap.png', roms[0].get_asset(constants.ASSET_SNAP_ID))
+        self.assertIsNone(roms[0].get_asset(constants.ASSET_FANART_ID))
+        self.assertEqual('/b/box.jpg', roms[1].get_asset(constants.ASSET_BOXFRONT_ID))
+
+    def test_assets_are_downloaded_sequentially_unless_the_scraper_allows_more(self):
+        # arrange
+        settings = ScraperSettings()
+        settings.max_concurrent_downloads = 4
+        default_target = ScrapeStrategy('', 0, settings, DefaultDownloadScraper(), MagicMock())
+        null_target = ScrapeStrategy('', 0, settings, Null_Scraper(), MagicMock())
+
+        # act
+        default_downloads = default_target._get_max_concurrent_downloads()
+        null_downloads = null_target._get_max_concurrent_downloads()
+
+        # assert
+        self.assertEqual(1, default_downloads)
+        self.assertEqual(4, null_downloads)
+
+    @patch('lib.akl.scrapers.io.misc_add_file_cache')
+    def test_caching_assets_scans_each_distinct_directory_once(self, add_file_cache_mock: MagicMock):
+        # arrange
+        settings = ScraperSettings()
+        target = ScrapeStrategy('', 0, settings, Null_Scraper(), MagicMock())
+        paths = [FakeFile('/snaps/'), FakeFile('/boxfronts/'), None, FakeFile('/snaps/'), FakeFile('')]
+
+        # act
+        actual = target._cache_assets(paths)
+
+        # assert
+        self.assertEqual(2, add_file_cache_mock.call_count)
+        self.assertEqual({'/snaps/', '/boxfronts/'}, set(actual.keys()))
+
+    def test_the_asset_directories_of_a_page_of_roms_are_cached_once(self):
+        # arrange
+        settings = ScraperSettings()
+        progress_dialog = MagicMock()
+        target = ScrapeStrategy('', 0, settings, Null_Scraper(), progress_dialog)
+        target._cache_assets = MagicMock(return_value={})
+        pages = [
+            [ROMObj({'asset_paths': {'snap': '/snaps/', 'boxfront': '/boxfronts/'}}) for _ in range(3)],
+            [ROMObj({'asset_paths': {'snap': '/snaps/', 'fanart': '/fanarts/'}}) for _ in range(2)],
+        ]
+        roms = []
+
+        # act
+        actual = list(target._feed_roms(pages[0], iter(pages[1:]), roms))
+
+        # assert
+        self.assertEqual(5, len(actual))
+        self.assertEqual(actual, roms)
+        self.assertEqual(2, target._cache_assets.call_count)
+        self.assertEqual(['/boxfronts/', '/snaps/'], sorted(p.getPath() for p in target._cache_assets.call_args_list[0].args[0]))
+        self.assertEqual(['/fanarts/'], [p.getPath() for p in target._cache_assets.call_args_list[1].args[0]])
+        progress_dialog.updateNumSteps.assert_called_with(5)
+
+    @patch('lib.akl.scrapers.io.misc_add_file_cache')
+    def test_asset_directory_listings_are_stored_with_the_scraper_of_the_strategy(self, add_file_cache_mock: MagicMock):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            scraper = DiskCacheScraper(temp_dir)
+            target = ScrapeStrategy('', 0, ScraperSettings(), scraper, MagicMock())
+
+            # act
+            target._cache_assets([FakeFile('/snaps/')])
+
+        # assert
+        self.assertIsNotNone(scraper.file_cache_store)
+        self.assertIs(scraper.file_cache_store, add_file_cache_mock.call_args.args[1])
+        self.assertIsNone(Null_Scraper().file_cache_store)
+
+    def test_the_checksum_store_of_a_scraper_is_opened_on_first_use_and_closed_on_flush(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'game.zip')
+            with open(file_path, 'wb') as f:
+                f.write(b'game')
+            target = DiskCacheScraper(temp_dir)
+            store_before_use = target.checksum_store
+
+            # act
+            checksums = target.calculate_checksums(io.FileName(file_path))
+            store_after_use = target.checksum_store
+            target.flush_disk_cache()
+
+            # assert
+            self.assertIsNone(store_before_use)
+            self.assertIsNotNone(store_after_use)
+            self.assertEqual(4, checksums['size'])
+            self.assertTrue(os.path.isfile(os.path.join(temp_dir, 'checksums.db')))
+            self.assertIsNone(target.checksum_store)
+
+    @patch('lib.akl.scrapers.net.get_URL_with_retry', return_value=('{}', 200))
+    def test_the_http_cache_is_only_used_by_the_scraper_that_enabled_it(self, get_URL_mock: MagicMock):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            other_scraper = DiskCacheScraper(temp_dir)
+            target = DiskCacheScraper(temp_dir)
+
+            # act
+            target.enable_http_cache()
+            other_scraper._get_URL('http://example.com/other')
+            target._get_URL('http://example.com/game')
+
+        # assert
+        self.assertIsNone(other_scraper.http_cache)
+        self.assertIsNone(get_URL_mock.call_args_list[0].kwargs['http_cache'])
+        self.assertIs(target.http_cache, get_URL_mock.call_args_list[1].kwargs['http_cache'])
+
+    def test_cache_changes_that_were_not_flushed_are_recovered_from_the_journal(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            crashed_scraper = DiskCacheScraper(temp_dir)
+            crashed_scraper.set_candidate('Zelda', 'Nintendo SNES', {'id': 1})
+            crashed_scraper.set_candidate('Mario', 'Nintendo SNES', {'id': 2})
+            crashed_scraper.clear_cache('Mario', 'Nintendo SNES')
+
+            # act
+            target = DiskCacheScraper(temp_dir)
+            zelda_recovered = target.check_candidates_cache('Zelda', 'Nintendo SNES')
+            mario_recovered = target.check_candidates_cache('Mario', 'Nintendo SNES')
+            target.flush_disk_cache()
+
+            # assert
+            self.assertTrue(zelda_recovered)
+            self.assertFalse(mario_recovered)
+            self.assertTrue(os.path.isfile(os.path.join(temp_dir, 'Test__Nintendo SNES__candidates.json')))
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, 'Test__Nintendo SNES__candidates.json.journal')))
+
+    def test_disk_caches_are_kept_per_platform_and_evicted_platforms_are_flushed(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = DiskCacheScraper(temp_dir)
+            target.disk_cache_manager.max_platforms = 2
+
+            # act
+            target.set_candidate('Sonic', 'Sega Genesis', {'id': 1})
+            target.set_candidate('Zelda', 'Nintendo SNES', {'id': 2})
+            target.set_candidate('Doom', 'Microsoft MS-DOS', {'id': 3})
+            genesis_loaded = target.disk_cache_manager.is_loaded('Sega Genesis', 'candidates')
+            sonic_in_snes = target.check_candidates_cache('Sonic', 'Nintendo SNES')
+            sonic_in_genesis = target.check_candidates_cache('Sonic', 'Sega Genesis')
+
+            # assert
+            self.assertFalse(genesis_loaded)
+            self.assertTrue(os.path.isfile(os.path.join(temp_dir, 'Test__Sega Genesis__candidates.json')))
+            self.assertFalse(sonic_in_snes)
+            self.assertTrue(sonic_in_genesis)
+
+    def test_the_deprecated_disk_cache_dictionaries_still_read_and_write_the_caches(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = DiskCacheScraper(temp_dir)
+            target.set_candidate('Sonic', 'Sega Genesis', {'id': 1})
+
+            # act
+            with self.assertWarns(DeprecationWarning):
+                target._lazy_load_disk_cache('metadata')
+            sonic = target.disk_caches['candidates']['Sonic']
+            target.disk_caches['metadata']['Sonic'] = {'title': 'Sonic'}
+            target.disk_caches_dirty['metadata'] = True
+            target.flush_disk_cache()
+
+            # assert
+            self.assertEqual({'id': 1}, sonic)
+            self.assertTrue(target.disk_caches_loaded['metadata'])
+            self.assertFalse(target.disk_caches_dirty['metadata'])
+            self.assertTrue(os.path.isfile(os.path.join(temp_dir, 'Test__Sega Genesis__metadata.json')))
+
+    def test_waiting_for_api_requests_configures_the_rate_limit_once_and_sets_the_last_call(self):
+        # arrange
+        target = Null_Scraper()
+        first_call = target.last_http_call
+        self.addCleanup(scrapers.net.clear_rate_limiters)
+
+        # act
+        with patch('lib.akl.scrapers.net.configure_rate_limit', wraps=scrapers.net.configure_rate_limit) as configure:
+            for _ in range(3):
+                target._wait_for_API_request(1, burst=3)
+
+        # assert
+        configure.assert_called_once_with('scraper:Null', 1000.0, 3)
+        self.assertGreater(target.last_http_call, first_call)
+        self.assertEqual(3, scrapers.net.get_rate_limiter_stats()['scraper:null']['requests'])
+
+    def test_the_bios_filter_shares_the_parsed_rom_name_without_extension(self):
+        # arrange
+        scrapers.text.clear_ROM_name_cache()
+        target = FilterROM(None, {'scan_ignore_bios': True, 'scraper_akloffline_addon_code_dir': ''}, 'Nintendo SNES')
+
+        # act
+        is_bios_filtered = target.ROM_is_filtered('[BIOS] CX4 (World).zip')
+        is_game_filtered = target.ROM_is_filtered('Super Mario World (Europe) (Rev 1).zip')
+        scrapers.text.parse_ROM_filename('[BIOS] CX4 (World)')
+        stats = scrapers.text.get_ROM_name_cache_stats()
+
+        # assert
+        self.assertTrue(is_bios_filtered)
+        self.assertFalse(is_game_filtered)
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(2, stats['misses'])
+
+    @patch('lib.akl.scrapers.api.client_iter_rom_pages_in_source')
+    def test_scraping_roms_logs_the_rom_name_cache_statistics_of_that_run(self, api: MagicMock):
+        # arrange
+        scrapers.text.parse_ROM_filename('Game of an earlier run (USA)')
+        api.return_value = iter([[]])
+        progress_dialog = MagicMock()
+        progress_dialog.isCanceled.return_value = False
+        target = ScrapeStrategy('', 0, ScraperSettings(), Null_Scraper(), progress_dialog)
+
+        # act
+        target.process_roms(constants.OBJ_SOURCE, 'source_id')
+        stats = scrapers.text.get_ROM_name_cache_stats()
+
+        # assert
+        self.assertEqual(0, stats['misses'])
+        self.assertEqual(0, stats['entries'])
+
+
+if __name__ == '__main__':
+    unittest.main()
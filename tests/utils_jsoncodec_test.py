@@ -0,0 +1,54 @@
+import unittest
+
+import logging
+import json
+
+from lib.akl.utils import jsoncodec
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG)
+
+class Test_utils_jsoncodec(unittest.TestCase):
+
+    def test_compact_encoding_roundtrips_without_whitespace(self):
+        # arrange
+        data = {'b': [1, 2.5, None, True], 'a': {'title': 'Pokémon', 'path': 'smb://nas/roms'}}
+
+        # act
+        json_str = jsoncodec.dumps(data, sort_keys=True)
+        actual = jsoncodec.loads(json_str)
+
+        # assert
+        self.assertEqual(data, actual)
+        self.assertNotIn(' ', json_str.replace('Pokémon', ''))
+        self.assertNotIn('\n', json_str)
+        self.assertTrue(json_str.startswith('{"a":'))
+        self.assertIn('Pokémon', json_str)
+
+    def test_indented_encoding_matches_the_standard_library(self):
+        # arrange
+        data = {'b': 1, 'a': ['x', 'ü']}
+        expected = json.dumps(data, indent=1, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+        # act
+        actual = jsoncodec.dumps(data, indent=1, sort_keys=True)
+
+        # assert
+        self.assertEqual(expected, actual)
+
+    def test_decoding_bytes_and_ascii_encoding(self):
+        # act
+        actual = jsoncodec.loads(jsoncodec.dumps({'title': 'Pokémon'}, ensure_ascii=True).encode('utf-8'))
+        ascii_str = jsoncodec.dumps('é', ensure_ascii=True)
+
+        # assert
+        self.assertEqual({'title': 'Pokémon'}, actual)
+        self.assertEqual('"\\u00e9"', ascii_str)
+
+    def test_invalid_json_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            jsoncodec.loads('{"broken": ')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,408 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import logging
+import os
+import tempfile
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from lib.akl.utils import net, io
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG) 
+
+PNG_BYTES = b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A' + b'\x00' * 200
+
+def fake_session(chunks, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers if headers else {}
+    response.iter_content.return_value = chunks
+    session = MagicMock()
+    session.get.return_value = response
+    return session
+
+# Local HTTP server which answers every GET request with the given status code.
+class StatusServer(HTTPServer):
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers if headers else {}
+        self.num_requests = 0
+        super(StatusServer, self).__init__(('127.0.0.1', 0), StatusHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def get_url(self, path='/games'):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class StatusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.num_requests += 1
+        self.send_response(self.server.status_code)
+        for name, value in self.server.headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class Test_utils_net(unittest.TestCase):
+
+    def tearDown(self):
+        net.configure_http_pool(pool_size=10, retries=3, backoff_factor=0.5)
+        net.clear_rate_limiters()
+        net.clear_circuit_breakers()
+
+    def test_requests_to_the_same_host_share_one_pooled_session(self):
+        # act
+        session1 = net.get_http_session('https://api.example.com/games?id=1')
+        session2 = net.get_http_session('https://API.example.com/platforms')
+        other = net.get_http_session('https://cdn.example.com/img.png')
+
+        # assert
+        self.assertIs(session1, session2)
+        self.assertIsNot(session1, other)
+
+    def test_configuring_the_pool_recreates_sessions_with_new_settings(self):
+        # arrange
+        old_session = net.get_http_session('https://api.example.com/')
+
+        # act
+        net.configure_http_pool(pool_size=4, retries=5)
+        actual = net.get_http_session('https://api.example.com/')
+
+        # assert
+        adapter = actual.get_adapter('https://api.example.com/')
+        self.assertIsNot(old_session, actual)
+        self.assertEqual(4, adapter._pool_maxsize)
+        self.assertEqual(5, adapter.max_retries.total)
+
+    def test_downloading_an_image_streams_the_chunks_into_the_file(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = io.FileName(os.path.join(temp_dir, 'snap.png'))
+            session = fake_session([PNG_BYTES[:10], PNG_BYTES[10:100], PNG_BYTES[100:]])
+
+            # act
+            actual = net.download_img('http://example.com/snap.png', target, session=session)
+
+            # assert
+            self.assertTrue(actual)
+            with open(target.getPath(), 'rb') as f:
+                self.assertEqual(PNG_BYTES, f.read())
+            self.assertEqual(['snap.png'], os.listdir(temp_dir))
+
+    def test_downloading_an_invalid_image_does_not_replace_the_file(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = io.FileName(os.path.join(temp_dir, 'snap.png'))
+            target.writeAll('old')
+            session = fake_session([b'<html><body>Not found</body></html>' * 4])
+
+            # act
+            actual = net.download_img('http://example.com/snap.png', target, session=session)
+
+            # assert
+            self.assertFalse(actual)
+            self.assertEqual('old', target.loadFileToStr())
+            self.assertEqual(['snap.png'], os.listdir(temp_dir))
+
+    def test_downloading_a_file_larger_than_the_maximum_size_is_aborted(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = io.FileName(os.path.join(temp_dir, 'manual.pdf'))
+            session = fake_session([b'x' * 100, b'x' * 100])
+
+            # act
+            actual = net.download_img('http://example.com/manual.pdf', target, session=session, max_size=150)
+
+            # assert
+            self.assertFalse(actual)
+            self.assertEqual([], os.listdir(temp_dir))
+
+    def test_cached_response_is_used_when_server_responds_not_modified(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = net.HTTPCache(io.FileName(temp_dir, isdir=True))
+            first_response = MagicMock(status_code=200, content=b'{"id": 1}', encoding='utf-8')
+            first_response.headers = {'ETag': '"abc"'}
+            first_response.json.return_value = {'id': 1}
+            second_response = MagicMock(status_code=304)
+            session = MagicMock()
+            session.get.side_effect = [first_response, second_response]
+            url = 'http://example.com/game/1?apikey=secret'
+
+            # act
+            net.get_URL(url, content_type=net.ContentType.JSON, session=session, http_cache=cache)
+            actual, http_code = net.get_URL(url, content_type=net.ContentType.JSON, session=session, http_cache=cache)
+            stats = cache.get_stats()
+            stored_data = b''
+            for file_name in os.listdir(temp_dir):
+                with open(os.path.join(temp_dir, file_name), 'rb') as f:
+                    stored_data += f.read()
+
+            # assert
+            self.assertEqual({'id': 1}, actual)
+            self.assertEqual(200, http_code)
+            self.assertEqual('"abc"', session.get.call_args.kwargs['headers']['If-None-Match'])
+            self.assertEqual(1, stats['hits'])
+            self.assertEqual(1, stats['misses'])
+            self.assertNotIn(b'secret', stored_data)
+
+    def test_requests_without_a_cache_are_not_cached_and_old_entries_with_urls_are_removed(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'abc.json'), 'w') as f:
+                f.write('{"url": "http://example.com/?password=secret"}')
+            response = MagicMock(status_code=200, content=b'{"id": 1}', encoding='utf-8')
+            response.headers = {'ETag': '"abc"'}
+            session = MagicMock()
+            session.get.return_value = response
+
+            # act
+            cache = net.HTTPCache(io.FileName(temp_dir, isdir=True))
+            net.get_URL('http://localhost/webservice/roms', content_type=net.ContentType.JSON, session=session)
+            net.get_URL('http://example.com/game/2', content_type=net.ContentType.JSON, session=session, http_cache=cache)
+            net.get_URL('http://example.com/game/2', content_type=net.ContentType.JSON, session=session, http_cache=cache)
+
+            # assert
+            self.assertEqual(1, len(cache.entries))
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, 'abc.json')))
+            self.assertEqual(0, cache.get_stats()['hits'])
+            self.assertEqual(2, cache.get_stats()['misses'])
+
+    def test_http_cache_evicts_least_recently_used_entries(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = net.HTTPCache(io.FileName(temp_dir, isdir=True), max_size=800)
+            headers = {'ETag': '"1"'}
+
+            # act
+            target.store('http://example.com/1', headers, b'x' * 200)
+            target.store('http://example.com/2', headers, b'x' * 200)
+            target.get_content('http://example.com/1')
+            target.store('http://example.com/3', headers, b'x' * 200)
+
+            # assert
+            self.assertIsNotNone(target.get_content('http://example.com/1'))
+            self.assertIsNone(target.get_content('http://example.com/2'))
+            self.assertIsNotNone(target.get_content('http://example.com/3'))
+            self.assertEqual(1, target.get_stats()['evictions'])
+
+    def test_streamed_json_array_elements_are_parsed_across_chunks(self):
+        # arrange
+        body = '[{"id": "1", "m_name": "Pokémon"}, 12345, {"id": "2"}]'.encode('utf-8')
+        session = fake_session([body[i:i + 5] for i in range(0, len(body), 5)])
+        session.get.return_value.encoding = 'utf-8'
+
+        # act
+        actual = list(net.get_URL_as_json_array_stream('http://localhost/roms', session=session))
+
+        # assert
+        self.assertEqual([{'id': '1', 'm_name': 'Pokémon'}, 12345, {'id': '2'}], actual)
+        session.get.return_value.close.assert_called_once()
+
+    def test_streamed_json_array_parser_rejects_invalid_arrays(self):
+        for invalid_json in ['{"id": 1}', '[1,]', '[1 2]', '[{"id": 1}', '[1] [2]']:
+            with self.assertRaises(ValueError):
+                parser = net.JSONArrayStreamParser()
+                parser.feed(invalid_json)
+                parser.feed('', final=True)
+
+    def test_posted_json_can_be_gzip_compressed(self):
+        # arrange
+        session = MagicMock()
+        session.post.return_value.status_code = 200
+        session.post.return_value.text = ''
+
+        # act
+        net.post_JSON_URL('http://localhost/store', {'roms': ['é'] * 100}, session=session, compress=True)
+
+        # assert
+        posted = session.post.call_args[1]
+        self.assertEqual('gzip', posted['headers']['Content-Encoding'])
+        self.assertEqual({'roms': ['é'] * 100}, json.loads(gzip.decompress(posted['data'])))
+
+    @patch('lib.akl.utils.net.time.sleep')
+    @patch('lib.akl.utils.net.time.monotonic', return_value=100.0)
+    def test_rate_limiter_allows_a_burst_and_then_spreads_requests(self, monotonic_mock, sleep_mock):
+        # arrange
+        target = net.RateLimiter(requests_per_second=2, burst=2)
+
+        # act
+        waits = [target.acquire() for _ in range(4)]
+        monotonic_mock.return_value = 110.0
+        wait_after_quiet_period = target.acquire()
+
+        # assert
+        self.assertEqual([0, 0, 0.5, 1.0], waits)
+        self.assertEqual(0, wait_after_quiet_period)
+        self.assertEqual(1.5, target.get_stats()['throttled_time'])
+        self.assertEqual(2, target.get_stats()['throttled'])
+
+    @patch('lib.akl.utils.net.time.sleep')
+    def test_too_many_requests_backs_off_for_the_retry_after_time(self, sleep_mock):
+        # arrange
+        too_many = MagicMock(status_code=429, headers={'Retry-After': '30'})
+        success = MagicMock(status_code=200, headers={}, text='ok', encoding='utf-8')
+        session = MagicMock()
+        session.get.side_effect = [too_many, success]
+
+        # act
+        actual, status = net.get_URL('http://api.example.com/games', session=session)
+
+        # assert
+        self.assertEqual(('ok', 200), (actual, status))
+        self.assertEqual(2, session.get.call_count)
+        self.assertAlmostEqual(30, sleep_mock.call_args[0][0], delta=1)
+        self.assertEqual(1, net.get_rate_limiter_stats()['api.example.com']['backoffs'])
+
+    @patch('lib.akl.utils.net.time.sleep')
+    def test_image_downloads_are_rate_limited_and_back_off_after_too_many_requests(self, sleep_mock):
+        # arrange
+        net.configure_rate_limit('img.example.com', 10.0, burst=5)
+        too_many = MagicMock(status_code=429, headers={'Retry-After': '30'})
+        success = fake_session([PNG_BYTES]).get.return_value
+        session = MagicMock()
+        session.get.side_effect = [too_many, success]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = io.FileName(os.path.join(temp_dir, 'snap.png'))
+
+            # act
+            actual = net.download_img('http://img.example.com/snap.png', target, session=session)
+
+        # assert
+        self.assertTrue(actual)
+        self.assertEqual(2, session.get.call_count)
+        too_many.close.assert_called_once()
+        self.assertAlmostEqual(30, sleep_mock.call_args[0][0], delta=1)
+        stats = net.get_rate_limiter_stats()['img.example.com']
+        self.assertEqual(2, stats['requests'])
+        self.assertEqual(1, stats['backoffs'])
+
+    @patch('lib.akl.utils.net.RateLimiter.back_off')
+    def test_too_many_requests_are_only_retried_by_get_url(self, back_off_mock):
+        # arrange
+        server = StatusServer(429, {'Retry-After': '1'})
+        self.addCleanup(server.stop)
+
+        # act
+        actual, status = net.get_URL(server.get_url())
+
+        # assert
+        self.assertEqual(429, status)
+        self.assertEqual(net.RATE_LIMIT_RETRIES + 1, server.num_requests)
+        self.assertEqual(net.RATE_LIMIT_RETRIES, back_off_mock.call_count)
+
+    def test_retry_after_is_parsed_as_seconds_or_http_date(self):
+        self.assertEqual(12.0, net._parse_retry_after('12'))
+        self.assertEqual(0.0, net._parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'))
+        self.assertEqual(net.RATE_LIMIT_DEFAULT_BACKOFF, net._parse_retry_after('soon'))
+
+    @patch('lib.akl.utils.net.time.sleep')
+    @patch('lib.akl.utils.net.get_URL')
+    def test_transient_failures_are_retried_with_backoff(self, get_URL_mock, sleep_mock):
+        # arrange
+        get_URL_mock.side_effect = [(None, 500), (None, 503), ('ok', 200)]
+
+        # act
+        actual = net.get_URL_with_retry('http://api.example.com/games?id=1')
+
+        # assert
+        self.assertEqual(('ok', 200), actual)
+        self.assertEqual(2, sleep_mock.call_count)
+        self.assertLessEqual(sleep_mock.call_args_list[1][0][0], net.RETRY_BASE_DELAY * 2)
+        stats = net.get_circuit_breaker_stats()['api.example.com']
+        self.assertEqual('closed', stats['state'])
+        self.assertEqual(2, stats['failures'])
+
+    @patch('lib.akl.utils.net.time.sleep')
+    @patch('lib.akl.utils.net.RateLimiter.back_off')
+    def test_each_kind_of_failure_is_retried_by_one_layer_only(self, back_off_mock, sleep_mock):
+        # arrange
+        too_many_server = StatusServer(429, {'Retry-After': '1'})
+        unavailable_server = StatusServer(503, {'Retry-After': '1'})
+        self.addCleanup(too_many_server.stop)
+        self.addCleanup(unavailable_server.stop)
+
+        # act
+        too_many = net.get_URL_with_retry(too_many_server.get_url())
+        unavailable = net.get_URL_with_retry(unavailable_server.get_url())
+
+        # assert
+        self.assertEqual(429, too_many[1])
+        self.assertEqual(net.RATE_LIMIT_RETRIES + 1, too_many_server.num_requests)
+        self.assertEqual(503, unavailable[1])
+        self.assertEqual(net.RETRY_ATTEMPTS + 1, unavailable_server.num_requests)
+
+    @patch('lib.akl.utils.net.time.sleep')
+    def test_responses_that_cannot_be_decoded_are_not_retried(self, sleep_mock):
+        # arrange
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, headers={}, content=b'<html>', encoding='utf-8')
+
+        # act
+        actual = net.get_URL_with_retry('http://api.example.com/games', content_type=net.ContentType.JSON,
+                                        session=session)
+
+        # assert
+        self.assertEqual((None, net.HTTP_CLIENT_ERROR), actual)
+        self.assertEqual(1, session.get.call_count)
+        sleep_mock.assert_not_called()
+
+    @patch('lib.akl.utils.net.get_http_session')
+    def test_requests_that_get_no_response_return_no_status_code(self, get_http_session_mock):
+        # arrange
+        get_http_session_mock.return_value.get.side_effect = net.requests.exceptions.ReadTimeout()
+
+        # act
+        actual = net.get_URL('http://api.example.com/games')
+
+        # assert
+        self.assertEqual((None, None), actual)
+
+    def test_there_is_one_circuit_breaker_per_host(self):
+        # act
+        game = net.get_circuit_breaker('http://api.example.com/games/1234?media=box')
+        other_game = net.get_circuit_breaker('http://API.example.com/games/5678')
+        other_host = net.get_circuit_breaker('http://cdn.example.com/games/1234')
+
+        # assert
+        self.assertIs(game, other_game)
+        self.assertIsNot(game, other_host)
+        self.assertEqual('api.example.com', game.endpoint)
+
+    @patch('lib.akl.utils.net.time.sleep')
+    @patch('lib.akl.utils.net.time.monotonic', return_value=1000.0)
+    @patch('lib.akl.utils.net.get_URL', return_value=(None, 500))
+    def test_the_circuit_opens_after_failures_and_closes_after_a_successful_trial(self, get_URL_mock, monotonic_mock, sleep_mock):
+        # arrange
+        url = 'http://api.example.com/games?id=1'
+
+        # act
+        failed = net.get_URL_with_retry(url, retries=net.CIRCUIT_FAILURE_THRESHOLD)
+        num_requests_when_opened = get_URL_mock.call_count
+        rejected = net.get_URL_with_retry(url)
+
+        monotonic_mock.return_value = 1000.0 + net.CIRCUIT_RECOVERY_TIME
+        get_URL_mock.return_value = ('ok', 200)
+        recovered = net.get_URL_with_retry(url)
+
+        # assert
+        self.assertEqual((None, 500), failed)
+        self.assertEqual(net.CIRCUIT_FAILURE_THRESHOLD, num_requests_when_opened)
+        self.assertEqual((None, None), rejected)
+        self.assertEqual(('ok', 200), recovered)
+        stats = net.get_circuit_breaker_stats()['api.example.com']
+        self.assertEqual('closed', stats['state'])
+        self.assertEqual(1, stats['opened'])
+        self.assertEqual(2, stats['rejected'])
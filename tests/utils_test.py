@@ -1,6 +1,16 @@
 import unittest, os
+from unittest.mock import patch
 
 import logging
+import tempfile
+import hashlib
+import zlib
+import zipfile
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
 
 from lib.akl.utils import text, io
 
@@ -9,6 +19,11 @@ logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s'
                 datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG) 
 
 class Test_utilstests(unittest.TestCase):
+
+    def tearDown(self):
+        io.misc_clear_checksum_memo()
+        io.misc_close_default_checksum_store()
+        text.clear_ROM_name_cache()
   
     def test_when_getting_url_extension_it_returns_the_correct_extension(self):
 
@@ -59,6 +74,293 @@ class Test_utilstests(unittest.TestCase):
         # assert
         assert actual == expected
 
+    def test_json_arguments_keep_the_standard_separators_and_escape_backslashes(self):
+        # arrange
+        settings = {'path': 'C:\\roms', 'name': 'Pokémon', 'ids': [1, 2]}
+
+        # act
+        actual = io.parse_to_json_arg(settings)
+
+        # assert
+        self.assertEqual('"{"path": "C:\\\\\\\\roms", "name": "Pok\\\\u00e9mon", "ids": [1, 2]}"', actual)
+
+    def test_searching_the_file_cache_ignores_case_and_returns_the_real_filename(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for file_name in ['Super Mario Bros (USA).PNG', 'Zelda.jpg', 'Zelda.Nfo']:
+                open(os.path.join(temp_dir, file_name), 'w').close()
+            dir_path = io.FileName(temp_dir, isdir=True)
+
+            # act
+            io.misc_add_file_cache(dir_path)
+            mario = io.misc_search_file_cache(dir_path, 'super mario bros (usa)', ['jpg', 'png'])
+            zelda = io.misc_search_file_cache(dir_path, 'Zelda', ['png', 'JPG'])
+            missing = io.misc_search_file_cache(dir_path, 'Metroid', ['png', 'jpg'])
+
+            # assert
+            assert mario.getBase() == 'Super Mario Bros (USA).PNG'
+            assert zelda.getBase() == 'Zelda.jpg'
+            assert missing is None
+
+    def test_unchanged_directories_are_loaded_from_the_file_cache_store(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            asset_dir = os.path.join(temp_dir, 'snaps')
+            os.mkdir(asset_dir)
+            open(os.path.join(asset_dir, 'Zelda.png'), 'w').close()
+            os.utime(asset_dir, (1000, 1000))
+            dir_path = io.FileName(asset_dir, isdir=True)
+            store_FN = io.FileName(os.path.join(temp_dir, 'file_listings.json'))
+
+            first_store = io.FileCacheStore(store_FN)
+            io.misc_add_file_cache(dir_path, first_store)
+            first_store.save()
+            store = io.FileCacheStore(store_FN)
+
+            # act
+            with patch.object(io.FileName, 'scanFilesInPath') as scan_unchanged:
+                io.misc_add_file_cache(dir_path, store)
+
+            open(os.path.join(asset_dir, 'Metroid.png'), 'w').close()
+            os.utime(asset_dir, (2000, 2000))
+            io.misc_add_file_cache(dir_path, store)
+            actual = io.misc_search_file_cache(dir_path, 'metroid', ['png'])
+
+            # assert
+            scan_unchanged.assert_not_called()
+            assert actual is not None
+
+    @patch('lib.akl.utils.io.CHECKSUM_BUFFER_SIZE', 1000)
+    @patch('lib.akl.utils.io.CHECKSUM_PARALLEL_MIN_SIZE', 0)
+    def test_checksums_of_parallel_hashes_buffers_match_hashlib(self):
+        # arrange
+        data = os.urandom(4500)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'game.iso')
+            with open(file_path, 'wb') as f:
+                f.write(data)
+            io.misc_clear_checksum_memo()
+
+            # act
+            with patch('os.cpu_count', return_value=4):
+                parallel = io.misc_calculate_checksums(io.FileName(file_path), parallel_hashes=True)
+            io.misc_clear_checksum_memo()
+            serial = io.misc_calculate_checksums(io.FileName(file_path), parallel_hashes=False)
+
+        # assert
+        self.assertEqual(hashlib.sha1(data).hexdigest().upper(), parallel['sha1'])
+        self.assertEqual(hashlib.md5(data).hexdigest().upper(), parallel['md5'])
+        self.assertEqual('{:08X}'.format(zlib.crc32(data)), parallel['crc'])
+        self.assertEqual(4500, parallel['size'])
+        self.assertEqual(serial, parallel)
+
+    def test_checksums_are_memoised_until_the_file_changes(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = [os.path.join(temp_dir, 'game{}.zip'.format(i)) for i in range(3)]
+            for file_path in file_paths:
+                with open(file_path, 'wb') as f:
+                    f.write(file_path.encode('utf-8'))
+                os.utime(file_path, (1000, 1000))
+            files = [io.FileName(file_path) for file_path in file_paths]
+            io.misc_clear_checksum_memo()
+
+            # act
+            first = io.misc_calculate_checksums_bulk(files)
+            with patch('lib.akl.utils.io._misc_hash_buffers') as hash_unchanged:
+                second = io.misc_calculate_checksums_bulk(files)
+            with open(file_paths[0], 'wb') as f:
+                f.write(b'changed')
+            changed = io.misc_calculate_checksums(files[0])
+
+        # assert
+        hash_unchanged.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(3, len(first))
+        self.assertEqual(hashlib.sha1(b'changed').hexdigest().upper(), changed['sha1'])
+
+    def test_checksums_without_a_given_store_are_kept_in_the_default_store(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'roms', 'game.zip')
+            os.mkdir(os.path.dirname(file_path))
+            with open(file_path, 'wb') as f:
+                f.write(b'game')
+            io.misc_close_default_checksum_store()
+
+            # act
+            with patch('lib.akl.utils.io.DEFAULT_CHECKSUM_STORE_PATH', os.path.join(temp_dir, 'akl', 'checksums.db')):
+                expected = io.misc_calculate_checksums(io.FileName(file_path))
+                io.misc_clear_checksum_memo()
+                with patch('lib.akl.utils.io._misc_hash_buffers') as hash_unchanged:
+                    actual = io.misc_calculate_checksums(io.FileName(file_path))
+                default_store = io.misc_get_default_checksum_store()
+                io.misc_close_default_checksum_store()
+
+        # assert
+        hash_unchanged.assert_not_called()
+        self.assertIsNotNone(default_store)
+        self.assertEqual(expected, actual)
+
+    def test_stored_checksums_are_used_until_the_file_changes(self):
+        # arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = [os.path.join(temp_dir, 'disc{}.iso'.format(i)) for i in range(2)]
+            for file_path in file_paths:
+                with open(file_path, 'wb') as f:
+                    f.write(file_path.encode('utf-8'))
+            files = [io.FileName(file_path) for file_path in file_paths]
+            store = io.ChecksumStore(io.FileName(os.path.join(temp_dir, 'checksums.db')))
+            self.addCleanup(store.close)
+            io.misc_clear_checksum_memo()
+            expected = io.misc_calculate_checksums_bulk(files, store=store)
+
+            # act
+            io.misc_clear_checksum_memo()
+            with patch('lib.akl.utils.io._misc_hash_buffers') as hash_unchanged:
+                actual = io.misc_calculate_checksums_bulk(files, store=store)
+            with open(file_paths[1], 'ab') as f:
+                f.write(b'patched')
+            io.misc_clear_checksum_memo()
+            changed = io.misc_calculate_checksums(files[1], store=store)
+            size, mtime_ns = io.misc_get_size_and_mtime_ns(files[1])
+            stored = store.get(file_paths[1], size, mtime_ns)
+
+        # assert
+        hash_unchanged.assert_not_called()
+        self.assertEqual(expected, actual)
+        self.assertNotEqual(expected[file_paths[1]]['sha1'], changed['sha1'])
+        self.assertEqual(changed, stored)
+
+    def test_archive_checksums_are_read_from_the_zip_headers(self):
+        # arrange
+        rom_data = os.urandom(3000)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive_path = os.path.join(temp_dir, 'Super Mario Land (World).zip')
+            with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('readme.txt', b'dumped')
+                archive.writestr('Super Mario Land (World).gb', rom_data)
+            archive_FN = io.FileName(archive_path)
+
+            # act
+            with patch.object(zipfile.ZipFile, 'open') as decompress:
+                headers_only = io.misc_calculate_archive_checksums(archive_FN)
+            with_hashes = io.misc_calculate_archive_checksums(archive_FN, 'README.TXT', with_hashes=True)
+
+        # assert
+        decompress.assert_not_called()
+        self.assertEqual('{:08X}'.format(zlib.crc32(rom_data)), headers_only['crc'])
+        self.assertEqual(3000, headers_only['size'])
+        self.assertEqual('Super Mario Land (World).gb', headers_only['file'])
+        self.assertNotIn('sha1', headers_only)
+        self.assertEqual('readme.txt', with_hashes['file'])
+        self.assertEqual(hashlib.sha1(b'dumped').hexdigest().upper(), with_hashes['sha1'])
+        self.assertEqual(hashlib.md5(b'dumped').hexdigest().upper(), with_hashes['md5'])
+
+    @unittest.skipUnless(py7zr, 'py7zr is not installed')
+    def test_archive_checksums_of_a_7z_file_are_hashed_while_extracting(self):
+        # arrange
+        rom_data = os.urandom(300000)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive_path = os.path.join(temp_dir, 'Tetris (World).7z')
+            with py7zr.SevenZipFile(archive_path, 'w') as archive:
+                archive.writestr(b'dumped', 'readme.txt')
+                archive.writestr(rom_data, 'Tetris (World).gb')
+            archive_FN = io.FileName(archive_path)
+
+            # act
+            headers_only = io.misc_calculate_archive_checksums(archive_FN)
+            with_hashes = io.misc_calculate_archive_checksums(archive_FN, with_hashes=True)
+
+        # assert
+        self.assertEqual('{:08X}'.format(zlib.crc32(rom_data)), headers_only['crc'])
+        self.assertNotIn('sha1', headers_only)
+        self.assertEqual('Tetris (World).gb', with_hashes['file'])
+        self.assertEqual(300000, with_hashes['size'])
+        self.assertEqual(headers_only['crc'], with_hashes['crc'])
+        self.assertEqual(hashlib.sha1(rom_data).hexdigest().upper(), with_hashes['sha1'])
+        self.assertEqual(hashlib.md5(rom_data).hexdigest().upper(), with_hashes['md5'])
+
+    def test_parsing_a_rom_filename_returns_the_title_and_tags(self):
+        # act
+        no_intro = text.parse_ROM_filename('Super Mario World (USA, Europe) (En,Fr,De) (Rev 1) (Beta) [!]')
+        trurip = text.parse_ROM_filename('Final Fantasy II (USA) - (Disc 1 of 2)')
+        tosec = text.parse_ROM_filename('Game (1991)(Publisher)(US-EU)(en)[a]')
+
+        # assert
+        self.assertEqual('Super Mario World', no_intro.title)
+        self.assertEqual(('USA', 'Europe'), no_intro.regions)
+        self.assertEqual(('En', 'Fr', 'De'), no_intro.languages)
+        self.assertEqual('1', no_intro.revision)
+        self.assertEqual(('Beta', '!'), no_intro.flags)
+        self.assertIsNone(no_intro.disc)
+        self.assertEqual('Final Fantasy II', trurip.title)
+        self.assertEqual((1, 2), (trurip.disc, trurip.disc_total))
+        self.assertEqual(('Final Fantasy II', '(USA)', '-', '(Disc 1 of 2)'), trurip.tokens)
+        self.assertEqual(('US', 'EU'), tosec.regions)
+        self.assertEqual(('en',), tosec.languages)
+        self.assertEqual(('a',), tosec.flags)
+
+    def test_parsing_a_tosec_rom_filename_splits_the_joined_language_codes(self):
+        # act
+        tosec = text.parse_ROM_filename('Game (1991)(Publisher)(US)(en-fr)')
+        no_intro = text.parse_ROM_filename('Game (Brazil) (Pt-Br,En)')
+
+        # assert
+        self.assertEqual(('US',), tosec.regions)
+        self.assertEqual(('en', 'fr'), tosec.languages)
+        self.assertEqual(('Brazil',), no_intro.regions)
+        self.assertEqual(('Pt-Br', 'En'), no_intro.languages)
+
+    def test_rom_names_are_cleaned_like_the_tags_are_removed_one_type_at_a_time(self):
+        # arrange
+        names = ['Legend of Zelda, The - A Link to the Past (USA) [!]', 'Dr._Mario (Rev A) {Hack}',
+                 'Game () [] (USA)', 'Game [a (b] c) d', 'Game (a [b) c] d', 'Game (Europe']
+        expected = ['Legend of Zelda, The   A Link to the Past', 'Dr  Mario',
+                    'Game', 'Game  c) d', 'Game (a  d', 'Game (Europe']
+
+        # act
+        actual = [text.format_ROM_name_for_scraping(name) for name in names]
+
+        # assert
+        self.assertEqual(expected, actual)
+
+    def test_rom_titles_and_tokens_are_built_from_the_tokenizer(self):
+        # act
+        title = text.format_ROM_title('[BIOS] CX4 (World)  (Rev 1) [!]', True)
+        unchanged = text.format_ROM_title('[BIOS] CX4 (World)', False)
+        tokens = text.get_ROM_basename_tokens('Final Fantasy II (USA) - (Disc 2 of 2)')
+
+        # assert
+        self.assertEqual('[BIOS] CX4', title)
+        self.assertEqual('[BIOS] CX4 (World)', unchanged)
+        self.assertEqual(['Final Fantasy II', '(USA)', '(Disc 2 of 2)'], tokens)
+
+
+    def test_rom_names_are_parsed_once_for_all_the_callers(self):
+        # arrange
+        text.clear_ROM_name_cache()
+        basename = 'Final Fantasy VII (USA) (Disc 1)'
+
+        # act
+        with patch('lib.akl.utils.text._clean_ROM_name_for_scraping', wraps=text._clean_ROM_name_for_scraping) as clean:
+            search_term = text.format_ROM_name_for_scraping(basename)
+            title = text.format_ROM_title(basename, True)
+            tokens = text.get_ROM_basename_tokens(basename)
+            tokens.append('modified')
+            tokens = text.get_ROM_basename_tokens(basename)
+        stats = text.get_ROM_name_cache_stats()
+
+        # assert
+        clean.assert_called_once_with(basename)
+        self.assertEqual('Final Fantasy VII', search_term)
+        self.assertEqual('Final Fantasy VII', title)
+        self.assertEqual(['Final Fantasy VII', '(USA)', '(Disc 1)'], tokens)
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(3, stats['hits'])
+        self.assertEqual(1, stats['entries'])
+        self.assertEqual(0.75, stats['hit_rate'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Benchmark of the dead ROM detection of the scanners.
+# Compares the hashed index of scanners.find_dead_roms() with a nested loop comparison.
+#
+# Usage: python tools/benchmark_dead_roms.py [number of entries]
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+
+import sys
+import time
+import logging
+
+# --- AKL modules ---
+from lib.akl.api import ROMObj
+from lib.akl.scanners import find_dead_roms, normalise_file_path
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format='%(asctime)s %(module)s %(levelname)s: %(message)s',
+                    datefmt='%m/%d/%Y %I:%M:%S %p', level=logging.INFO)
+
+# Nested loop comparison for reference. Only run on a sample, it takes quadratic time.
+NESTED_LOOP_SAMPLE = 5000
+
+
+def find_dead_roms_nested_loop(candidate_paths, roms):
+    dead_roms = []
+    for rom in roms:
+        rom_file = normalise_file_path(rom.get_scanned_data_element('file'))
+        if not any(normalise_file_path(path) == rom_file for path in candidate_paths):
+            dead_roms.append(rom)
+    return dead_roms
+
+
+def create_entries(num_entries):
+    # Half of the ROMs are dead.
+    candidate_paths = ['smb://nas/roms/Game {0:06d}.zip'.format(i) for i in range(num_entries)]
+    roms = [ROMObj({'scanned_data': {'file': 'smb://nas/roms/game {0:06d}.ZIP'.format(i)}})
+            for i in range(0, num_entries * 2, 2)]
+    return candidate_paths, roms
+
+
+# --- main ----------------------------------------------------------------------------------------
+num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+candidate_paths, roms = create_entries(num_entries)
+start_time = time.perf_counter()
+dead_roms = find_dead_roms(candidate_paths, roms)
+elapsed_time = time.perf_counter() - start_time
+print('Hashed index  {0:7d} candidates, {1:7d} ROMs: {2:7d} dead in {3:8.3f} seconds'.format(
+    num_entries, len(roms), len(dead_roms), elapsed_time))
+
+sample_size = min(num_entries, NESTED_LOOP_SAMPLE)
+candidate_paths, roms = create_entries(sample_size)
+start_time = time.perf_counter()
+dead_roms = find_dead_roms_nested_loop(candidate_paths, roms)
+elapsed_time = time.perf_counter() - start_time
+estimated_time = elapsed_time * (num_entries / sample_size) ** 2
+print('Nested loop   {0:7d} candidates, {1:7d} ROMs: {2:7d} dead in {3:8.3f} seconds (~{4:.0f} seconds for {5})'.format(
+    sample_size, len(roms), len(dead_roms), elapsed_time, estimated_time, num_entries))
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Benchmark of the JSON codec on a large scraper cache.
+# Compares the indented standard library encoding the scraper caches used before with the
+# compact encoding of the standard library and of the selected jsoncodec backend.
+#
+# Usage: python tools/benchmark_json_codec.py [number of entries]
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+
+import json
+import sys
+import time
+import logging
+
+# --- AKL modules ---
+from lib.akl.utils import jsoncodec
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format='%(asctime)s %(module)s %(levelname)s: %(message)s',
+                    datefmt='%m/%d/%Y %I:%M:%S %p', level=logging.INFO)
+
+NUM_RUNS = 3
+
+
+def create_cache(num_entries):
+    # Looks like a metadata cache of a scraper.
+    cache = {}
+    for i in range(num_entries):
+        cache['game {0:06d}'.format(i)] = {
+            'id': i,
+            'title': 'Game {0:06d}: Ünïcödé Edition'.format(i),
+            'year': str(1980 + i % 40),
+            'genre': 'Platform / Action',
+            'developer': 'Developer {}'.format(i % 500),
+            'nplayers': '1-2',
+            'esrb': 'E - Everyone',
+            'rating': i % 10,
+            'plot': 'A long plot description of the game, repeated to get realistic sizes. ' * 4,
+            'tags': ['tag{}'.format(t) for t in range(i % 5)],
+        }
+    return cache
+
+
+def measure(function):
+    best_time = None
+    result = None
+    for _ in range(NUM_RUNS):
+        start_time = time.perf_counter()
+        result = function()
+        elapsed_time = time.perf_counter() - start_time
+        best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+    return best_time, result
+
+
+# --- main ----------------------------------------------------------------------------------------
+num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+cache = create_cache(num_entries)
+print('Backend: {}, {} cache entries'.format(jsoncodec.BACKEND, num_entries))
+
+encoders = [
+    ('json indent=1 sorted', lambda: json.dumps(
+        cache, ensure_ascii=False, sort_keys=True, indent=1, separators=(',', ':'))),
+    ('json compact sorted', lambda: json.dumps(
+        cache, ensure_ascii=False, sort_keys=True, separators=(',', ':'))),
+    ('jsoncodec compact sorted', lambda: jsoncodec.dumps(cache, sort_keys=True)),
+]
+for name, encoder in encoders:
+    elapsed_time, json_str = measure(encoder)
+    json_bytes = json_str.encode('utf-8')
+    print('dumps {0:26s} {1:8.3f} seconds, {2:6.1f} MB'.format(
+        name, elapsed_time, len(json_bytes) / (1024 * 1024)))
+
+    elapsed_time, _ = measure(lambda: json.loads(json_bytes))
+    print('loads {0:26s} {1:8.3f} seconds (json)'.format(name, elapsed_time))
+    elapsed_time, _ = measure(lambda: jsoncodec.loads(json_bytes))
+    print('loads {0:26s} {1:8.3f} seconds (jsoncodec)'.format(name, elapsed_time))
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Benchmark of the ROM name tokenizer.
+# Compares the previous re.sub()/re.findall() implementations of the ROM name functions with
+# the precompiled single pass tokenizer and checks that both return the same results.
+# Every run starts with an empty ROM name cache. The per ROM run calls all the functions the
+# scanner and the scrapers use for a ROM, the cache makes sure every name is parsed once.
+# File names are read from a text file with one name per line or generated in No-Intro, TOSEC,
+# Redump and Trurip style.
+#
+# Usage: python tools/benchmark_rom_name_parsing.py [file with names | number of names]
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+
+import os
+import re
+import sys
+import time
+import random
+import logging
+
+# --- AKL modules ---
+from lib.akl.utils import text
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(format='%(asctime)s %(module)s %(levelname)s: %(message)s',
+                    datefmt='%m/%d/%Y %I:%M:%S %p', level=logging.INFO)
+
+NUM_RUNS = 3
+
+TITLES = ['Super Mario World', 'Final Fantasy VII', 'Legend of Zelda, The - A Link to the Past',
+          'Sonic_the_Hedgehog', 'Metal Gear Solid: Integral', 'R-Type', 'Street Fighter II\' Turbo',
+          'Tomb Raider', 'Pokemon - Red Version', 'Castlevania - Symphony of the Night', 'F-Zero',
+          'Tetris', 'Dr. Mario', 'Ms. Pac-Man', 'Gran Turismo 2', 'CX4', 'PSX bios']
+TAGS = ['(USA)', '(Europe)', '(Japan)', '(USA, Europe)', '(World)', '(En,Fr,De)', '(Rev 1)', '(Rev A)',
+        '(v1.1)', '(Beta)', '(Proto)', '(Unl)', '[!]', '[b1]', '[h1C]', '[a]', '[T+Eng1.0]', '(1991)',
+        '(Nintendo)', '(EU)', '(en)', '{Hack}', '(Demo)', '(Sample)']
+DISC_TAGS = ['(Disc {0})', '(Disc {0} of {1})', ' - (Disc {0} of {1})']
+# >> Unbalanced and nested brackets, to check the results of the fallback.
+ODD_NAMES = ['Game (Europe', 'Game [a (b] c)', 'Game () (USA)', 'Game [] [!]', 'Game ) (USA) (',
+             'Game (a [b) c]', 'Game (USA)  (Rev 1)', '(USA) Game', 'Game {x (y} z)']
+
+
+def create_names(num_names):
+    rng = random.Random(2017)
+    names = list(ODD_NAMES)
+    while len(names) < num_names:
+        title = rng.choice(TITLES)
+        if rng.random() < 0.05: title = '[BIOS] ' + title
+        tags = rng.sample(TAGS, rng.randint(0, 4))
+        if rng.random() < 0.1:
+            disc_total = rng.randint(2, 4)
+            tags.append(rng.choice(DISC_TAGS).format(rng.randint(1, disc_total), disc_total))
+        separator = '' if rng.random() < 0.3 else ' '
+        names.append((title + ' ' + separator.join(tags)).strip())
+    return names
+
+
+def read_names(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return [os.path.splitext(line.strip())[0] for line in file if line.strip()]
+
+
+def old_format_ROM_name_for_scraping(title):
+    title = re.sub(r'\[.*?\]', '', title)
+    title = re.sub(r'\(.*?\)', '', title)
+    title = re.sub(r'\{.*?\}', '', title)
+    title = title.replace('_', ' ')
+    title = title.replace('-', ' ')
+    title = title.replace(':', '')
+    title = title.replace('.', ' ')
+    return title.strip()
+
+
+def old_format_ROM_title(title):
+    tokens = re.findall(r'\[.+?\]\s?|\(.+?\)\s?|\{.+?\}|[^\[\(\{]+', title)
+    str_list = []
+    for token in tokens:
+        stripped_token = token.strip()
+        # >> The old code raised IndexError on whitespace only tokens. Skip them.
+        if not stripped_token: continue
+        if stripped_token[0] in '[({' and stripped_token != '[BIOS]': continue
+        str_list.append(stripped_token)
+    return ' '.join(str_list)
+
+
+def old_get_ROM_basename_tokens(basename_str):
+    tokens = [token.strip() for token in re.findall(r'\[.+?\]|\(.+?\)|\{.+?\}|[^\[\(\{]+', basename_str)]
+    return [token for token in tokens if token and token != '-']
+
+
+def old_per_ROM(name):
+    re.findall(r'\[BIOS\]', name)
+    old_get_ROM_basename_tokens(name)
+    old_format_ROM_name_for_scraping(name)
+    old_format_ROM_title(name)
+
+
+def new_per_ROM(name):
+    'BIOS' in text.parse_ROM_filename(name).flags
+    text.get_ROM_basename_tokens(name)
+    text.format_ROM_name_for_scraping(name)
+    text.format_ROM_title(name, True)
+
+
+def measure(function, names):
+    best_time = None
+    for _ in range(NUM_RUNS):
+        text.clear_ROM_name_cache()
+        start_time = time.perf_counter()
+        for name in names: function(name)
+        elapsed_time = time.perf_counter() - start_time
+        best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+    return best_time
+
+
+# --- main ----------------------------------------------------------------------------------------
+argument = sys.argv[1] if len(sys.argv) > 1 else '100000'
+names = read_names(argument) if os.path.isfile(argument) else create_names(int(argument))
+print('{} ROM names'.format(len(names)))
+
+functions = [
+    ('format_ROM_name_for_scraping', old_format_ROM_name_for_scraping, text.format_ROM_name_for_scraping),
+    ('format_ROM_title', old_format_ROM_title, lambda name: text.format_ROM_title(name, True)),
+    ('get_ROM_basename_tokens', old_get_ROM_basename_tokens, text.get_ROM_basename_tokens),
+]
+for name, old_function, new_function in functions:
+    differences = [n for n in names if old_function(n) != new_function(n)]
+    old_time = measure(old_function, names)
+    new_time = measure(new_function, names)
+    print('{0:30s} old {1:6.3f} s, new {2:6.3f} s, {3:5.2f}x, {4} differences'.format(
+        name, old_time, new_time, old_time / new_time, len(differences)))
+    for difference in differences[:10]:
+        print('    {!r}: {!r} != {!r}'.format(difference, old_function(difference), new_function(difference)))
+
+print('{0:30s}         new {1:6.3f} s'.format('parse_ROM_filename', measure(text.parse_ROM_filename, names)))
+
+old_time = measure(old_per_ROM, names)
+new_time = measure(new_per_ROM, names)
+cache_stats = text.get_ROM_name_cache_stats()
+print('{0:30s} old {1:6.3f} s, new {2:6.3f} s, {3:5.2f}x, cache hit rate {4:.0%}'.format(
+    'per ROM (scan and scrape)', old_time, new_time, old_time / new_time, cache_stats['hit_rate']))
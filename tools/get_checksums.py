@@ -26,6 +26,14 @@ logging.basicConfig(format='%(asctime)s %(module)s %(levelname)s: %(message)s',
 if len(sys.argv) < 2:
     print('First argument must be a file name.')
     sys.exit(1)
+file_FN = io.FileName(sys.argv[1])
 print('Calculating checksums of "{}"'.format(sys.argv[1]))
-checksums = io.misc_calculate_checksums(sys.argv[1])
+checksums = io.misc_calculate_checksums(file_FN)
 pprint.pprint(checksums)
+
+# No-Intro and other DAT files have the checksums of the ROM inside the archive.
+if file_FN.getExt().lower() in io.ARCHIVE_CHECKSUM_EXTENSIONS:
+    print('Calculating checksums of the ROM inside the archive')
+    inner_file_name = sys.argv[2] if len(sys.argv) > 2 else None
+    archive_checksums = io.misc_calculate_archive_checksums(file_FN, inner_file_name, with_hashes=True)
+    pprint.pprint(archive_checksums)